@@ -0,0 +1,139 @@
+#!/usr/bin/env python
+"""
+Benchmark the conversion throughput of each conversion profile.
+
+The sample documents are the files in tests/data along with a set of generated
+text PDFs (multi-page reports with tabular content). Any directories given with
+--docs are converted as well, which is the best way to measure a real corpus
+that includes scanned documents. Each profile's converter is loaded once (the
+load time is reported separately) and then every document is converted
+--rounds times.
+
+Example:
+
+    python benchmarks/conversion_profiles.py --pdfs 5 --pages 10 --docs ~/papers
+"""
+# Standard
+from pathlib import Path
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+# First Party
+import aconfig
+
+# Local
+from ragnardoc import config
+from ragnardoc.conversion import ProfileSelector, build_docling_converter
+
+DATA_DIR = Path(__file__).parent.parent / "tests" / "data"
+
+
+def make_sample_pdf(path: Path, pages: int):
+    """Write a text PDF with a heading, paragraphs, and a table on each page"""
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,  # Page tree, filled in once the page ids are known
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    page_ids = []
+    for page in range(pages):
+        lines = [(72, 740, 18, f"Section {page + 1}: Quarterly report")]
+        for i in range(8):
+            lines.append(
+                (72, 700 - 16 * i, 11, f"Paragraph line {i} of page {page + 1}.")
+            )
+        for row in range(6):
+            for col, text in enumerate(["Item", "Units", "Price", "Total"]):
+                cell = text if row == 0 else f"{text[0]}{row}{col}"
+                lines.append((72 + 110 * col, 540 - 18 * row, 10, cell))
+        stream = b"".join(
+            f"BT /F1 {size} Tf {x} {y} Td ({text}) Tj ET\n".encode()
+            for x, y, size, text in lines
+        )
+        objects.append(b"<< /Length %d >>\nstream\n%sendstream" % (len(stream), stream))
+        content_id = len(objects)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_id
+        )
+        page_ids.append(len(objects))
+    kids = b" ".join(b"%d 0 R" % page_id for page_id in page_ids)
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, pages)
+
+    body = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for obj_id, obj in enumerate(objects, start=1):
+        offsets.append(len(body))
+        body += b"%d 0 obj\n%s\nendobj\n" % (obj_id, obj)
+    xref = len(body)
+    body += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    body += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    body += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (
+        len(objects) + 1,
+        xref,
+    )
+    path.write_bytes(bytes(body))
+
+
+def find_docs(dirs: list[Path]) -> list[str]:
+    return sorted(
+        os.path.join(dirpath, fname)
+        for directory in dirs
+        for dirpath, _, fnames in os.walk(directory)
+        for fname in fnames
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--profiles", nargs="*", default=None)
+    parser.add_argument("--pdfs", type=int, default=3)
+    parser.add_argument("--pages", type=int, default=5)
+    parser.add_argument("--rounds", type=int, default=2)
+    parser.add_argument("--docs", type=Path, nargs="*", default=[])
+    args = parser.parse_args()
+
+    # NOTE: Round trip through json to get a mutable copy of the nested config
+    profiles_config = json.loads(json.dumps(config.scraping.conversion_profiles))
+    selector = ProfileSelector(aconfig.Config(profiles_config, override_env_vars=False))
+    profiles = args.profiles or list(selector.profiles)
+
+    with tempfile.TemporaryDirectory() as pdf_dir:
+        for i in range(args.pdfs):
+            make_sample_pdf(Path(pdf_dir) / f"report_{i}.pdf", args.pages)
+        docs = find_docs([DATA_DIR, Path(pdf_dir)] + args.docs)
+        print(f"Converting {len(docs)} documents {args.rounds} times per profile")
+        print(
+            f"{'profile':<12} {'load':>8} {'total':>9} {'docs/s':>8} "
+            f"{'pages/s':>8} {'errors':>7}"
+        )
+        for profile in profiles:
+            start = time.perf_counter()
+            converter = build_docling_converter(selector.profiles[profile])
+            load = time.perf_counter() - start
+            pages, errors = 0, 0
+            start = time.perf_counter()
+            for _ in range(args.rounds):
+                for doc in docs:
+                    try:
+                        result = converter.convert(doc)
+                        result.document.export_to_markdown()
+                        pages += len(getattr(result, "pages", None) or [None])
+                    except Exception:
+                        errors += 1
+            total = time.perf_counter() - start
+            converted = len(docs) * args.rounds
+            print(
+                f"{profile:<12} {load:7.2f}s {total:8.2f}s "
+                f"{converted / total:8.2f} {pages / total:8.2f} {errors:7d}"
+            )
+
+
+if __name__ == "__main__":
+    main()
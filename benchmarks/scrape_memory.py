@@ -0,0 +1,77 @@
+#!/usr/bin/env python
+"""
+Benchmark the memory held by a scrape result for a large number of synthetic
+documents, comparing a plain list of Documents against the columnar
+DocumentTable.
+
+No files are created. Each synthetic document gets a path in a balanced tree
+of directories under a small number of roots and a synthetic stat result.
+
+Example:
+
+    python benchmarks/scrape_memory.py --entries 1000000
+"""
+# Standard
+from pathlib import Path
+import argparse
+import gc
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+# Local
+from ragnardoc.types import Document, DocumentTable
+
+
+def make_docs(entries: int, roots: int, files_per_dir: int):
+    """Generate the synthetic documents lazily"""
+    now_ns = time.time_ns()
+    for i in range(entries):
+        root = f"/home/user/root_{i % roots}"
+        dir_id = i // files_per_dir
+        dirpath = os.path.join(root, f"dir_{dir_id // 100}", f"sub_{dir_id % 100}")
+        path = os.path.join(dirpath, f"document_{i}.pdf")
+        stat = os.stat_result(
+            (0o100644, i, 1, 1, 1000, 1000, 1000 + i, 0, now_ns // 10**9, 0)
+            + (None, None, None, None, now_ns, None)
+        )
+        yield Document.from_file(path, root, stat=stat)
+
+
+def measure(label: str, build) -> float:
+    """Measure the memory retained by the object that build returns"""
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = build()
+    elapsed = time.perf_counter() - start
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    size_mb = current / 1024 / 1024
+    print(f"{label:<16} {size_mb:10.1f} MB {elapsed:8.2f}s  ({len(result)} docs)")
+    del result
+    return size_mb
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--entries", type=int, default=1_000_000)
+    parser.add_argument("--roots", type=int, default=4)
+    parser.add_argument("--files-per-dir", type=int, default=50)
+    args = parser.parse_args()
+
+    def docs():
+        return make_docs(args.entries, args.roots, args.files_per_dir)
+
+    print(f"{'backend':<16} {'memory':>13} {'build':>9}")
+    list_mb = measure("list[Document]", lambda: list(docs()))
+    table_mb = measure("DocumentTable", lambda: DocumentTable(docs()))
+    print(f"DocumentTable uses {table_mb / list_mb:.1%} of the memory of the list")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python
+"""
+Benchmark the scandir-based DirectoryWalker against the os.walk + os.stat
+sequence that scraping and fingerprinting used to perform.
+
+A synthetic deep tree is generated in a temporary directory (or in --target if
+given, which is useful to place the tree on a network mount).
+
+Example:
+
+    python benchmarks/walk.py --depth 6 --fanout 4 --files 20 --workers 1 4 16
+"""
+# Standard
+from pathlib import Path
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+# Local
+from ragnardoc.scraping.walker import DirectoryWalker
+from ragnardoc.storage.dict_storage import DictStorage
+
+
+def make_tree(root: Path, depth: int, fanout: int, files: int) -> int:
+    """Create a tree with the given depth and fanout with `files` files in each
+    directory. Returns the total number of files created.
+    """
+    total = 0
+    for i in range(files):
+        (root / f"doc_{i}.txt").write_text(f"{root}/{i}")
+        total += 1
+    if depth > 0:
+        for i in range(fanout):
+            subdir = root / f"dir_{i}"
+            subdir.mkdir()
+            total += make_tree(subdir, depth - 1, fanout, files)
+    return total
+
+
+def os_walk_with_stat(root: str) -> int:
+    """The baseline: walk with os.walk, then stat every file"""
+    count = 0
+    for parent, _, fnames in os.walk(root):
+        for fname in fnames:
+            os.stat(os.path.join(parent, fname))
+            count += 1
+    return count
+
+
+def walker_scan(walker: DirectoryWalker, root: str) -> int:
+    """Walk with the DirectoryWalker (stats are prefetched during the walk)"""
+    return sum(len(listing.stats) for listing in walker.walk(root))
+
+
+def time_it(label: str, func, repeats: int):
+    best = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        count = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    print(f"{label:<44} {best * 1000:10.1f} ms  ({count} files)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--depth", type=int, default=5)
+    parser.add_argument("--fanout", type=int, default=4)
+    parser.add_argument("--files", type=int, default=10)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 8])
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--target", help="Directory to build the tree in")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(dir=args.target) as working_dir:
+        root = Path(working_dir) / "tree"
+        root.mkdir()
+        total = make_tree(root, args.depth, args.fanout, args.files)
+        print(f"Generated {total} files in {root}")
+
+        time_it("os.walk + os.stat", lambda: os_walk_with_stat(str(root)), args.repeats)
+        for workers in args.workers:
+            walker = DirectoryWalker(
+                DictStorage().namespace("bench"), use_cache=False, workers=workers
+            )
+            time_it(
+                f"DirectoryWalker(workers={workers})",
+                lambda walker=walker: walker_scan(walker, str(root)),
+                args.repeats,
+            )
+            cached_walker = DirectoryWalker(
+                DictStorage().namespace("bench"), use_cache=True, workers=workers
+            )
+            walker_scan(cached_walker, str(root))
+            time_it(
+                f"DirectoryWalker(workers={workers}, warm cache)",
+                lambda walker=cached_walker: walker_scan(walker, str(root)),
+                args.repeats,
+            )
+
+
+if __name__ == "__main__":
+    main()
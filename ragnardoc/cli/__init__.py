@@ -6,6 +6,7 @@ Central module for all CLI commands
 from .add import AddCommand
 from .common import add_common, use_common
 from .init import InitCommand
+from .quarantine import QuarantineCommand
 from .run import RunCommand
 from .start import StartCommand
 
@@ -14,6 +15,7 @@ all_commands = {
     for cmd in [
         AddCommand,
         InitCommand,
+        QuarantineCommand,
         RunCommand,
         StartCommand,
     ]
@@ -0,0 +1,72 @@
+"""
+List the documents that are quarantined because they failed to convert or
+decode, and release them to be retried in the next ingestion
+"""
+# Standard
+from datetime import datetime
+import argparse
+import os
+
+# First Party
+import alog
+
+# Local
+from .. import config
+from ..scraping import FileScraper
+from ..scraping.quarantine import Quarantine
+from ..storage import storage_factory
+from .base import CommandBase
+
+log = alog.use_channel("QUARANTINE")
+
+
+class QuarantineCommand(CommandBase):
+    __doc__ = __doc__
+    name = "quarantine"
+
+    def add_args(self, parser: argparse.ArgumentParser):
+        """Add the args to release documents"""
+        parser.add_argument(
+            "--release",
+            nargs="+",
+            default=None,
+            help="Release these documents from quarantine",
+        )
+        parser.add_argument(
+            "--release-all",
+            action="store_true",
+            default=False,
+            help="Release all documents from quarantine",
+        )
+
+    def run(self, args: argparse.Namespace):
+        """List the quarantined documents after releasing any requested"""
+        storage = storage_factory.construct(config.storage)
+        quarantine = Quarantine(
+            storage.namespace(FileScraper.storage_namespace),
+            config.scraping.quarantine,
+        )
+        if getattr(args, "release_all", False):
+            quarantine.release(list(quarantine.records()))
+        elif release := getattr(args, "release", None):
+            # NOTE: Normalize the way the scraper normalizes its roots so
+            #   that symlinked paths match the paths that were quarantined
+            quarantine.release(
+                [
+                    os.path.normpath(os.path.abspath(os.path.expanduser(path)))
+                    for path in release
+                ]
+            )
+
+        records = quarantine.records()
+        if not records:
+            print("No documents are quarantined")
+            return
+        for path, record in sorted(records.items()):
+            retry_at = datetime.fromtimestamp(record["retry_at"])
+            print(path)
+            print(f"  error: {record['error']}: {record['message']}")
+            print(
+                f"  failures: {record['failures']}, "
+                f"retry after: {retry_at.isoformat(sep=' ', timespec='seconds')}"
+            )
@@ -19,11 +19,17 @@ class RunCommand(CommandBase):
     __doc__ = __doc__
     name = "run"
 
-    def add_args(self, *_, **__):
-        """There are no additional args to the run command"""
+    def add_args(self, parser: argparse.ArgumentParser):
+        """Add the args to limit the run to a set of changed paths"""
+        parser.add_argument(
+            "--paths",
+            nargs="+",
+            default=None,
+            help="Only scrape these changed paths instead of all configured roots",
+        )
 
     def run(self, args: argparse.Namespace):
         """Perform the single run"""
         instance = RagnardocCore(config)
         with alog.ContextTimer(log.info, "Finished ingestion in: "):
-            instance.ingest()
+            instance.ingest(paths=getattr(args, "paths", None))
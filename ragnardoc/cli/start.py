@@ -16,6 +16,9 @@ import alog
 
 # Local
 from .. import config
+from ..scraping.matcher import PathMatcher
+from ..scraping.roots import plan_roots
+from ..scraping.watcher import InotifyWatcher
 from .base import CommandBase
 
 log = alog.use_channel("START")
@@ -25,8 +28,16 @@ class StartCommand(CommandBase):
     __doc__ = __doc__
     name = "start"
 
+    # If more than this many paths change at once, a full scrape is run rather
+    # than passing all of the paths on the command line
+    _MAX_CHANGED_PATHS = 1000
+
+    # How often the watch loop wakes up to check whether it has been stopped
+    _WATCH_POLL_SECONDS = 1.0
+
     def __init__(self):
         self._period = self._parse_time(config.service.period)
+        self._debounce = self._parse_time(config.service.watch_debounce)
         self._cmd = f"{sys.executable} -m ragnardoc run"
         self._running = False
 
@@ -38,6 +49,14 @@ class StartCommand(CommandBase):
             default=None,
             help="The period to run the ingestion service",
         )
+        parser.add_argument(
+            "--watch",
+            "-w",
+            action="store_true",
+            default=config.service.watch,
+            help="Watch the roots for changes (Linux only) and ingest changed files "
+            "immediately. Full scrapes still run every period.",
+        )
 
     def stop(self):
         self._running = False
@@ -48,18 +67,82 @@ class StartCommand(CommandBase):
         if args.period:
             period = self._parse_time(args.period)
         self._running = True
+        if getattr(args, "watch", False):
+            try:
+                watcher = self._make_watcher()
+            except OSError as err:
+                log.warning(
+                    "Unable to watch for changes, falling back to polling: %s", err
+                )
+            else:
+                with watcher:
+                    self._run_watch(watcher, period)
+                return
         while self._running:
             log.info("Running ingestion service")
             self._ingest()
             log.info("Sleeping for %s", period)
             time.sleep(period.total_seconds())
 
-    def _ingest(self):
+    def _run_watch(self, watcher: InotifyWatcher, period: timedelta):
+        """Run the event-driven loop where changed paths are ingested as they
+        are seen and a full scrape runs every period as a safety net
+        """
+        next_full_scrape = 0
+        while self._running:
+            now = time.monotonic()
+            if now >= next_full_scrape or watcher.overflowed:
+                log.info("Running full ingestion")
+                watcher.overflowed = False
+                self._ingest()
+                next_full_scrape = time.monotonic() + period.total_seconds()
+                continue
+
+            timeout = min(next_full_scrape - now, self._WATCH_POLL_SECONDS)
+            if not (changed := watcher.read_changes(timeout)):
+                continue
+
+            # Wait for the changes to settle so that a burst of saves results in
+            # a single ingestion
+            while self._running and (
+                more_changed := watcher.read_changes(self._debounce.total_seconds())
+            ):
+                changed.update(more_changed)
+            if watcher.overflowed:
+                continue
+            if len(changed) > self._MAX_CHANGED_PATHS:
+                log.info("%d paths changed. Running full ingestion", len(changed))
+                self._ingest()
+                next_full_scrape = time.monotonic() + period.total_seconds()
+            else:
+                log.info("Ingesting %d changed paths", len(changed))
+                self._ingest(sorted(changed))
+
+    def _make_watcher(self) -> InotifyWatcher:
+        """Set up the watches on all configured roots and include paths"""
+        scraping = config.scraping
+        matcher = PathMatcher(
+            exclude_paths=scraping.exclude.paths,
+            exclude_regexprs=scraping.exclude.regexprs,
+        )
+        watcher = InotifyWatcher(prune_dir=matcher.prune_dir)
+        with alog.ContextTimer(log.debug, "Set up watches in: "):
+            for root in plan_roots(scraping.roots):
+                watcher.add_tree(root)
+            for path in scraping.include.paths:
+                watcher.add_file(path)
+        log.info("Watching %d paths for changes", watcher.num_watches)
+        return watcher
+
+    def _ingest(self, paths: list[str] | None = None):
         """Run the ingestion as a subprocess. This is done so that config
         changes are re-parsed on very run.
         """
+        cmd = shlex.split(self._cmd)
+        if paths:
+            cmd += ["--paths", *paths]
         with alog.ContextTimer(log.debug, "Ingestion done in: "):
-            subprocess.run(shlex.split(self._cmd))
+            subprocess.run(cmd)
 
     @staticmethod
     def _parse_time(time_str: str) -> timedelta:
@@ -0,0 +1,29 @@
+"""
+Conversion of documents to text and the supporting caches
+"""
+
+# Local
+from ..factory import ImportableFactory
+from .base import FormatConverter
+from .cache import ConversionCache
+from .chunking import ChunkedConversion
+from .csv_converter import CsvConverter
+from .html_converter import HtmlConverter
+from .inspection import PdfInspection, inspect_pdf, pdf_page_count
+from .pool import (
+    ConversionFailed,
+    ConversionPool,
+    ConversionTimeout,
+    ConverterUnavailable,
+    heartbeat,
+)
+from .profiles import (
+    ProfileSelector,
+    build_docling_converter,
+    docling_converter,
+    export_document,
+)
+
+converter_factory = ImportableFactory("converter")
+converter_factory.register(CsvConverter)
+converter_factory.register(HtmlConverter)
@@ -0,0 +1,33 @@
+"""
+Base class abstraction for a format converter. A FormatConverter is responsible
+for converting files of the formats it is configured for to plain text (or
+markdown) in-process, bypassing docling for formats that don't need its full
+layout analysis.
+"""
+# Standard
+from abc import abstractmethod
+
+# First Party
+import aconfig
+
+# Local
+from ..factory import FactoryConstructible
+
+
+class FormatConverter(FactoryConstructible):
+    __doc__ = __doc__
+
+    @abstractmethod
+    def __init__(self, config: aconfig.Config, instance_name: str):
+        """Construct with the factory config"""
+
+    @abstractmethod
+    def convert(self, path: str) -> str:
+        """Convert the file at the given path
+
+        Args:
+            path: The path to the file
+
+        Returns:
+            content: The text content of the file
+        """
@@ -0,0 +1,172 @@
+"""
+Persistent on-disk cache of converted document content.
+
+Each `ragnardoc run` is a separate process, so converted content does not
+survive between ingestion cycles in memory. Documents that need to be ingested
+again without having changed (e.g. after a failed upload or when only one
+ingestor is out of date) would otherwise be re-converted from scratch. Entries
+are keyed by the document's path, its fingerprint, and the converter version,
+compressed with zlib, and evicted least-recently-used first once the cache
+exceeds its size budget. Recency is tracked with the entry files' mtimes so
+that it carries across processes.
+"""
+# Standard
+from collections import OrderedDict
+import contextlib
+import hashlib
+import os
+import tempfile
+import threading
+import zlib
+
+# First Party
+import aconfig
+import alog
+
+# Local
+from .. import config as base_config
+from .. import syscalls
+
+log = alog.use_channel("CONVCACHE")
+
+
+class ConversionCache:
+    __doc__ = __doc__
+
+    _SUFFIX = ".md.z"
+
+    def __init__(self, config: aconfig.Config, version: str = ""):
+        """Set up the cache
+
+        Args:
+            config: The conversion_cache config
+            version: The version of the converter. Entries from other versions
+                are never returned.
+        """
+        cache_dir = os.path.expanduser(config.path)
+        if not os.path.isabs(cache_dir):
+            cache_dir = os.path.join(base_config.ragnardoc_home, cache_dir)
+        self._dir = cache_dir
+        self._max_size = int(config.max_size_mb * 1024 * 1024)
+        self._compression_level = config.compression_level
+        self._version = version
+
+        # Sizes of the entries from least to most recently used. This is loaded
+        # from disk on first use.
+        self._entries: OrderedDict[str, int] | None = None
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, path: str, fingerprint: str | None, variant: str = "") -> str | None:
+        """Get the cached content for the given version of the document. The
+        variant distinguishes conversions of the same document with different
+        options.
+        """
+        if fingerprint is None:
+            return None
+        key = self._key(path, fingerprint, variant)
+        with self._lock:
+            entries = self._get_entries()
+            if key not in entries:
+                return None
+            entries.move_to_end(key)
+        entry_path = self._entry_path(key)
+        try:
+            with syscalls.open_file(entry_path, "rb") as handle:
+                content = zlib.decompress(handle.read()).decode("utf-8")
+            os.utime(entry_path)
+        except (OSError, zlib.error, UnicodeDecodeError) as err:
+            log.debug("Dropping unreadable cache entry for %s: %s", path, err)
+            self._remove(key)
+            return None
+        log.debug2("Conversion cache hit for %s", path)
+        return content
+
+    def put(self, path: str, fingerprint: str | None, content: str, variant: str = ""):
+        """Add the converted content for the given version of the document"""
+        if fingerprint is None:
+            return
+        key = self._key(path, fingerprint, variant)
+        data = zlib.compress(content.encode("utf-8"), self._compression_level)
+        if len(data) > self._max_size:
+            log.debug("Not caching %s which exceeds the cache size", path)
+            return
+        entry_path = self._entry_path(key)
+        try:
+            os.makedirs(os.path.dirname(entry_path), exist_ok=True)
+            # NOTE: Write to a temp file and rename so that readers never see a
+            #   partial entry
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(entry_path))
+            with os.fdopen(fd, "wb") as handle:
+                handle.write(data)
+            os.replace(tmp_path, entry_path)
+        except OSError as err:
+            log.warning("Failed to write conversion cache entry for %s: %s", path, err)
+            return
+        with self._lock:
+            entries = self._get_entries()
+            self._size += len(data) - entries.pop(key, 0)
+            entries[key] = len(data)
+            self._evict()
+
+    @property
+    def size(self) -> int:
+        """The total size of the cache entries in bytes"""
+        with self._lock:
+            self._get_entries()
+            return self._size
+
+    ## Impl ##
+
+    def _key(self, path: str, fingerprint: str, variant: str) -> str:
+        return hashlib.sha256(
+            "\0".join((self._version, variant, path, fingerprint)).encode("utf-8")
+        ).hexdigest()
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self._dir, key[:2], key + self._SUFFIX)
+
+    def _get_entries(self) -> OrderedDict[str, int]:
+        """Load the index of entries from disk ordered by last use"""
+        if self._entries is None:
+            found = []
+            try:
+                shards = os.listdir(self._dir)
+            except FileNotFoundError:
+                shards = []
+            for shard in shards:
+                try:
+                    with os.scandir(os.path.join(self._dir, shard)) as entries:
+                        for entry in entries:
+                            if entry.name.endswith(self._SUFFIX):
+                                stat = entry.stat()
+                                key = entry.name[: -len(self._SUFFIX)]
+                                found.append((stat.st_mtime_ns, key, stat.st_size))
+                except OSError as err:
+                    log.debug3("Unable to read cache shard %s: %s", shard, err)
+            found.sort()
+            self._entries = OrderedDict((key, size) for _, key, size in found)
+            self._size = sum(self._entries.values())
+            log.debug(
+                "Loaded %d conversion cache entries (%d bytes)",
+                len(self._entries),
+                self._size,
+            )
+        return self._entries
+
+    def _evict(self):
+        """Remove the least recently used entries until within budget. Must be
+        called with the lock held.
+        """
+        while self._size > self._max_size and self._entries:
+            key, size = self._entries.popitem(last=False)
+            self._size -= size
+            log.debug3("Evicting conversion cache entry %s", key)
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(self._entry_path(key))
+
+    def _remove(self, key: str):
+        with self._lock:
+            self._size -= self._get_entries().pop(key, 0)
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(self._entry_path(key))
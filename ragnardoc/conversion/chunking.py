@@ -0,0 +1,166 @@
+"""
+Conversion of long PDFs a range of pages at a time.
+
+Converting a document holds the full converted document (with its page images
+and layout) in memory until the whole document is done, which for a manual with
+thousands of pages is both a lot of memory and a lot of work to lose if the
+conversion crashes or times out. PDFs past a page threshold are instead
+converted in ranges of pages, and the exports of each range are written to disk
+as soon as it's converted so that only one range is held in memory at a time.
+When the conversion of a document is interrupted, the next conversion of the
+same version of the document picks up after the last range that was written.
+The ranges are joined and removed from disk once all of them are converted.
+Text exports are joined with blank lines and JSON exports are joined into a
+list with one document per range.
+"""
+# Standard
+from collections.abc import Callable
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+
+# First Party
+import aconfig
+import alog
+
+# Local
+from .. import config as base_config
+from .. import syscalls
+from .inspection import pdf_page_count
+
+log = alog.use_channel("CHUNKCONV")
+
+RangeConverter = Callable[[int, int], dict[str, str]]
+
+
+class ChunkedConversion:
+    __doc__ = __doc__
+
+    _SUFFIX = ".chunk"
+
+    def __init__(self, config: aconfig.Config, version: str = ""):
+        """Set up chunked conversion. Instances only hold plain settings so
+        that they can be sent to conversion pool workers.
+
+        Args:
+            config: The chunked_conversion config
+            version: The version of the converter. Chunks written by other
+                versions are never reused.
+        """
+        chunk_dir = os.path.expanduser(config.path)
+        if not os.path.isabs(chunk_dir):
+            chunk_dir = os.path.join(base_config.ragnardoc_home, chunk_dir)
+        self._dir = chunk_dir
+        self.min_pages = config.min_pages
+        self.chunk_pages = max(1, config.chunk_pages)
+        self._max_age = config.max_age_hours * 3600
+        self._version = version
+
+    def page_count(self, path: str) -> int | None:
+        """The number of pages of the document if it should be converted in
+        chunks, otherwise None
+        """
+        if not path.lower().endswith(".pdf"):
+            return None
+        pages = pdf_page_count(path)
+        if pages is None or pages < self.min_pages:
+            return None
+        return pages
+
+    def convert(
+        self,
+        path: str,
+        pages: int,
+        convert_range: RangeConverter,
+        variant: str = "",
+        on_chunk: Callable[[], None] | None = None,
+    ) -> dict[str, str]:
+        """Convert the document's pages chunk by chunk and return the joined
+        exports by format
+
+        Args:
+            path: The path to the document
+            pages: The number of pages in the document
+            convert_range: Function that converts the pages from start to end
+                (1-based and inclusive) to exports by format
+            variant: Distinguishes conversions with different options or
+                export formats
+            on_chunk: Called after each chunk is converted
+        """
+        doc_dir = self._doc_dir(path, variant)
+        os.makedirs(doc_dir, exist_ok=True)
+        chunk_paths = []
+        for start in range(1, pages + 1, self.chunk_pages):
+            end = min(pages, start + self.chunk_pages - 1)
+            chunk_path = os.path.join(doc_dir, f"{start:07d}-{end:07d}{self._SUFFIX}")
+            chunk_paths.append(chunk_path)
+            if os.path.exists(chunk_path):
+                log.debug2("Reusing converted pages %d-%d of %s", start, end, path)
+                continue
+            with alog.ContextTimer(
+                log.debug2, "Converted pages %d-%d of %s in: ", start, end, path
+            ):
+                exports = convert_range(start, end)
+            # NOTE: Write to a temp file and rename so that an interrupted
+            #   write is never mistaken for a converted chunk
+            fd, tmp_path = tempfile.mkstemp(dir=doc_dir)
+            with os.fdopen(fd, "w", encoding="utf-8") as handle:
+                json.dump(exports, handle)
+            os.replace(tmp_path, chunk_path)
+            if on_chunk is not None:
+                on_chunk()
+        chunks: dict[str, list[str]] = {}
+        for chunk_path in chunk_paths:
+            with syscalls.open_file(chunk_path, "r", encoding="utf-8") as handle:
+                for export_format, content in json.load(handle).items():
+                    chunks.setdefault(export_format, []).append(content)
+        shutil.rmtree(doc_dir, ignore_errors=True)
+        return {
+            export_format: self._join(export_format, contents)
+            for export_format, contents in chunks.items()
+        }
+
+    def prune(self):
+        """Remove the chunks of conversions that were abandoned (e.g. because
+        the document changed) and not touched within the maximum age
+        """
+        try:
+            entries = list(os.scandir(self._dir))
+        except FileNotFoundError:
+            return
+        cutoff = time.time() - self._max_age
+        for entry in entries:
+            try:
+                if entry.is_dir() and entry.stat().st_mtime < cutoff:
+                    log.debug("Removing abandoned conversion chunks %s", entry.name)
+                    shutil.rmtree(entry.path, ignore_errors=True)
+            except OSError as err:
+                log.debug3("Unable to check conversion chunks %s: %s", entry.name, err)
+
+    ## Impl ##
+
+    @staticmethod
+    def _join(export_format: str, contents: list[str]) -> str:
+        if export_format == "json":
+            return "[" + ",".join(contents) + "]"
+        return "\n\n".join(content.strip() for content in contents if content.strip())
+
+    def _doc_dir(self, path: str, variant: str) -> str:
+        """The directory holding the chunks of this version of the document"""
+        stat = syscalls.stat(path)
+        key = hashlib.sha256(
+            "\0".join(
+                (
+                    self._version,
+                    variant,
+                    path,
+                    str(stat.st_size),
+                    str(stat.st_mtime_ns),
+                    str(self.chunk_pages),
+                )
+            ).encode("utf-8")
+        ).hexdigest()
+        return os.path.join(self._dir, key)
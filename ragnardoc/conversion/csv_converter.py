@@ -0,0 +1,85 @@
+"""
+Converter for delimited text files (CSV, TSV) that renders the rows as a
+markdown table. The first row is used as the header and the delimiter is
+detected from the start of the file.
+"""
+# Standard
+import csv
+import io
+
+# First Party
+import aconfig
+import alog
+
+# Local
+from .. import syscalls
+from .base import FormatConverter
+
+log = alog.use_channel("CSVCONV")
+
+
+class CsvConverter(FormatConverter):
+    __doc__ = __doc__
+
+    name = "csv"
+    config_schema = {
+        "type": "object",
+        "properties": {
+            "encoding": {
+                "type": "string",
+                "description": "The text encoding of the files",
+            },
+            "max_rows": {
+                "type": "integer",
+                "description": "Maximum number of rows to convert (0 for no limit)",
+            },
+            "sniff_bytes": {
+                "type": "integer",
+                "description": "Number of leading bytes used to detect the delimiter",
+            },
+        },
+    }
+    config_defaults = {"encoding": "utf-8", "max_rows": 0, "sniff_bytes": 8192}
+
+    def __init__(self, config: aconfig.Config, instance_name: str):
+        self._encoding = config.encoding
+        self._max_rows = config.max_rows
+        self._sniff_bytes = config.sniff_bytes
+
+    def convert(self, path: str) -> str:
+        with syscalls.open_file(
+            path, encoding=self._encoding, errors="replace", newline=""
+        ) as handle:
+            sample = handle.read(self._sniff_bytes)
+            handle.seek(0)
+            try:
+                dialect = csv.Sniffer().sniff(sample, delimiters=",;\t|")
+            except csv.Error:
+                dialect = csv.excel
+            out = io.StringIO()
+            width = None
+            for i, row in enumerate(csv.reader(handle, dialect)):
+                if self._max_rows and i >= self._max_rows:
+                    log.debug("Truncated %s at %d rows", path, i)
+                    break
+                if width is None:
+                    if not row:
+                        continue
+                    width = len(row)
+                    self._write_row(out, row, width)
+                    out.write("|" + " --- |" * width + "\n")
+                    continue
+                self._write_row(out, row, width)
+        return out.getvalue()
+
+    ## Impl ##
+
+    @staticmethod
+    def _write_row(out: io.StringIO, row: list[str], width: int):
+        """Write the row padded to the header's width"""
+        cells = row + [""] * (width - len(row))
+        out.write(
+            "| "
+            + " | ".join(" ".join(cell.split()).replace("|", "\\|") for cell in cells)
+            + " |\n"
+        )
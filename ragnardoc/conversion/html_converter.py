@@ -0,0 +1,222 @@
+"""
+Converter for HTML files that renders the document's text as markdown using the
+standard library's HTML parser. Headings, paragraphs, lists, preformatted
+blocks, and tables are kept. Scripts, styles, and other non-content elements
+are dropped.
+"""
+# Standard
+from html.parser import HTMLParser
+import re
+
+# First Party
+import aconfig
+
+# Local
+from .. import syscalls
+from .base import FormatConverter
+
+
+class HtmlConverter(FormatConverter):
+    __doc__ = __doc__
+
+    name = "html"
+    config_schema = {
+        "type": "object",
+        "properties": {
+            "encoding": {
+                "type": "string",
+                "description": "The text encoding of the files",
+            },
+        },
+    }
+    config_defaults = {"encoding": "utf-8"}
+
+    def __init__(self, config: aconfig.Config, instance_name: str):
+        self._encoding = config.encoding
+
+    def convert(self, path: str) -> str:
+        with syscalls.open_file(
+            path, encoding=self._encoding, errors="replace"
+        ) as handle:
+            parser = _MarkdownParser()
+            while chunk := handle.read(64 * 1024):
+                parser.feed(chunk)
+            parser.close()
+        return parser.markdown()
+
+
+class _MarkdownParser(HTMLParser):
+    """Parser that accumulates markdown blocks as the document is fed"""
+
+    # Elements whose content is not part of the document's text. The <head> is
+    # not skipped as a whole since its end tag is optional, and the elements
+    # within it with text content are skipped instead.
+    _SKIP = {"script", "style", "title", "noscript", "template", "svg", "iframe"}
+    # Elements that start a new block
+    _BLOCKS = {
+        "p",
+        "div",
+        "section",
+        "article",
+        "main",
+        "header",
+        "footer",
+        "nav",
+        "aside",
+        "blockquote",
+        "figure",
+        "figcaption",
+        "form",
+        "hr",
+        "dl",
+        "dt",
+        "dd",
+        "ul",
+        "ol",
+        "table",
+        "address",
+    }
+    _HEADINGS = {f"h{level}": level for level in range(1, 7)}
+    _SPACE = re.compile(r"\s+")
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self._blocks: list[str] = []
+        self._text: list[str] = []
+        self._prefix = ""
+        self._skip_depth = 0
+        self._pre_depth = 0
+        self._lists: list[list] = []
+        self._row: list[str] | None = None
+        self._row_is_header = False
+        self._table_rows = 0
+        self._in_list_block = False
+
+    def markdown(self) -> str:
+        self._flush()
+        return "\n\n".join(self._blocks) + "\n" if self._blocks else ""
+
+    ## Parser callbacks ##
+
+    def handle_starttag(self, tag: str, attrs: list):
+        if tag in self._SKIP:
+            self._skip_depth += 1
+            return
+        if self._skip_depth:
+            return
+        if self._row is not None and tag not in ("tr", "td", "th", "table"):
+            # Cells are kept on a single line
+            self._text.append(" ")
+            return
+        if tag in self._HEADINGS:
+            self._flush()
+            self._prefix = "#" * self._HEADINGS[tag] + " "
+        elif tag in ("ul", "ol"):
+            self._flush()
+            self._lists.append([tag, 0])
+        elif tag == "li":
+            self._flush()
+            indent = "  " * max(0, len(self._lists) - 1)
+            if self._lists and self._lists[-1][0] == "ol":
+                self._lists[-1][1] += 1
+                self._prefix = f"{indent}{self._lists[-1][1]}. "
+            else:
+                self._prefix = f"{indent}- "
+        elif tag == "pre":
+            self._flush()
+            self._pre_depth += 1
+        elif tag == "br":
+            self._text.append("\n")
+        elif tag == "table":
+            self._flush()
+            self._table_rows = 0
+        elif tag == "tr":
+            self._flush()
+            self._row = []
+            self._row_is_header = False
+        elif tag in ("td", "th"):
+            self._text = []
+            self._row_is_header = self._row_is_header or tag == "th"
+        elif tag in self._BLOCKS:
+            self._flush()
+
+    def handle_endtag(self, tag: str):
+        if tag in self._SKIP:
+            self._skip_depth = max(0, self._skip_depth - 1)
+            return
+        if self._skip_depth:
+            return
+        if self._row is not None and tag not in ("tr", "td", "th", "table"):
+            self._text.append(" ")
+            return
+        if tag in ("ul", "ol"):
+            self._flush()
+            if self._lists:
+                self._lists.pop()
+        elif tag == "pre":
+            text = "".join(self._text).strip("\n")
+            self._text = []
+            self._pre_depth = max(0, self._pre_depth - 1)
+            if text:
+                self._blocks.append(f"```\n{text}\n```")
+                self._in_list_block = False
+        elif tag in ("td", "th"):
+            if self._row is not None:
+                cell = self._collapse("".join(self._text)).replace("|", "\\|")
+                self._row.append(cell)
+            self._text = []
+        elif tag == "tr":
+            self._end_row()
+        elif tag in self._HEADINGS or tag == "li" or tag in self._BLOCKS:
+            self._flush()
+
+    def handle_data(self, data: str):
+        if not self._skip_depth:
+            # NOTE: Outside of preformatted blocks, newlines in the source are
+            #   just whitespace and only <br> breaks lines
+            self._text.append(data if self._pre_depth else data.replace("\n", " "))
+
+    ## Impl ##
+
+    def _collapse(self, text: str) -> str:
+        return self._SPACE.sub(" ", text).strip()
+
+    def _flush(self):
+        """End the current block of text"""
+        if self._row is not None:
+            self._end_row()
+        if self._pre_depth:
+            return
+        text = "\n".join(
+            line
+            for line in (
+                self._SPACE.sub(" ", line).strip()
+                for line in "".join(self._text).split("\n")
+            )
+            if line
+        )
+        if text:
+            is_item = self._prefix.lstrip()[:1] in ("-", *"0123456789")
+            if is_item and self._in_list_block:
+                # Keep the items of a list together as one block
+                self._blocks[-1] += "\n" + self._prefix + text
+            else:
+                self._blocks.append(self._prefix + text)
+            self._in_list_block = is_item
+        self._text = []
+        self._prefix = ""
+
+    def _end_row(self):
+        row, self._row = self._row, None
+        self._text = []
+        if not row:
+            return
+        line = "| " + " | ".join(row) + " |"
+        if self._table_rows == 0:
+            # Markdown tables need a header, so the first row is used as one
+            line += "\n|" + " --- |" * len(row)
+            self._blocks.append(line)
+            self._in_list_block = False
+        else:
+            self._blocks[-1] += "\n" + line
+        self._table_rows += 1
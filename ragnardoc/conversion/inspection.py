@@ -0,0 +1,124 @@
+"""
+Cheap inspection of PDFs ahead of conversion.
+
+The pages of the PDF are read with pdfium (which docling also uses) to count
+the pages that have a text layer and the pages that only hold images (e.g.
+scans). This takes milliseconds per page, where running OCR over a page takes
+seconds, so it is used to only pay for OCR on documents that need it.
+"""
+# Standard
+from dataclasses import dataclass
+
+# First Party
+import alog
+
+log = alog.use_channel("INSPECT")
+
+
+@dataclass(frozen=True)
+class PdfInspection:
+    """The page counts found by inspecting a PDF"""
+
+    # Number of pages in the document
+    pages: int
+    # Number of pages that were inspected
+    inspected: int
+    # Inspected pages with a text layer
+    text_pages: int
+    # Inspected pages with images and no text layer
+    image_pages: int
+
+    @property
+    def has_text(self) -> bool:
+        return self.text_pages > 0
+
+    @property
+    def needs_ocr(self) -> bool:
+        """Whether any page's text can only be extracted with OCR"""
+        return self.image_pages > 0
+
+    @property
+    def complete(self) -> bool:
+        """Whether every page was inspected"""
+        return self.inspected == self.pages
+
+
+def inspect_pdf(
+    path: str, min_chars: int = 16, max_pages: int = 0
+) -> PdfInspection | None:
+    """Inspect the pages of the PDF at path. Pages with fewer than min_chars
+    non-whitespace characters in their text layer are treated as having none.
+    If max_pages is set, longer documents have that many pages inspected,
+    spread evenly through the document.
+
+    Returns None if pypdfium2 is not installed or the PDF can't be read.
+    """
+    # NOTE: Local import since pypdfium2 is an optional (docling) dependency
+    try:
+        # Third Party
+        import pypdfium2 as pdfium
+        import pypdfium2.raw as pdfium_c
+    except ImportError:
+        log.debug2("pypdfium2 not installed, not inspecting %s", path)
+        return None
+
+    try:
+        pdf = pdfium.PdfDocument(path)
+    except Exception as err:
+        log.debug("Failed to open %s for inspection: %s", path, err)
+        return None
+    try:
+        pages = len(pdf)
+        indices = _sample_pages(pages, max_pages)
+        text_pages, image_pages = 0, 0
+        for index in indices:
+            page = pdf[index]
+            try:
+                textpage = page.get_textpage()
+                try:
+                    chars = len("".join(textpage.get_text_range().split()))
+                finally:
+                    textpage.close()
+                if chars >= min_chars:
+                    text_pages += 1
+                elif any(
+                    True for _ in page.get_objects(filter=[pdfium_c.FPDF_PAGEOBJ_IMAGE])
+                ):
+                    image_pages += 1
+            finally:
+                page.close()
+    except Exception as err:
+        log.debug("Failed to inspect %s: %s", path, err)
+        return None
+    finally:
+        pdf.close()
+    inspection = PdfInspection(pages, len(indices), text_pages, image_pages)
+    log.debug2("Inspected %s: %s", path, inspection)
+    return inspection
+
+
+def pdf_page_count(path: str) -> int | None:
+    """The number of pages in the PDF at path, or None if pypdfium2 is not
+    installed or the PDF can't be read
+    """
+    try:
+        # Third Party
+        import pypdfium2 as pdfium
+    except ImportError:
+        return None
+    try:
+        pdf = pdfium.PdfDocument(path)
+    except Exception as err:
+        log.debug("Failed to open %s to count pages: %s", path, err)
+        return None
+    try:
+        return len(pdf)
+    finally:
+        pdf.close()
+
+
+def _sample_pages(pages: int, max_pages: int) -> list[int]:
+    """The indices of the pages to inspect"""
+    if not max_pages or pages <= max_pages:
+        return list(range(pages))
+    return [i * pages // max_pages for i in range(max_pages)]
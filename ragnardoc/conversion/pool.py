@@ -0,0 +1,403 @@
+"""
+A pool of worker processes that convert documents in parallel.
+
+Each worker builds its converter once when it starts and then converts one
+document at a time, so the (slow) model loading is paid once per worker rather
+than once per document. Conversions that run past the configured timeout are
+abandoned and their worker killed. Converters that work through a document in
+steps can report progress with heartbeat() to restart the timeout. Workers
+retire themselves after converting a set number of documents or once their
+resident memory grows past a ceiling so that memory leaked by the converter is
+returned to the system, and they are replaced as needed. Results are returned
+as each conversion finishes along with the time the conversion took.
+"""
+# Standard
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from multiprocessing.connection import Connection, wait
+from typing import Any
+import contextlib
+import math
+import multiprocessing
+import os
+import resource
+import sys
+import time
+import traceback
+
+# First Party
+import aconfig
+import alog
+
+log = alog.use_channel("CONVPOOL")
+
+Converter = Callable[..., str]
+ConverterFactory = Callable[[], Converter]
+
+MB = 1024 * 1024
+
+
+class ConversionFailed(Exception):
+    """Raised for a document whose conversion failed in a worker"""
+
+
+class ConversionTimeout(ConversionFailed):
+    """Raised for a document whose conversion ran past the timeout"""
+
+
+class ConverterUnavailable(ConversionFailed):
+    """Raised for a document that could not be converted because the converter
+    failed to load or its worker exited. The failure is not the document's.
+    """
+
+
+def available_cpus() -> int:
+    """The number of CPUs this process may use, taking the CPU affinity mask
+    and any cgroup CPU quota into account
+    """
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+    if (quota := _cgroup_cpu_quota()) is not None:
+        cpus = min(cpus, math.ceil(quota))
+    return max(1, cpus)
+
+
+def available_memory() -> int | None:
+    """The memory available to this process in bytes, taking any cgroup memory
+    limit into account, or None if it can't be determined
+    """
+    try:
+        memory = os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES")
+    except (AttributeError, ValueError, OSError):
+        memory = None
+    if (limit := _cgroup_memory_limit()) is not None:
+        memory = limit if memory is None else min(memory, limit)
+    return memory
+
+
+def default_workers(max_rss: int) -> int:
+    """The number of workers to run when not configured: one per available
+    CPU, limited so that workers at their memory ceiling fit in memory
+    """
+    workers = available_cpus()
+    if max_rss and (memory := available_memory()) is not None:
+        workers = min(workers, memory // max_rss)
+    return max(1, workers)
+
+
+class ConversionPool:
+    __doc__ = __doc__
+
+    def __init__(
+        self,
+        config: aconfig.Config,
+        make_converter: ConverterFactory,
+    ):
+        """Set up the pool. Workers are started as documents are submitted.
+
+        Args:
+            config: The conversion_pool config
+            make_converter: Picklable function called in each worker to build
+                its converter
+        """
+        self._make_converter = make_converter
+        self._max_documents = config.max_documents
+        self._max_rss = int(config.max_rss_mb * MB)
+        self._timeout = config.timeout or None
+        self.workers = config.workers or default_workers(self._max_rss)
+        self._context = multiprocessing.get_context(config.start_method)
+        self._idle: list[_Worker] = []
+        self._busy: list[_Worker] = []
+        log.debug("Conversion pool size: %d", self.workers)
+
+    @property
+    def has_capacity(self) -> bool:
+        """Whether a document can be submitted without waiting"""
+        return len(self._busy) < self.workers
+
+    @property
+    def in_flight(self) -> int:
+        """The number of documents being converted"""
+        return len(self._busy)
+
+    def submit(self, tag: Any, path: str, *args):
+        """Start converting the document at path. The tag is returned with the
+        result to identify it, and any args are passed to the converter.
+        """
+        if not self.has_capacity:
+            raise RuntimeError("No capacity in the conversion pool")
+        worker = self._idle.pop() if self._idle else self._start_worker()
+        try:
+            worker.conn.send((path, args))
+        except OSError:
+            # The idle worker died (e.g. while loading its converter)
+            self._stop_worker(worker, kill=True)
+            worker = self._start_worker()
+            worker.conn.send((path, args))
+        worker.task = (tag, path)
+        worker.deadline, worker.started = None, None
+        if worker.ready:
+            worker.deadline = self._deadline()
+            worker.started = time.monotonic()
+        self._busy.append(worker)
+
+    def warm(self, count: int | None = None):
+        """Start workers so that they load their converters ahead of the
+        documents being submitted
+
+        Args:
+            count: The number of workers that should be running, up to the
+                size of the pool. All of the pool's workers by default.
+        """
+        count = self.workers if count is None else min(count, self.workers)
+        while len(self._idle) + len(self._busy) < count:
+            self._idle.append(self._start_worker())
+
+    def wait(
+        self, timeout: float | None = None
+    ) -> list[tuple[Any, str | None, Exception | None, float]]:
+        """Wait for at least one submitted conversion to finish and return the
+        (tag, content, error, seconds) results of all that have. If a timeout
+        is given, the results are returned once it has passed even if none
+        have finished, so a timeout of 0 polls without blocking. The time taken
+        is measured in the worker, so it does not include starting the worker
+        and loading its converter, nor any time the result waited to be read.
+        """
+        results = []
+        end = None if timeout is None else time.monotonic() + timeout
+        while self._busy and not results:
+            deadlines = [w.deadline for w in self._busy if w.deadline is not None]
+            if end is not None:
+                deadlines.append(end)
+            remaining = max(0, min(deadlines) - time.monotonic()) if deadlines else None
+            ready = wait([w.conn for w in self._busy], remaining)
+            for worker in list(self._busy):
+                if worker.conn in ready:
+                    if (result := self._receive(worker)) is not None:
+                        results.append(result)
+                elif (
+                    worker.deadline is not None and time.monotonic() >= worker.deadline
+                ):
+                    tag, path = worker.task
+                    log.warning("Conversion of %s timed out", path)
+                    self._busy.remove(worker)
+                    self._stop_worker(worker, kill=True)
+                    results.append(
+                        (
+                            tag,
+                            None,
+                            ConversionTimeout(f"Conversion timed out: {path}"),
+                            self._elapsed(worker),
+                        )
+                    )
+            if end is not None and time.monotonic() >= end:
+                break
+        return results
+
+    def close(self):
+        """Stop all workers, abandoning any conversions in flight"""
+        for worker in self._idle + self._busy:
+            self._stop_worker(worker, kill=worker in self._busy)
+        self._idle, self._busy = [], []
+
+    def __enter__(self) -> "ConversionPool":
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+    ## Impl ##
+
+    def _deadline(self) -> float | None:
+        return None if self._timeout is None else time.monotonic() + self._timeout
+
+    @staticmethod
+    def _elapsed(worker: "_Worker") -> float:
+        return 0.0 if worker.started is None else time.monotonic() - worker.started
+
+    def _start_worker(self) -> "_Worker":
+        parent_conn, child_conn = self._context.Pipe()
+        process = self._context.Process(
+            target=_worker_main,
+            args=(child_conn, self._make_converter, self._max_documents, self._max_rss),
+            daemon=True,
+        )
+        process.start()
+        # NOTE: Close the parent's copy of the child's end so that the parent
+        #   sees EOF if the worker dies
+        child_conn.close()
+        log.debug2("Started conversion worker %d", process.pid)
+        return _Worker(process, parent_conn)
+
+    def _stop_worker(self, worker: "_Worker", kill: bool = False):
+        if kill:
+            worker.process.kill()
+        else:
+            with contextlib.suppress(OSError):
+                worker.conn.send(None)
+        worker.process.join(timeout=None if kill else 5)
+        if worker.process.is_alive():
+            worker.process.kill()
+            worker.process.join()
+        worker.conn.close()
+
+    def _receive(
+        self, worker: "_Worker"
+    ) -> tuple[Any, str | None, Exception | None, float] | None:
+        """Handle a message from a busy worker, returning the result if the
+        message finished its conversion
+        """
+        tag, path = worker.task
+        try:
+            message = worker.conn.recv()
+        except (EOFError, OSError):
+            worker.process.join(timeout=5)
+            log.warning(
+                "Conversion worker exited (%s) converting %s",
+                worker.process.exitcode,
+                path,
+            )
+            self._busy.remove(worker)
+            self._stop_worker(worker, kill=True)
+            return (
+                tag,
+                None,
+                ConverterUnavailable(f"Conversion worker exited: {path}"),
+                self._elapsed(worker),
+            )
+        if message == _READY:
+            worker.ready = True
+            worker.deadline = self._deadline()
+            worker.started = time.monotonic()
+            return None
+        if message == _PROGRESS:
+            worker.deadline = self._deadline()
+            return None
+        content, error, elapsed, retire = message
+        self._busy.remove(worker)
+        worker.task = None
+        if retire:
+            log.debug2("Retiring conversion worker %d", worker.process.pid)
+            self._stop_worker(worker)
+        else:
+            self._idle.append(worker)
+        return (tag, content, error, elapsed)
+
+
+## Workers #####################################################################
+
+_READY = "ready"
+_PROGRESS = "progress"
+
+# The connection to the pool in a worker process
+_worker_conn: Connection | None = None
+
+
+def heartbeat():
+    """Tell the pool that the conversion running in this worker is making
+    progress, restarting its timeout. This does nothing outside of a worker.
+    """
+    if _worker_conn is not None:
+        _worker_conn.send(_PROGRESS)
+
+
+@dataclass
+class _Worker:
+    process: multiprocessing.Process
+    conn: Connection
+    ready: bool = False
+    task: tuple[Any, str] | None = field(default=None)
+    deadline: float | None = None
+    started: float | None = None
+
+
+def _worker_main(
+    conn: Connection,
+    make_converter: ConverterFactory,
+    max_documents: int,
+    max_rss: int,
+):
+    """Convert documents sent on the connection until told to stop or it's
+    time to retire
+    """
+    global _worker_conn
+    _worker_conn = conn
+    convert = make_converter()
+    conn.send(_READY)
+    converted = 0
+    while (task := conn.recv()) is not None:
+        path, args = task
+        content, error = None, None
+        start = time.monotonic()
+        try:
+            content = convert(path, *args)
+        except ConverterUnavailable as err:
+            error = ConverterUnavailable(str(err))
+        except Exception as err:
+            # NOTE: Converter exceptions may not be picklable, so the error is
+            #   sent as a message with the traceback
+            error = ConversionFailed(
+                f"{type(err).__name__}: {err}\n{traceback.format_exc()}"
+            )
+        elapsed = time.monotonic() - start
+        converted += 1
+        retire = (max_documents and converted >= max_documents) or (
+            max_rss and _current_rss() > max_rss
+        )
+        conn.send((content, error, elapsed, bool(retire)))
+        if retire:
+            break
+
+
+def _current_rss() -> int:
+    """The resident memory of this process in bytes"""
+    try:
+        with open("/proc/self/statm") as handle:
+            return int(handle.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        # NOTE: Without /proc, fall back to the peak which is reported in
+        #   bytes on macOS and kilobytes elsewhere
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+## cgroups #####################################################################
+
+
+def _read_first_line(path: str) -> str | None:
+    try:
+        with open(path) as handle:
+            return handle.readline().strip()
+    except OSError:
+        return None
+
+
+def _cgroup_cpu_quota() -> float | None:
+    """The CPU quota of the cgroup (v2 or v1) in CPUs, or None if unlimited"""
+    if line := _read_first_line("/sys/fs/cgroup/cpu.max"):
+        quota, _, period = line.partition(" ")
+        if quota != "max" and period:
+            return int(quota) / int(period)
+        return None
+    quota = _read_first_line("/sys/fs/cgroup/cpu/cpu.cfs_quota_us")
+    period = _read_first_line("/sys/fs/cgroup/cpu/cpu.cfs_period_us")
+    if quota and period and int(quota) > 0:
+        return int(quota) / int(period)
+    return None
+
+
+def _cgroup_memory_limit() -> int | None:
+    """The memory limit of the cgroup (v2 or v1) in bytes, or None if
+    unlimited
+    """
+    for path in (
+        "/sys/fs/cgroup/memory.max",
+        "/sys/fs/cgroup/memory/memory.limit_in_bytes",
+    ):
+        if (line := _read_first_line(path)) and line.isdigit():
+            # NOTE: cgroup v1 reports "unlimited" as a very large number
+            limit = int(line)
+            return limit if limit < 2**60 else None
+    return None
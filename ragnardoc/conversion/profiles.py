@@ -0,0 +1,253 @@
+"""
+Named conversion profiles that trade conversion quality for speed.
+
+Each profile is a set of options for docling's PDF pipeline (which also
+converts images), such as whether to run OCR and table structure recognition.
+Documents are assigned a profile by an ordered list of rules that match on
+file extension, path prefix (e.g. a scraping root), or regular expression.
+PDFs that no rule matches can be routed by inspecting their pages so that only
+those with image-only pages are converted with OCR, and other documents use the
+default profile. PDFs that were only partly inspected are converted with OCR
+since the pages that were skipped may need it. A converter is built for each
+profile the first time a document needs it.
+"""
+# Standard
+from collections.abc import Callable, Iterable
+from typing import Any
+import hashlib
+import json
+import os
+import re
+
+# First Party
+import aconfig
+import alog
+
+# Local
+from .. import syscalls
+from ..types import DEFAULT_EXPORT_FORMAT
+from .chunking import ChunkedConversion
+from .inspection import inspect_pdf
+from .pool import ConverterUnavailable, heartbeat
+
+log = alog.use_channel("PROFILES")
+
+# The options understood in each profile
+PROFILE_OPTIONS = ("do_ocr", "do_table_structure", "table_mode")
+
+ProfileConverter = Callable[[str, str | None], dict[str, str]]
+
+# Exports of a converted DoclingDocument by format
+_EXPORTERS = {
+    "markdown": lambda document: document.export_to_markdown(),
+    "text": lambda document: document.export_to_text(),
+    "html": lambda document: document.export_to_html(),
+    "json": lambda document: json.dumps(document.export_to_dict()),
+}
+
+
+class ProfileSelector:
+    __doc__ = __doc__
+
+    def __init__(self, config: aconfig.Config):
+        """Set up the selector from the conversion_profiles config"""
+        self.profiles = {
+            name: dict(options or {}) for name, options in config.profiles.items()
+        }
+        for name, options in self.profiles.items():
+            if unknown := set(options) - set(PROFILE_OPTIONS):
+                raise ValueError(
+                    f"Unknown options for conversion profile {name}: {sorted(unknown)}"
+                )
+        self.default = config.default
+        self._rules = [_ProfileRule(rule) for rule in config.rules]
+        routing = config.get("routing") or {}
+        self._routing = routing if routing.get("enabled") else None
+        routed = []
+        if self._routing is not None:
+            routed = [self._routing.text_profile, self._routing.scanned_profile]
+        for profile in [self.default] + [rule.profile for rule in self._rules] + routed:
+            if profile not in self.profiles:
+                raise ValueError(f"Unknown conversion profile: {profile}")
+
+        # The profiles PDFs were routed to by path along with the size and
+        # mtime of the version that was inspected
+        self._routed: dict[str, tuple[list[int], str]] = {}
+
+    def select(self, path: str, stat: os.stat_result | None = None) -> str:
+        """Get the name of the profile to convert the document at path with.
+        This reads the document if it is a PDF to be routed by inspection. The
+        routing of each version of a PDF is remembered, so it is only inspected
+        once. If the stat result for the file is already known, it is used
+        rather than reading it again.
+        """
+        for rule in self._rules:
+            if rule.matches(path):
+                return rule.profile
+        if self._routing is None or not path.lower().endswith(".pdf"):
+            return self.default
+        try:
+            stat = stat or syscalls.stat(path)
+            meta = [stat.st_mtime_ns, stat.st_size]
+        except OSError:
+            meta = None
+        routed = self._routed.get(path)
+        if meta is not None and routed is not None and routed[0] == meta:
+            return routed[1]
+        profile = self.default
+        inspection = inspect_pdf(
+            path,
+            min_chars=self._routing.min_page_chars,
+            max_pages=self._routing.max_pages,
+        )
+        if inspection is not None:
+            profile = (
+                self._routing.text_profile
+                if inspection.complete and not inspection.needs_ocr
+                else self._routing.scanned_profile
+            )
+        if meta is not None:
+            self._routed[path] = (meta, profile)
+        return profile
+
+    def cache_variant(self, profile: str) -> str:
+        """A key for the profile's options so that cached conversions are not
+        reused when the profile changes
+        """
+        return profile_variant(profile, self.profiles[profile])
+
+
+def profile_variant(profile: str | None, options: dict[str, Any] | None) -> str:
+    """A key for the profile and its options"""
+    options = json.dumps(options or {}, sort_keys=True)
+    return f"{profile}:{hashlib.sha256(options.encode()).hexdigest()[:16]}"
+
+
+class _ProfileRule:
+    """A rule matching documents by extension, path prefix, and expression.
+    Every criterion that is given must match.
+    """
+
+    def __init__(self, config: aconfig.Config):
+        self.profile = config.profile
+        self._extensions = frozenset(
+            ext.lower().lstrip(".") for ext in config.get("extensions") or []
+        )
+        self._prefixes = tuple(
+            os.path.join(os.path.abspath(os.path.expanduser(path)), "")
+            for path in config.get("paths") or []
+        )
+        self._exprs = [re.compile(expr) for expr in config.get("regexprs") or []]
+
+    def matches(self, path: str) -> bool:
+        if self._extensions and (
+            os.path.splitext(path)[1].lower().lstrip(".") not in self._extensions
+        ):
+            return False
+        if self._prefixes and not path.startswith(self._prefixes):
+            return False
+        if self._exprs and not any(expr.match(path) for expr in self._exprs):
+            return False
+        return True
+
+
+## docling #####################################################################
+
+
+def build_docling_converter(options: dict[str, Any] | None = None):
+    """Build a docling DocumentConverter with the given profile options applied
+    to the PDF and image pipelines
+    """
+    # NOTE: Local import to avoid slow imports unless conversion is needed
+    # Third Party
+    from docling.document_converter import DocumentConverter
+
+    if not options:
+        return DocumentConverter()
+
+    # Third Party
+    from docling.datamodel.base_models import InputFormat
+    from docling.datamodel.pipeline_options import PdfPipelineOptions, TableFormerMode
+    from docling.document_converter import ImageFormatOption, PdfFormatOption
+
+    pipeline_options = PdfPipelineOptions()
+    if "do_ocr" in options:
+        pipeline_options.do_ocr = options["do_ocr"]
+    if "do_table_structure" in options:
+        pipeline_options.do_table_structure = options["do_table_structure"]
+    if "table_mode" in options:
+        pipeline_options.table_structure_options.mode = TableFormerMode(
+            options["table_mode"]
+        )
+    return DocumentConverter(
+        format_options={
+            InputFormat.PDF: PdfFormatOption(pipeline_options=pipeline_options),
+            InputFormat.IMAGE: ImageFormatOption(pipeline_options=pipeline_options),
+        }
+    )
+
+
+def export_document(
+    converter,
+    path: str,
+    formats: Iterable[str] = (DEFAULT_EXPORT_FORMAT,),
+    chunking: ChunkedConversion | None = None,
+    variant: str = "",
+) -> dict[str, str]:
+    """Convert the document at path with the docling converter and export the
+    converted document to each of the formats (always including markdown). The
+    document is converted a range of pages at a time if it's long enough to be
+    converted in chunks.
+    """
+    formats = sorted({DEFAULT_EXPORT_FORMAT, *formats})
+    if unknown := set(formats) - set(_EXPORTERS):
+        raise ValueError(f"Unknown export formats: {sorted(unknown)}")
+
+    def export(**kwargs) -> dict[str, str]:
+        document = converter.convert(path, **kwargs).document
+        return {fmt: _EXPORTERS[fmt](document) for fmt in formats}
+
+    if chunking is None or (pages := chunking.page_count(path)) is None:
+        return export()
+    log.debug("Converting %s (%d pages) in chunks", path, pages)
+    return chunking.convert(
+        path,
+        pages,
+        lambda start, end: export(page_range=(start, end)),
+        variant=f"{variant}:{','.join(formats)}",
+        on_chunk=heartbeat,
+    )
+
+
+def docling_converter(
+    profiles: dict[str, dict[str, Any]] | None = None,
+    chunking: ChunkedConversion | None = None,
+    formats: Iterable[str] = (DEFAULT_EXPORT_FORMAT,),
+) -> ProfileConverter:
+    """Make a function that converts a file with the named profile's converter
+    and exports it to each of the formats, building each converter on first
+    use. This is used as the conversion pool's converter factory.
+    """
+    profiles = profiles or {}
+    formats = tuple(formats)
+    converters = {}
+
+    def convert(path: str, profile: str | None = None) -> dict[str, str]:
+        if (converter := converters.get(profile)) is None:
+            try:
+                with alog.ContextTimer(log.debug, "Loaded %s converter in: ", profile):
+                    converter = build_docling_converter(profiles.get(profile))
+            except Exception as err:
+                raise ConverterUnavailable(
+                    f"Unable to load the {profile} converter: {err}"
+                ) from err
+            converters[profile] = converter
+        return export_document(
+            converter,
+            path,
+            formats,
+            chunking,
+            profile_variant(profile, profiles.get(profile)),
+        )
+
+    return convert
@@ -1,16 +1,19 @@
 """
 The core of RAGNARDoc's document crawling and ingestion
 """
-
 # First Party
 import aconfig
 import alog
 
 # Local
 from . import config as default_config
+from . import syscalls
 from .ingestors import ingestor_factory
+from .pipeline import IngestionPipeline
+from .scheduling import Scheduler
 from .scraping import FileScraper
 from .storage import storage_factory
+from .types import DEFAULT_EXPORT_FORMAT, Document
 
 log = alog.use_channel("RAGNARDOC")
 
@@ -29,6 +32,9 @@ class RagnardocCore:
         # Construct the scraper
         self.scraper = FileScraper(self.storage, self.config.scraping)
 
+        # Construct the scheduler that orders documents for ingestion
+        self.scheduler = Scheduler(self.config.ingestion.scheduling)
+
         # Construct the ingestors
         self.ingestors = []
         for plugin in self.config.ingestion.plugins:
@@ -39,32 +45,56 @@ class RagnardocCore:
                 log.warning(
                     "Failed to construct ingestor %s: %s", plugin.get("type"), err
                 )
+
+        # Export converted documents to every format an ingestor uses
+        self.scraper.export_formats = sorted(
+            {DEFAULT_EXPORT_FORMAT}
+            | {ingestor.export_format for ingestor in self.ingestors}
+        )
+
+        # Construct the pipeline that hands documents to the ingestors
+        self.pipeline = IngestionPipeline(
+            self.ingestors,
+            self.config.ingestion.batch_size,
+            self.config.ingestion.queue_depth,
+        )
         log.info(
             "All configured ingestion plugins: %s",
             [entry.name for entry in self.ingestors],
         )
 
-    def ingest(self):
-        """Run a single ingestion cycle"""
+    def ingest(self, paths: list[str] | None = None):
+        """Run a single ingestion cycle. Documents are handed to the ingestors
+        through the ingestion pipeline as they are found so that uploading
+        starts right away and memory use is bounded by the queue depth, batch
+        size, and scheduling window rather than the number of documents. The
+        order of ingestion is determined by the scheduler. Documents that an
+        ingestor needs are converted on the scraper's conversion pool and
+        handed over as their conversions finish. The conversion pool's workers
+        are stopped at the end of the cycle.
+
+        Args:
+            paths: If given, only these paths are scraped rather than walking
+                all configured roots
+        """
         log.debug("Initializing scrape")
-        with alog.ContextTimer(log.debug, "Done scraping in: "):
-            scrape_result = self.scraper.scrape()
-        for ingestor in self.ingestors:
-            log.debug("Ingesting into %s", ingestor.name)
-            if scrape_result.documents:
-                with alog.ContextLog(
-                    log.info, "Ingesting %d docs", len(scrape_result.documents)
-                ):
-                    try:
-                        ingestor.ingest(scrape_result.documents)
-                    except Exception as err:
-                        log.warning(
-                            "Ingestion failed for ingestor [%s]: err",
-                            ingestor.name,
-                            err,
-                        )
-                        log.debug4(err)
-            if scrape_result.removed:
+        syscalls.reset()
+        if paths is not None:
+            scrape_result = self.scraper.scrape_paths(paths)
+            documents = scrape_result.documents
+        else:
+            scrape_result = self.scraper.scrape_iter()
+            documents = scrape_result
+
+        documents = self.scheduler.schedule(documents)
+        documents = self.scraper.convert_documents(documents, self._needs_ingest)
+        try:
+            self.pipeline.run(documents)
+        finally:
+            self.scraper.close()
+
+        if scrape_result.removed:
+            for ingestor in self.ingestors:
                 with alog.ContextLog(
                     log.info, "Removing %d docs", len(scrape_result.removed)
                 ):
@@ -72,6 +102,14 @@ class RagnardocCore:
                         ingestor.delete(scrape_result.removed)
                     except Exception as err:
                         log.warning(
-                            "Deletion failed for ingestor [%s]: err", ingestor.name, err
+                            "Deletion failed for ingestor [%s]: %s", ingestor.name, err
                         )
                         log.debug4(err)
+
+        log.info("Filesystem syscalls this cycle: %s", syscalls.counts())
+
+    ## Impl ##
+
+    def _needs_ingest(self, document: Document) -> bool:
+        """Whether any ingestor needs the document"""
+        return any(ingestor.needs_ingest(document) for ingestor in self.ingestors)
@@ -141,7 +141,7 @@ class ImportableFactory(Factory):
         # Look for an import_class and import and register it if found
         import_class_val = instance_config.get(self.__class__.IMPORT_CLASS_KEY)
         if import_class_val:
-            assert isinstance(str, import_class_val)
+            assert isinstance(import_class_val, str)
             module_name, class_name = import_class_val.rsplit(".", 1)
             imported_module = importlib.import_module(module_name)
             imported_class = getattr(imported_module, class_name)
@@ -0,0 +1,13 @@
+"""
+Extensible set of strategies for fingerprinting documents to detect changes
+"""
+
+# Local
+from ..factory import ImportableFactory
+from .base import Fingerprinter
+from .content import ContentFingerprinter
+from .metadata import MetadataFingerprinter
+
+fingerprinter_factory = ImportableFactory("fingerprinter")
+fingerprinter_factory.register(MetadataFingerprinter)
+fingerprinter_factory.register(ContentFingerprinter)
@@ -0,0 +1,45 @@
+"""
+Base class abstraction for a fingerprinter. A Fingerprinter is responsible for
+computing the value used to determine whether a document has changed since it
+was last ingested.
+"""
+# Standard
+from abc import abstractmethod
+from collections.abc import Iterable
+import os
+
+# First Party
+import aconfig
+
+# Local
+from ..factory import FactoryConstructible
+from ..storage import StorageBase
+
+
+class Fingerprinter(FactoryConstructible):
+    __doc__ = __doc__
+
+    @abstractmethod
+    def __init__(
+        self,
+        config: aconfig.Config,
+        instance_name: str,
+        *,
+        storage: StorageBase,
+    ):
+        """Construct with a storage instance and the factory config"""
+
+    @abstractmethod
+    def fingerprint(self, path: str, stat: os.stat_result) -> str:
+        """Compute the fingerprint for the file at the given path
+
+        Args:
+            path: The path to the file
+            stat: The current stat result for the file
+
+        Returns:
+            fingerprint: The fingerprint of the file's current version
+        """
+
+    def forget(self, paths: Iterable[str]):
+        """Drop any state held for files that have been removed"""
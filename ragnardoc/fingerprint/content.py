@@ -0,0 +1,98 @@
+"""
+Two-tier fingerprinting that identifies files by the hash of their content.
+
+The metadata fingerprint is checked first and the content is only hashed when
+the metadata has changed since the last time the file was seen. The content
+hash is then stored with the metadata fingerprint so that unchanged files are
+never read. A file that was touched, restored from backup, or checked out
+again with identical bytes keeps its fingerprint, so it is not re-ingested.
+"""
+# Standard
+from collections.abc import Iterable
+import hashlib
+import json
+import mmap
+import os
+
+# First Party
+import aconfig
+import alog
+
+# Local
+from .. import syscalls
+from ..storage import StorageBase
+from .base import Fingerprinter
+from .metadata import MetadataFingerprinter
+
+log = alog.use_channel("FNGRPRNT")
+
+
+class ContentFingerprinter(Fingerprinter):
+    __doc__ = __doc__
+
+    name = "content"
+    config_schema = {
+        "type": "object",
+        "properties": {
+            "algorithm": {
+                "type": "string",
+                "description": "The hashlib algorithm used to hash file content",
+            },
+        },
+    }
+    config_defaults = {"algorithm": "blake2b"}
+
+    def __init__(
+        self,
+        config: aconfig.Config,
+        instance_name: str,
+        *,
+        storage: StorageBase,
+    ):
+        self.instance_name = instance_name
+        self._algorithm = config.algorithm
+        # Make sure the algorithm is valid up front
+        hashlib.new(self._algorithm)
+        self._metadata = MetadataFingerprinter(config, instance_name, storage=storage)
+
+        # Scoped storage holding [metadata fingerprint, content hash] by path
+        self._storage = storage.namespace("__core_fingerprint__")
+
+    def fingerprint(self, path: str, stat: os.stat_result) -> str:
+        metadata_fp = self._metadata.fingerprint(path, stat)
+        if (stored := self._storage.get(path)) is not None:
+            stored_metadata_fp, content_hash = json.loads(stored)
+            if stored_metadata_fp == metadata_fp:
+                return content_hash
+        log.debug2("Hashing content of %s", path)
+        content_hash = f"{self._algorithm}:{self._hash_file(path, stat.st_size)}"
+        self._storage.set(path, json.dumps([metadata_fp, content_hash]))
+        return content_hash
+
+    def forget(self, paths: Iterable[str]):
+        for path in paths:
+            self._storage.pop(path)
+
+    ## Impl ##
+
+    def _hash_file(self, path: str, size: int) -> str:
+        """Hash the file's content. The file is memory mapped so that the hash
+        runs over the page cache without copying it into Python buffers.
+        """
+        hasher = hashlib.new(self._algorithm)
+        with syscalls.open_file(path, "rb") as handle:
+            if size:
+                try:
+                    with mmap.mmap(
+                        handle.fileno(), 0, access=mmap.ACCESS_READ
+                    ) as mapped:
+                        if hasattr(mmap, "MADV_SEQUENTIAL"):
+                            mapped.madvise(mmap.MADV_SEQUENTIAL)
+                        hasher.update(mapped)
+                        return hasher.hexdigest()
+                except (OSError, ValueError) as err:
+                    # Some files (e.g. on certain network or virtual filesystems)
+                    # can't be mapped, so fall back to reading them
+                    log.debug3("Unable to mmap %s: %s", path, err)
+                    handle.seek(0)
+            return hashlib.file_digest(handle, lambda: hasher).hexdigest()
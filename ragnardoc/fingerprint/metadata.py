@@ -0,0 +1,44 @@
+"""
+Fingerprinting based only on the file's metadata. This never reads the file's
+content, but any change to the metadata (e.g. a touch or a restore from
+backup) produces a new fingerprint.
+"""
+# Standard
+import hashlib
+import os
+
+# First Party
+import aconfig
+
+# Local
+from ..storage import StorageBase
+from .base import Fingerprinter
+
+
+class MetadataFingerprinter(Fingerprinter):
+    __doc__ = __doc__
+
+    name = "metadata"
+    config_schema = {"type": "object"}
+
+    def __init__(
+        self,
+        config: aconfig.Config,
+        instance_name: str,
+        *,
+        storage: StorageBase,
+    ):
+        self.instance_name = instance_name
+
+    def fingerprint(self, path: str, stat: os.stat_result) -> str:
+        metadata = (
+            # File size in bytes
+            str(stat.st_size),
+            # Modification time at full precision
+            str(stat.st_mtime_ns),
+            # File permissions
+            str(stat.st_mode),
+            # Inode number, which changes when a file is replaced
+            str(stat.st_ino),
+        )
+        return hashlib.sha256(":".join(metadata).encode()).hexdigest()
@@ -9,6 +9,7 @@ to indicate to the user their update time.
 
 # Standard
 from datetime import datetime
+from typing import BinaryIO
 import os
 
 # Third Party
@@ -20,8 +21,9 @@ import alog
 
 # Local
 from ..storage import StorageBase
-from ..types import Document
+from ..types import DEFAULT_EXPORT_FORMAT, EXPORT_FORMATS, Document
 from .base import Ingestor
+from .streaming import json_text_body
 
 log = alog.use_channel("ANYTHINGLLM")
 
@@ -52,6 +54,15 @@ class AnythingLLMIngestor(Ingestor):
                 },
                 "description": "List of workspaces to add documents to",
             },
+            "stream_uploads": {
+                "type": "boolean",
+                "description": "Stream document content into upload requests",
+            },
+            "export_format": {
+                "type": "string",
+                "enum": list(EXPORT_FORMATS),
+                "description": "The format converted documents are uploaded in",
+            },
         },
         "required": ["apikey"],
     }
@@ -59,6 +70,8 @@ class AnythingLLMIngestor(Ingestor):
         "base_url": "http://localhost:3001",
         "root_folder": "ragnardoc",
         "workspaces": [],
+        "stream_uploads": False,
+        "export_format": DEFAULT_EXPORT_FORMAT,
     }
 
     def __init__(
@@ -80,6 +93,12 @@ class AnythingLLMIngestor(Ingestor):
 
         self._root_folder = config.root_folder
 
+        # Whether to stream content into request bodies
+        self._stream_uploads = config.stream_uploads
+
+        # The format converted documents are exported to for upload
+        self.export_format = config.export_format
+
         self._headers = {
             "Authorization": f"Bearer {config.apikey}",
         }
@@ -113,14 +132,19 @@ class AnythingLLMIngestor(Ingestor):
         for doc in documents:
 
             # Check to see if this doc has changed since last ingesting
-            fingerprint = doc.fingerprint()
-            if self._storage.get(doc.path) == fingerprint:
+            if not self.needs_ingest(doc):
                 log.debug("Document [%s] has not changed. Not uploading", doc.path)
                 continue
+            fingerprint = doc.fingerprint()
 
-            # Ensure the latest content is current
+            # Ensure the latest content is current. When streaming, raw text
+            # documents are read straight from disk as the request is sent.
             try:
-                doc_content = doc.content
+                doc_content = (
+                    doc.open_stream(self.export_format)
+                    if self._stream_uploads
+                    else doc.export(self.export_format)
+                )
             except Exception as err:
                 log.debug("Unable to parse document %s: %s", doc.path, err)
                 log.debug4(err, exc_info=True)
@@ -130,14 +154,7 @@ class AnythingLLMIngestor(Ingestor):
             title = self._get_doc_title(doc)
             log.info("Ingesting document: %s", title)
             resp = requests.post(
-                self._upload_url,
-                headers=self._headers,
-                json={
-                    "textContent": doc_content,
-                    "metadata": {
-                        "title": title,
-                    },
-                },
+                self._upload_url, **self._upload_request(doc_content, title)
             )
             log.debug("Upload response code: %d", resp.status_code)
             log.debug2(resp.text)
@@ -186,6 +203,10 @@ class AnythingLLMIngestor(Ingestor):
             log.debug2("Updating docs in workspace %s", workspace_name)
             self._update_docs_in_workspace(uploaded_docs, workspace_slug)
 
+    def needs_ingest(self, document: Document) -> bool:
+        """Whether the document has changed since it was last uploaded"""
+        return self._storage.get(document.path) != document.fingerprint()
+
     def delete(self, documents: list[Document]):
         """Currently, there is no good way to delete docs!"""
         # Remove all documents from workspaces where they're indexed
@@ -237,6 +258,19 @@ class AnythingLLMIngestor(Ingestor):
         log.debug2("Title for %s: %s", doc.path, title)
         return title
 
+    def _upload_request(self, content: str | BinaryIO, title: str) -> dict:
+        """Make the request args for the raw text upload of the content"""
+        metadata = {"title": title}
+        if isinstance(content, str):
+            return {
+                "headers": self._headers,
+                "json": {"textContent": content, "metadata": metadata},
+            }
+        return {
+            "headers": {**self._headers, "Content-Type": "application/json"},
+            "data": json_text_body(content, "textContent", metadata=metadata),
+        }
+
     def _get_doc_location(self, doc: Document) -> str:
         """Get the location where the doc will be stored in AnythingLLM's doc
         cache dir
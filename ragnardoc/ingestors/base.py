@@ -11,12 +11,17 @@ import aconfig
 # Local
 from ..factory import FactoryConstructible
 from ..storage import StorageBase
-from ..types import Document
+from ..types import DEFAULT_EXPORT_FORMAT, Document
 
 
 class Ingestor(FactoryConstructible):
     __doc__ = __doc__
 
+    # The format converted documents are exported to for this ingestor. The
+    # scraper exports every converted document to the formats of all
+    # ingestors from a single conversion.
+    export_format = DEFAULT_EXPORT_FORMAT
+
     @abstractmethod
     def __init__(
         self,
@@ -35,6 +40,13 @@ class Ingestor(FactoryConstructible):
             documents: list of documents to ingest
         """
 
+    def needs_ingest(self, document: Document) -> bool:
+        """Whether the document has changed since it was last ingested. This is
+        used to skip converting documents that no ingestor needs. By default,
+        every document is assumed to need ingestion.
+        """
+        return True
+
     @abstractmethod
     def delete(self, documents: list[Document]):
         """Delete the set of documents from the RAG instance"""
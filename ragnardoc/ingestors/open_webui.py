@@ -4,6 +4,7 @@ https://openwebui.com/
 """
 
 # Standard
+from typing import BinaryIO
 import json
 import os
 
@@ -16,8 +17,9 @@ import alog
 
 # Local
 from ..storage import StorageBase
-from ..types import Document
+from ..types import DEFAULT_EXPORT_FORMAT, EXPORT_FORMATS, Document
 from .base import Ingestor
+from .streaming import MultipartFileBody, json_text_body
 
 log = alog.use_channel("OPENWEBUI")
 
@@ -41,12 +43,23 @@ class OpenWebUIIngestor(Ingestor):
                 "type": "string",
                 "description": "The knowledge collection to place the docs in",
             },
+            "stream_uploads": {
+                "type": "boolean",
+                "description": "Stream document content into upload requests",
+            },
+            "export_format": {
+                "type": "string",
+                "enum": list(EXPORT_FORMATS),
+                "description": "The format converted documents are uploaded in",
+            },
         },
         "required": ["apikey"],
     }
     config_defaults = {
         "base_url": "http://localhost:8080",
         "knowledge": "ragnardoc",
+        "stream_uploads": False,
+        "export_format": DEFAULT_EXPORT_FORMAT,
     }
 
     def __init__(
@@ -75,6 +88,12 @@ class OpenWebUIIngestor(Ingestor):
         # Scoped storage for re-ingestion fingerprint cache
         self._storage = storage.namespace(self.name + instance_name)
 
+        # Whether to stream content into request bodies
+        self._stream_uploads = config.stream_uploads
+
+        # The format converted documents are exported to for upload
+        self.export_format = config.export_format
+
     #######################
     ## Interface Methods ##
     #######################
@@ -95,9 +114,14 @@ class OpenWebUIIngestor(Ingestor):
                 log.debug("Document [%s] has not changed. Not uploading", doc.path)
                 continue
 
-            # Ensure the latest content is current
+            # Ensure the latest content is current. When streaming, raw text
+            # documents are read straight from disk as the request is sent.
             try:
-                doc_content = doc.content
+                doc_content = (
+                    doc.open_stream(self.export_format)
+                    if self._stream_uploads
+                    else doc.export(self.export_format)
+                )
             except Exception as err:
                 log.debug("Unable to parse document %s: %s", doc.path, err)
                 log.debug4(err, exc_info=True)
@@ -114,8 +138,7 @@ class OpenWebUIIngestor(Ingestor):
                 log.debug2("Updating existing file %s with id %s", doc.path, file_id)
                 resp = requests.post(
                     f"{self._files_url}{file_id}/content/update",
-                    headers=self._headers,
-                    json={"content": doc_content},
+                    **self._json_content_request(doc_content),
                 )
                 if resp.status_code != 200:
                     log.warning(
@@ -145,11 +168,10 @@ class OpenWebUIIngestor(Ingestor):
             else:
                 log.debug2("Uploading new document: %s", doc.path)
                 # Get the filename that will be used in Open WebUI
-                filename = self._get_filename(doc)
+                filename = self._get_filename(doc, self.export_format)
                 resp = requests.post(
                     f"{self._files_url}",
-                    headers=self._headers,
-                    files={"file": (filename, doc_content)},
+                    **self._file_upload_request(filename, doc_content),
                 )
                 if resp.status_code != 200:
                     log.warning("Failed to upload doc %s: %s", doc.path, resp.text)
@@ -192,6 +214,14 @@ class OpenWebUIIngestor(Ingestor):
             # Update the storage to reflect this file
             self._set_file_storage(doc.path, fingerprint, file_id)
 
+    def needs_ingest(self, document: Document) -> bool:
+        """Whether the document has changed since it was last uploaded"""
+        stored_content = self._get_file_storage(document.path)
+        return (
+            stored_content is None
+            or stored_content["fingerprint"] != document.fingerprint()
+        )
+
     def delete(self, documents: list[Document]):
         """Currently, there is no good way to delete docs!"""
         # Get the file_ids from storage for each doc
@@ -222,6 +252,25 @@ class OpenWebUIIngestor(Ingestor):
     ## Private Methods ##
     #####################
 
+    def _json_content_request(self, content: str | BinaryIO) -> dict:
+        """Make the request args for a JSON body holding the content"""
+        if isinstance(content, str):
+            return {"headers": self._headers, "json": {"content": content}}
+        return {
+            "headers": {**self._headers, "Content-Type": "application/json"},
+            "data": json_text_body(content, "content"),
+        }
+
+    def _file_upload_request(self, filename: str, content: str | BinaryIO) -> dict:
+        """Make the request args for a multipart file upload of the content"""
+        if isinstance(content, str):
+            return {"headers": self._headers, "files": {"file": (filename, content)}}
+        body = MultipartFileBody("file", filename, content)
+        return {
+            "headers": {**self._headers, "Content-Type": body.content_type},
+            "data": body,
+        }
+
     def _get_file_storage(self, path: str) -> dict | None:
         if stored_content := self._storage.get(path):
             return json.loads(stored_content)
@@ -264,17 +313,18 @@ class OpenWebUIIngestor(Ingestor):
         return resp.json()["id"]
 
     @staticmethod
-    def _get_filename(doc: Document) -> str:
+    def _get_filename(doc: Document, export_format: str = DEFAULT_EXPORT_FORMAT) -> str:
         """The file name will be formatted with the actual file name at the
         beginning, followed by a qualifying path relative to the root, followed
         by a file extension. This is to allow the user to easily reference the
         file by name, but still disambiguate by path and to avoid confusing Open
-        WebUI with non-text file types.
+        WebUI with non-text file types. Converted documents get the extension
+        of the export format.
         """
         abs_path = os.path.abspath(doc.path)
         file_name = os.path.basename(abs_path)
         if doc.converter:
-            ext = ".md"
+            ext = EXPORT_FORMATS[export_format]
         else:
             file_name, ext = os.path.splitext(file_name)
         rel_path = os.path.relpath(
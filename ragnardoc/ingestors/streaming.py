@@ -0,0 +1,102 @@
+"""
+Request bodies that stream document content from a byte stream (see
+Document.open_stream) rather than building the full body in memory. Each body
+takes ownership of the stream and closes it once the body has been sent.
+"""
+# Standard
+from collections.abc import Iterator
+from typing import BinaryIO
+import codecs
+import io
+import json
+import uuid
+
+# Size of the chunks read from the document stream
+CHUNK_SIZE = 64 * 1024
+
+
+class MultipartFileBody:
+    """A multipart/form-data body with a single file field. The body has a
+    known length and is read like a file, so requests sends it with a
+    Content-Length header.
+    """
+
+    def __init__(
+        self,
+        field: str,
+        filename: str,
+        stream: BinaryIO,
+        content_type: str = "application/octet-stream",
+    ):
+        self.boundary = uuid.uuid4().hex
+        # NOTE: Quotes and newlines are escaped the same way as browsers (and
+        #   urllib3) escape them in form-data names
+        field, filename = (
+            value.replace('"', "%22").replace("\r", "%0D").replace("\n", "%0A")
+            for value in (field, filename)
+        )
+        head = (
+            f"--{self.boundary}\r\n"
+            f'Content-Disposition: form-data; name="{field}"; filename="{filename}"\r\n'
+            f"Content-Type: {content_type}\r\n\r\n"
+        ).encode()
+        tail = f"\r\n--{self.boundary}--\r\n".encode()
+        self._parts = [io.BytesIO(head), stream, io.BytesIO(tail)]
+        self._length = len(head) + self._remaining(stream) + len(tail)
+
+    @property
+    def content_type(self) -> str:
+        return f"multipart/form-data; boundary={self.boundary}"
+
+    def __len__(self) -> int:
+        return self._length
+
+    def read(self, size: int = -1) -> bytes:
+        chunks = []
+        while self._parts and size != 0:
+            chunk = self._parts[0].read(size)
+            if not chunk:
+                self._parts.pop(0).close()
+                continue
+            chunks.append(chunk)
+            if size > 0:
+                size -= len(chunk)
+        return b"".join(chunks)
+
+    def __iter__(self) -> Iterator[bytes]:
+        while chunk := self.read(CHUNK_SIZE):
+            yield chunk
+
+    def close(self):
+        for part in self._parts:
+            part.close()
+        self._parts = []
+
+    ## Impl ##
+
+    @staticmethod
+    def _remaining(stream: BinaryIO) -> int:
+        # NOTE: mmap.seek does not return the new position
+        start = stream.tell()
+        stream.seek(0, io.SEEK_END)
+        end = stream.tell()
+        stream.seek(start)
+        return end - start
+
+
+def json_text_body(stream: BinaryIO, text_key: str, **fields) -> Iterator[bytes]:
+    """Generate a JSON object whose text_key field holds the UTF-8 text of the
+    stream, followed by the other given fields. The text is escaped chunk by
+    chunk so the body is never held in memory as a whole. The length is not
+    known ahead of time, so requests sends it with chunked transfer encoding.
+    """
+    with stream:
+        yield f'{{{json.dumps(text_key)}: "'.encode()
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        while chunk := stream.read(CHUNK_SIZE):
+            if text := decoder.decode(chunk):
+                yield json.dumps(text)[1:-1].encode("utf-8")
+        if text := decoder.decode(b"", final=True):
+            yield json.dumps(text)[1:-1].encode("utf-8")
+    rest = json.dumps(fields)[1:]
+    yield (f'", {rest}' if fields else '"}').encode("utf-8")
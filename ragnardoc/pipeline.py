@@ -0,0 +1,134 @@
+"""
+The staged pipeline that moves documents from scraping to the ingestors.
+
+The scrape (along with scheduling and conversion) runs on the calling thread
+and hands each document to every ingestor through a bounded queue per
+ingestor. Each ingestor runs on its own thread, ingesting batches as they fill,
+so uploading to one ingestor overlaps with uploading to the others and with
+the scrape and conversion of the documents that follow. When an ingestor falls
+behind, its full queue blocks the scrape until it catches up, so the number of
+documents in flight (and their content in memory) is bounded by the queue
+depth and batch size rather than the size of the scrape. A document's content
+is released as soon as every ingestor is done with it.
+"""
+# Standard
+from collections.abc import Iterable
+import queue
+import threading
+
+# First Party
+import alog
+
+# Local
+from .ingestors.base import Ingestor
+from .types import Document
+
+log = alog.use_channel("PIPELINE")
+
+# Marker put on the ingestor queues after the last document
+_DONE = object()
+
+
+class IngestionPipeline:
+    __doc__ = __doc__
+
+    def __init__(self, ingestors: list[Ingestor], batch_size: int, queue_depth: int):
+        """Set up the pipeline
+
+        Args:
+            ingestors: The ingestors that every document is offered to
+            batch_size: The number of documents handed to an ingestor at a time
+            queue_depth: The number of documents that can wait for each
+                ingestor before the scrape is paused
+        """
+        self._ingestors = ingestors
+        self._batch_size = batch_size
+        self._queue_depth = queue_depth
+        # Number of ingestors still holding each document, keyed by id
+        self._holds: dict[int, int] = {}
+        self._holds_lock = threading.Lock()
+        # Set if the scrape fails so that the ingestors skip the documents that
+        # are still queued
+        self._cancelled = threading.Event()
+
+    def run(self, documents: Iterable[Document]):
+        """Offer all of the documents to every ingestor, returning once all of
+        them have been ingested. Iterating the documents drives the upstream
+        stages (scraping, scheduling, and conversion).
+        """
+        queues = [queue.Queue(self._queue_depth) for _ in self._ingestors]
+        threads = [
+            threading.Thread(
+                target=self._ingest_worker,
+                args=(ingestor, docs),
+                name=f"ingest-{ingestor.name}",
+                daemon=True,
+            )
+            for ingestor, docs in zip(self._ingestors, queues, strict=True)
+        ]
+        self._cancelled.clear()
+        for thread in threads:
+            thread.start()
+        try:
+            for doc in documents:
+                if not queues:
+                    continue
+                with self._holds_lock:
+                    key = id(doc)
+                    self._holds[key] = self._holds.get(key, 0) + len(queues)
+                for docs in queues:
+                    docs.put(doc)
+        except BaseException:
+            self._cancelled.set()
+            raise
+        finally:
+            for docs in queues:
+                docs.put(_DONE)
+            for thread in threads:
+                thread.join()
+
+    ## Impl ##
+
+    def _ingest_worker(self, ingestor: Ingestor, docs: queue.Queue):
+        """Ingest the documents from the queue in batches until the end of the
+        scrape
+        """
+        batch = []
+        while True:
+            doc = docs.get()
+            if doc is not _DONE:
+                batch.append(doc)
+            if batch and (doc is _DONE or len(batch) >= self._batch_size):
+                self._ingest_batch(ingestor, batch)
+                batch = []
+            if doc is _DONE:
+                return
+
+    def _ingest_batch(self, ingestor: Ingestor, batch: list[Document]):
+        if self._cancelled.is_set():
+            self._release(batch)
+            return
+        log.debug("Ingesting into %s", ingestor.name)
+        try:
+            with alog.ContextLog(log.info, "Ingesting %d docs", len(batch)):
+                ingestor.ingest(batch)
+        except Exception as err:
+            log.warning("Ingestion failed for ingestor [%s]: %s", ingestor.name, err)
+            log.debug4(err)
+        finally:
+            self._release(batch)
+
+    def _release(self, batch: list[Document]):
+        """Release the content of the documents that all ingestors are done
+        with
+        """
+        done = []
+        with self._holds_lock:
+            for doc in batch:
+                key = id(doc)
+                self._holds[key] -= 1
+                if not self._holds[key]:
+                    del self._holds[key]
+                    done.append(doc)
+        for doc in done:
+            doc.release()
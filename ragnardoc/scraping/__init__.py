@@ -0,0 +1,8 @@
+"""
+Scraping of the local filesystem for documents to ingest
+"""
+
+# Local
+from .file_scraper import FileScraper
+from .matcher import PathMatcher
+from .walker import DirectoryWalker
@@ -0,0 +1,227 @@
+"""
+Admission policy that screens documents before they are converted.
+
+Each document is checked against per-extension size limits and its first bytes
+are sniffed to make sure the content matches its type: raw text documents must
+not look binary and documents of known binary formats must start with the
+format's magic bytes. Documents whose conversion produces no content are also
+rejected. Results are recorded with the document's fingerprint so that each
+version of a file is only checked (and rejected documents are only tried) once.
+Only rejections are stored by path. Admitted documents are stored as a short
+digest of their path and fingerprint, which is all that is needed to skip
+checking them again.
+"""
+# Standard
+import codecs
+import hashlib
+import json
+import os
+import threading
+
+# First Party
+import aconfig
+import alog
+
+# Local
+from .. import syscalls
+from ..storage import StorageBase
+
+log = alog.use_channel("ADMISSION")
+
+
+class DocumentRejected(ValueError):
+    """Raised when a document is rejected by the admission policy"""
+
+    def __init__(self, path: str, reason: str):
+        super().__init__(f"Document {path} rejected: {reason}")
+        self.path = path
+        self.reason = reason
+
+
+class AdmissionPolicy:
+    __doc__ = __doc__
+
+    _records_key = "admission"
+    _admitted_key = "admission_admitted"
+
+    # Magic bytes for known binary formats by extension. The signatures may
+    # appear anywhere in the first block of the file.
+    MAGIC_BYTES = {
+        "pdf": (b"%PDF-",),
+        "docx": (b"PK\x03\x04",),
+        "pptx": (b"PK\x03\x04",),
+        "xlsx": (b"PK\x03\x04",),
+        "png": (b"\x89PNG\r\n\x1a\n",),
+        "jpg": (b"\xff\xd8\xff",),
+        "jpeg": (b"\xff\xd8\xff",),
+        "tif": (b"II*\x00", b"MM\x00*"),
+        "tiff": (b"II*\x00", b"MM\x00*"),
+        "bmp": (b"BM",),
+    }
+
+    # Textual formats that are converted, but should still not look binary
+    TEXT_FORMATS = ("html", "htm", "xhtml", "csv", "adoc", "asciidoc")
+
+    # Window in which the magic bytes must be found
+    _MAGIC_WINDOW = 1024
+
+    def __init__(
+        self,
+        storage: StorageBase.StorageNamespaceBase,
+        config: aconfig.Config,
+        raw_text_extensions: list[str],
+    ):
+        self._storage = storage
+        self._enabled = config.enabled
+        self._max_size = self._to_bytes(config.max_size_mb)
+        self._max_sizes = {
+            ext.lower(): self._to_bytes(size)
+            for ext, size in (config.max_size_mb_by_extension or {}).items()
+        }
+        self._sniff_bytes = config.sniff_bytes
+        self._raw_text_extensions = set(raw_text_extensions)
+        self._text_extensions = self._raw_text_extensions | set(self.TEXT_FORMATS)
+
+        # Rejected documents by path: [fingerprint, reason]
+        self._records: dict[str, list] = {
+            path: record
+            for path, record in json.loads(
+                self._storage.get(self._records_key) or "{}"
+            ).items()
+            if record[1]
+        }
+        # Digests of the path and fingerprint of admitted documents
+        self._admitted: set[str] = set(
+            json.loads(self._storage.get(self._admitted_key) or "[]")
+        )
+        # Fingerprints of the documents admitted in this process by path, so
+        # that they can be rejected after the fact
+        self._admitted_fingerprints: dict[str, str] = {}
+        self._dirty = False
+        self._admitted_dirty = False
+        self._lock = threading.Lock()
+
+    def admit(
+        self, path: str, fingerprint: str | None, stat: os.stat_result | None = None
+    ) -> str | None:
+        """Check whether the document should be admitted for conversion and
+        ingestion.
+
+        Returns:
+            reason (str | None): The reason the document was rejected or None
+                if it is admitted
+        """
+        if not self._enabled or fingerprint is None:
+            return None
+        digest = self._digest(path, fingerprint)
+        with self._lock:
+            record = self._records.get(path)
+            if record and record[0] == fingerprint:
+                return record[1]
+            if digest in self._admitted:
+                self._admitted_fingerprints[path] = fingerprint
+                return None
+        try:
+            reason = self._check(path, stat or syscalls.stat(path))
+        except OSError as err:
+            log.debug("Unable to check %s for admission: %s", path, err)
+            return None
+        with self._lock:
+            if reason:
+                log.info("Rejecting document %s: %s", path, reason)
+                self._records[path] = [fingerprint, reason]
+                self._dirty = True
+            else:
+                if self._records.pop(path, None) is not None:
+                    self._dirty = True
+                self._admitted.add(digest)
+                self._admitted_fingerprints[path] = fingerprint
+                self._admitted_dirty = True
+        return reason
+
+    def reject(self, path: str, reason: str):
+        """Record that the current version of an admitted document has been
+        rejected after the fact (e.g. because conversion produced no content)
+        """
+        if not self._enabled:
+            return
+        with self._lock:
+            if (fingerprint := self._admitted_fingerprints.pop(path, None)) is None:
+                return
+            log.info("Rejecting document %s: %s", path, reason)
+            self._admitted.discard(self._digest(path, fingerprint))
+            self._records[path] = [fingerprint, reason]
+            self._dirty = self._admitted_dirty = True
+        self.flush()
+
+    def retain(self, paths: set[str] | dict[str, str]):
+        """Drop the records for all paths that are not in the given set. The
+        admitted documents are reduced to those admitted in this process, so
+        this should only be called after a full scrape.
+        """
+        with self._lock:
+            if removed := [path for path in self._records if path not in paths]:
+                for path in removed:
+                    del self._records[path]
+                self._dirty = True
+            self._admitted_fingerprints = {
+                path: fingerprint
+                for path, fingerprint in self._admitted_fingerprints.items()
+                if path in paths
+            }
+            admitted = {
+                self._digest(path, fingerprint)
+                for path, fingerprint in self._admitted_fingerprints.items()
+            }
+            if admitted != self._admitted:
+                self._admitted = admitted
+                self._admitted_dirty = True
+
+    def flush(self):
+        """Persist the records if they've changed"""
+        with self._lock:
+            if self._dirty:
+                self._storage.set(self._records_key, json.dumps(self._records))
+                self._dirty = False
+            if self._admitted_dirty:
+                self._storage.set(
+                    self._admitted_key, json.dumps(sorted(self._admitted))
+                )
+                self._admitted_dirty = False
+
+    ## Impl ##
+
+    @staticmethod
+    def _digest(path: str, fingerprint: str) -> str:
+        return hashlib.blake2b(
+            f"{path}\0{fingerprint}".encode(), digest_size=8
+        ).hexdigest()
+
+    @staticmethod
+    def _to_bytes(size_mb: float | None) -> int | None:
+        return int(size_mb * 1024 * 1024) if size_mb else None
+
+    def _check(self, path: str, stat: os.stat_result) -> str | None:
+        ext = os.path.splitext(path)[1].lower().lstrip(".")
+        if stat.st_size == 0:
+            return "empty file"
+        max_size = self._max_sizes.get(ext, self._max_size)
+        if max_size and stat.st_size > max_size:
+            return f"size {stat.st_size} exceeds limit of {max_size} bytes"
+        if not self._sniff_bytes:
+            return None
+
+        with syscalls.open_file(path, "rb") as handle:
+            head = handle.read(self._sniff_bytes)
+        if ext in self._text_extensions and b"\0" in head:
+            return "binary content in text document"
+        if ext in self._raw_text_extensions:
+            try:
+                codecs.getincrementaldecoder("utf-8")().decode(head, final=False)
+            except UnicodeDecodeError:
+                return "text document is not valid UTF-8"
+        if signatures := self.MAGIC_BYTES.get(ext):
+            window = head[: self._MAGIC_WINDOW]
+            if not any(signature in window for signature in signatures):
+                return f"content does not match the {ext} format"
+        return None
@@ -0,0 +1,725 @@
+"""
+Module for scraping files to ingest
+"""
+# Standard
+from collections.abc import Callable, Generator, Iterable, Iterator
+import collections
+import functools
+import importlib.metadata
+import json
+import os
+import threading
+import time
+
+# First Party
+import aconfig
+import alog
+
+# Local
+from .. import syscalls
+from ..conversion import (
+    ChunkedConversion,
+    ConversionCache,
+    ConversionPool,
+    ConverterUnavailable,
+    FormatConverter,
+    ProfileSelector,
+    build_docling_converter,
+    converter_factory,
+    docling_converter,
+    export_document,
+)
+from ..fingerprint import fingerprinter_factory
+from ..storage import StorageBase
+from ..types import (
+    DEFAULT_EXPORT_FORMAT,
+    Converter,
+    Document,
+    DocumentTable,
+    ScrapeResult,
+    ScrapeStream,
+)
+from .admission import AdmissionPolicy, DocumentRejected
+from .ignore import IgnoreRuleCache, IgnoreStack, is_ignored
+from .matcher import PathMatcher
+from .quarantine import Quarantine
+from .roots import file_id, plan_roots
+from .slow_lane import SlowLane
+from .walker import DirectoryWalker, DirListing
+
+log = alog.use_channel("SCRAPING")
+
+
+class FileScraper:
+
+    # The storage namespace holding the scraper's state
+    storage_namespace = "__core_scraping__"
+
+    _scrape_cache_key = "scrape_cache"
+
+    def __init__(self, storage: StorageBase, config: aconfig.Config):
+
+        # The docling converter is slow to load, so it is only loaded once a
+        # conversion is needed. If enabled, it is preloaded in the background
+        # as soon as the first document that needs it is found. There is one
+        # converter for each conversion profile.
+        self._profiles = ProfileSelector(config.conversion_profiles)
+        self._converters = {}
+        self._converter_lock = threading.Lock()
+        self._preload_converter = config.preload_converter
+        self._preloading = False
+
+        # The formats each converted document is exported to. All formats are
+        # exported from a single conversion of the document.
+        self.export_formats = [DEFAULT_EXPORT_FORMAT]
+
+        # Figure out the paths to scrape from, collapsing overlapping roots so
+        # that shared subtrees are only walked once
+        self.roots = plan_roots(config.roots)
+
+        # Save the configured set of raw text types that don't need conversion
+        self.raw_text_extensions = config.raw_text_extensions
+
+        # Compile the include/exclude patterns
+        self.matcher = PathMatcher(
+            include_paths=config.include.paths,
+            include_regexprs=config.include.regexprs,
+            exclude_paths=config.exclude.paths,
+            exclude_regexprs=config.exclude.regexprs,
+        )
+
+        # Scoped storage for detecting deletions and caching directory listings
+        self._storage = storage.namespace(self.storage_namespace)
+        self._auto_delete = config.auto_delete
+
+        # Strategy for fingerprinting documents to detect changes
+        self._fingerprinter = fingerprinter_factory.construct(
+            config.fingerprint, storage=storage
+        )
+
+        # Converted content that persists between ingestion cycles
+        try:
+            converter_version = importlib.metadata.version("docling")
+        except importlib.metadata.PackageNotFoundError:
+            converter_version = "unknown"
+        self._conversion_cache = None
+        if config.conversion_cache.enabled:
+            self._conversion_cache = ConversionCache(
+                config.conversion_cache, f"docling-{converter_version}"
+            )
+
+        # Conversion of long PDFs a range of pages at a time
+        self._chunking = None
+        if config.chunked_conversion.enabled:
+            self._chunking = ChunkedConversion(
+                config.chunked_conversion, f"docling-{converter_version}"
+            )
+            self._chunking.prune()
+
+        # Lightweight converters for specific extensions that bypass docling
+        self._format_converters = {
+            ext.lower().lstrip("."): self._make_format_converter(
+                converter_factory.construct(converter_config, f"{ext}-converter")
+            )
+            for ext, converter_config in config.converters.items()
+        }
+
+        # Worker processes that convert documents ahead of ingestion. The pool
+        # is started when the first document needs converting.
+        self._conversion_pool_config = (
+            config.conversion_pool if config.conversion_pool.enabled else None
+        )
+        self._conversion_pool = None
+
+        # Documents that are slow to convert are kept from holding up others
+        self._slow_lane = SlowLane(self._storage, config.slow_lane)
+        self._slow_in_flight = 0
+
+        # Screening of documents before conversion
+        self._admission = AdmissionPolicy(
+            self._storage, config.admission, self.raw_text_extensions
+        )
+
+        # Documents that failed to load, skipped until they change or are due
+        # to be retried
+        self._quarantine = Quarantine(self._storage, config.quarantine)
+
+        # Hierarchical ignore files found while walking
+        self._ignore_file = config.ignore_file
+        self._ignore_rules = IgnoreRuleCache(self._storage)
+
+        # Walker that reuses listings of unchanged directories and prefetches
+        # file stats on a pool of workers
+        self._walker = DirectoryWalker(
+            self._storage, config.cache_dirs, config.walk_workers
+        )
+
+    def scrape(self) -> ScrapeResult:
+        """Scrape all configured roots and include paths. The documents are
+        held in a compact table since a full scrape may find millions.
+        """
+        stream = self.scrape_iter()
+        documents = DocumentTable(stream)
+        return ScrapeResult(documents=documents, removed=stream.removed)
+
+    def scrape_iter(self) -> ScrapeStream:
+        """Scrape all configured roots and include paths, yielding documents as
+        they are found. Removed documents are detected once all documents have
+        been yielded.
+        """
+        return ScrapeStream(self._scrape_gen())
+
+    def scrape_paths(self, paths: Iterable[str]) -> ScrapeResult:
+        """Scrape only the given paths rather than walking all roots. This is
+        used to handle individual changes (e.g. from filesystem events). Paths
+        that no longer exist are reported as removed along with any previously
+        scraped documents beneath them.
+        """
+        last_scrape = json.loads(self._storage.get(self._scrape_cache_key) or "{}")
+        output_docs = {}
+        deleted_docs = {}
+        for path in paths:
+            try:
+                stat = syscalls.stat(path)
+            except FileNotFoundError:
+                stat = None
+
+            # Handle removed files and directories
+            if stat is None:
+                if not self._auto_delete:
+                    continue
+                prefix = os.path.join(path, "")
+                for doc_path, doc_root in last_scrape.items():
+                    if doc_path == path or doc_path.startswith(prefix):
+                        deleted_docs[doc_path] = Document(path=doc_path, root=doc_root)
+                continue
+
+            # Directories are handled by their individual files
+            if os.path.isdir(path):
+                continue
+
+            # Only scrape files that would be found by a full scrape
+            if root := self._find_root(path):
+                log.debug2("Scraping changed path %s", path)
+                last_scrape[path] = root
+                if doc := self._admit_document(path, root, stat):
+                    output_docs[path] = doc
+
+        # Update the last scrape cache with the changes
+        for doc_path in deleted_docs:
+            last_scrape.pop(doc_path, None)
+        self._fingerprinter.forget(deleted_docs)
+        self._storage.set(self._scrape_cache_key, json.dumps(last_scrape))
+        self._admission.flush()
+        self._quarantine.flush()
+
+        return ScrapeResult(
+            documents=list(output_docs.values()), removed=list(deleted_docs.values())
+        )
+
+    @property
+    def converter(self):
+        """The docling converter for the default profile, loaded on first use"""
+        return self.get_converter(self._profiles.default)
+
+    def get_converter(self, profile: str):
+        """The docling converter for the named profile, loaded on first use"""
+        if (converter := self._converters.get(profile)) is None:
+            with self._converter_lock:
+                if (converter := self._converters.get(profile)) is None:
+                    converter = self._load_converter(profile)
+                    self._converters[profile] = converter
+        return converter
+
+    def convert_documents(
+        self,
+        documents: Iterable[Document],
+        needs_conversion: Callable[[Document], bool],
+    ) -> Iterator[Document]:
+        """Convert the documents that need it on the conversion pool, yielding
+        each document once it is ready for ingestion. Documents that don't need
+        conversion are passed through right away and converted documents are
+        yielded as their conversions finish. Documents that fail to convert
+        are logged and dropped.
+
+        If the pool is disabled, documents are passed through unchanged and
+        are converted when their content is first read.
+
+        Documents known to be slow to convert go through the slow lane. They
+        are only converted while other pool workers are free for the
+        documents behind them, and once all other documents are done. Without
+        the pool, they are passed on after all other documents.
+        """
+        if self._conversion_pool_config is None:
+            slow_docs = []
+            for doc in documents:
+                if self._uses_docling(doc) and needs_conversion(doc):
+                    if self._preload_converter and not self._preloading:
+                        self._start_preload(self._profiles.select(doc.path, doc.stat()))
+                    if self._slow_lane.is_slow(doc):
+                        log.debug("Deferring slow document %s", doc.path)
+                        slow_docs.append(doc)
+                        continue
+                yield doc
+            yield from slow_docs
+            return
+        slow_docs = collections.deque()
+        self._slow_in_flight = 0
+        for doc in documents:
+            # Hand on the conversions that have finished without waiting for
+            # the pool to fill up
+            if self._conversion_pool is not None and self._conversion_pool.in_flight:
+                yield from self._finish_conversions(self._conversion_pool.wait(0))
+            if not self._uses_docling(doc) or not needs_conversion(doc):
+                yield doc
+                continue
+            profile = self._profiles.select(doc.path, doc.stat())
+            cached = self._get_cached_exports(
+                doc.path, doc.fingerprint(), self._profiles.cache_variant(profile)
+            )
+            if cached is not None:
+                doc.content = cached
+                yield doc
+                continue
+            pool = self._get_conversion_pool()
+            if self._preload_converter:
+                # Start a worker loading its converter for each conversion
+                # that is pending, including those deferred to the slow lane,
+                # rather than every worker when only a few documents need it
+                pool.warm(pool.in_flight + len(slow_docs) + 1)
+            if self._slow_lane.is_slow(doc):
+                log.debug("Deferring slow document %s", doc.path)
+                slow_docs.append((doc, profile))
+            else:
+                while not pool.has_capacity:
+                    yield from self._finish_conversions(pool.wait())
+                pool.submit((doc, profile, False), doc.path, profile)
+            # Keep a worker free for the documents that follow
+            self._submit_slow(pool, slow_docs, spare=1)
+        if self._conversion_pool is not None:
+            pool = self._conversion_pool
+            while slow_docs or pool.in_flight:
+                self._submit_slow(pool, slow_docs, spare=0)
+                yield from self._finish_conversions(pool.wait())
+        self._slow_lane.flush()
+
+    def close(self):
+        """Stop the conversion pool's workers and persist the times taken by
+        conversions that ran as documents were loaded. The pool is started
+        again if more documents need converting.
+        """
+        self._slow_lane.flush()
+        if self._conversion_pool is not None:
+            log.debug("Closing the conversion pool")
+            self._conversion_pool.close()
+            self._conversion_pool = None
+            self._preloading = False
+
+    ## Impl ##
+
+    def _scrape_gen(self) -> Generator[Document, None, DocumentTable]:
+        """Generator implementation of the full scrape"""
+        # The root for each path found in this scrape. Sometimes docs are found
+        # multiple times with redundant roots or includes.
+        this_scrape_data = {}
+
+        # The physical directories and files seen so far so that trees exposed
+        # more than once (bind mounts) and hard or symbolic links to the same
+        # file are only walked and ingested once
+        seen_dirs = set()
+        seen_files = {}
+        for root in self.roots:
+            if self.matcher.prune_dir(root):
+                log.debug("Skipping excluded root: %s", root)
+                continue
+            log.debug("Scraping root: %s", root)
+            ignore_stacks = {root: ()}
+            for listing in self._walker.walk(root):
+                log.debug2("Scraping contents of %s", listing.parent)
+                if (dir_id := file_id(listing.dir_stat)) is not None:
+                    if dir_id in seen_dirs:
+                        log.debug(
+                            "Skipping already scraped directory %s", listing.parent
+                        )
+                        listing.dirnames.clear()
+                        continue
+                    seen_dirs.add(dir_id)
+                ignore_stack = self._get_ignore_stack(
+                    listing, ignore_stacks.pop(listing.parent, ())
+                )
+                for fname in listing.filenames:
+                    full_path = os.path.join(listing.parent, fname)
+                    if (
+                        full_path not in this_scrape_data
+                        and fname != self._ignore_file
+                        and self.matcher.matches(full_path)
+                        and not is_ignored(ignore_stack, full_path, False)
+                        and not self._is_duplicate(
+                            full_path, stat := listing.stats.get(fname), seen_files
+                        )
+                    ):
+                        this_scrape_data[full_path] = root
+                        if doc := self._admit_document(full_path, root, stat):
+                            yield doc
+
+                # Don't descend into excluded or ignored directories
+                listing.dirnames[:] = [
+                    dirname
+                    for dirname in listing.dirnames
+                    if not self.matcher.prune_dir(
+                        subdir := os.path.join(listing.parent, dirname)
+                    )
+                    and not is_ignored(ignore_stack, subdir, True)
+                ]
+                for dirname in listing.dirnames:
+                    ignore_stacks[os.path.join(listing.parent, dirname)] = ignore_stack
+        for include_path in self.matcher.include_paths:
+            if include_path in this_scrape_data:
+                continue
+            try:
+                stat = syscalls.stat(include_path)
+            except OSError:
+                stat = None
+            if not self._is_duplicate(include_path, stat, seen_files):
+                this_scrape_data[include_path] = os.path.sep
+                if doc := self._admit_document(include_path, os.path.sep, stat):
+                    yield doc
+        log.debug4("All docs to ingest: %s", this_scrape_data)
+        self._admission.retain(this_scrape_data)
+        self._admission.flush()
+        self._slow_lane.retain(this_scrape_data)
+        self._slow_lane.flush()
+        self._quarantine.retain(this_scrape_data)
+        self._quarantine.flush()
+
+        # Detect deleted docs
+        deleted_docs = DocumentTable()
+        if self._auto_delete and (
+            last_scrape_data := self._storage.get(self._scrape_cache_key)
+        ):
+            last_scrape = json.loads(last_scrape_data)
+            for doc_path, doc_root in last_scrape.items():
+                if doc_path not in this_scrape_data:
+                    deleted_docs.append(Document(path=doc_path, root=doc_root))
+            self._fingerprinter.forget(
+                doc_path for doc_path in last_scrape if doc_path not in this_scrape_data
+            )
+
+        # Add this scrape to the last scrape cache
+        self._storage.set(self._scrape_cache_key, json.dumps(this_scrape_data))
+        return deleted_docs
+
+    @staticmethod
+    def _is_duplicate(
+        path: str, stat: os.stat_result | None, seen_files: dict[tuple, str]
+    ) -> bool:
+        """Check whether the physical file has already been found in this
+        scrape under a different path, recording it if not
+        """
+        if (fid := file_id(stat)) is None:
+            return False
+        if (first_path := seen_files.setdefault(fid, path)) != path:
+            log.debug("Skipping %s, already scraped as %s", path, first_path)
+            return True
+        return False
+
+    def _find_root(self, path: str) -> str | None:
+        """Find the root that a full scrape would find the given file under,
+        or None if the file would not be scraped
+        """
+        for root in self.roots:
+            if (
+                path.startswith(os.path.join(root, ""))
+                and self.matcher.matches(path)
+                and not self._in_pruned_dir(path, root)
+                and not self._in_ignored_path(path, root)
+            ):
+                return root
+        if path in self.matcher.include_paths:
+            return os.path.sep
+        return None
+
+    def _in_pruned_dir(self, path: str, root: str) -> bool:
+        """Check whether any directory between the root and the file would be
+        pruned from the walk
+        """
+        parent = os.path.dirname(path)
+        while len(parent) >= len(root.rstrip(os.sep)):
+            if self.matcher.prune_dir(parent):
+                return True
+            if parent == (parent := os.path.dirname(parent)):
+                break
+        return False
+
+    def _in_ignored_path(self, path: str, root: str) -> bool:
+        """Check whether the file or any directory between the root and the
+        file is ignored by an ignore file
+        """
+        if not self._ignore_file:
+            return False
+        if os.path.basename(path) == self._ignore_file:
+            return True
+        dirs = []
+        parent = os.path.dirname(path)
+        while len(parent) >= len(root.rstrip(os.sep)):
+            dirs.append(parent)
+            if parent == (parent := os.path.dirname(parent)):
+                break
+        ignore_stack = ()
+        for dirpath in reversed(dirs):
+            if is_ignored(ignore_stack, dirpath, True):
+                return True
+            if rules := self._ignore_rules.get(
+                os.path.join(dirpath, self._ignore_file)
+            ):
+                ignore_stack += (rules,)
+        return is_ignored(ignore_stack, path, False)
+
+    def _get_ignore_stack(
+        self, listing: DirListing, parent_stack: IgnoreStack
+    ) -> IgnoreStack:
+        """Add the rules from the directory's ignore file (if any) to the
+        stack inherited from its parent
+        """
+        if (
+            self._ignore_file
+            and self._ignore_file in listing.filenames
+            and (
+                rules := self._ignore_rules.get(
+                    os.path.join(listing.parent, self._ignore_file),
+                    listing.stats.get(self._ignore_file),
+                )
+            )
+        ):
+            return parent_stack + (rules,)
+        return parent_stack
+
+    def _admit_document(
+        self, fname: str, root: str, stat: os.stat_result | None
+    ) -> Document | None:
+        """Make the document if it passes the admission policy and is not
+        quarantined
+        """
+        doc = self._make_document(fname, root, stat)
+        if self._admission.admit(fname, doc.fingerprint(), stat):
+            return None
+        if self._quarantine.holds(fname, doc.fingerprint()):
+            return None
+        return doc
+
+    def _make_document(
+        self, fname: str, root: str, stat: os.stat_result | None
+    ) -> Document:
+        is_raw_text = self._is_raw_text_type(fname)
+        log.debug2("Doc %s %s raw text", fname, "IS" if is_raw_text else "IS NOT")
+        converter = None
+        if not is_raw_text:
+            ext = os.path.splitext(fname)[1].lower().lstrip(".")
+            converter = self._format_converters.get(ext, self._convert_doc)
+        return Document.from_file(
+            path=fname,
+            root=root,
+            converter=converter,
+            fingerprinter=self._fingerprinter.fingerprint,
+            on_load_error=self._on_load_error,
+            stat=stat,
+        )
+
+    def _on_load_error(self, doc: Document, error: Exception):
+        """Quarantine documents whose content failed to load. Rejected
+        documents are already recorded by the admission policy, and failures
+        to load the converter or of its worker are not the document's.
+        """
+        if isinstance(error, ConverterUnavailable):
+            log.debug("Not quarantining %s: %s", doc.path, error)
+        elif not isinstance(error, DocumentRejected):
+            self._quarantine.add(doc.path, doc.fingerprint(), error)
+
+    def _uses_docling(self, doc: Document) -> bool:
+        # NOTE: Bound methods compare equal when bound to the same instance
+        return doc.converter == self._convert_doc
+
+    def _is_raw_text_type(self, candidate: str) -> bool:
+        return (
+            os.path.splitext(candidate)[1].lower().lstrip(".")
+            in self.raw_text_extensions
+        )
+
+    def _convert_doc(self, fname: str) -> dict[str, str]:
+        try:
+            stat = syscalls.stat(fname)
+        except FileNotFoundError:
+            stat = None
+        profile = self._profiles.select(fname, stat)
+        variant = self._profiles.cache_variant(profile)
+        fingerprint = None
+        if self._conversion_cache is not None:
+            if stat is not None:
+                fingerprint = self._fingerprinter.fingerprint(fname, stat)
+            cached = self._get_cached_exports(fname, fingerprint, variant)
+            if cached is not None:
+                return cached
+        try:
+            converter = self.get_converter(profile)
+        except Exception as err:
+            raise ConverterUnavailable(
+                f"Unable to load the {profile} converter: {err}"
+            ) from err
+        start = time.monotonic()
+        exports = export_document(
+            converter, fname, self.export_formats, self._chunking, variant
+        )
+        self._slow_lane.record(
+            fname, time.monotonic() - start, None if stat is None else stat.st_size
+        )
+        self._store_content(fname, fingerprint, variant, exports)
+        return exports
+
+    def _load_converter(self, profile: str):
+        with alog.ContextTimer(log.debug, "Loaded %s doc converter in: ", profile):
+            return build_docling_converter(self._profiles.profiles[profile])
+
+    def _start_preload(self, profile: str):
+        """Load the profile's converter on a background thread. Errors are
+        left to be raised by the first conversion.
+        """
+        self._preloading = True
+
+        def preload():
+            try:
+                self.get_converter(profile)
+            except Exception as err:
+                log.debug("Failed to preload the doc converter: %s", err)
+
+        threading.Thread(target=preload, name="converter-preload", daemon=True).start()
+
+    def _get_cached_exports(
+        self, fname: str, fingerprint: str | None, variant: str
+    ) -> dict[str, str] | None:
+        """The cached exports of the document, or None unless all of the
+        export formats are cached
+        """
+        if self._conversion_cache is None:
+            return None
+        exports = {}
+        for export_format in self.export_formats:
+            content = self._conversion_cache.get(
+                fname, fingerprint, self._export_variant(variant, export_format)
+            )
+            if content is None:
+                return None
+            exports[export_format] = content
+        return exports
+
+    @staticmethod
+    def _export_variant(variant: str, export_format: str) -> str:
+        # NOTE: Markdown keeps the plain variant so existing entries are reused
+        if export_format == DEFAULT_EXPORT_FORMAT:
+            return variant
+        return f"{variant}:{export_format}"
+
+    def _make_format_converter(self, converter: FormatConverter) -> Converter:
+        def convert(fname: str) -> str:
+            content = converter.convert(fname)
+            self._check_content(fname, content)
+            self._quarantine.release(fname)
+            return content
+
+        return convert
+
+    def _check_content(self, fname: str, content: str):
+        """Reject documents that converted to nothing"""
+        if not content.strip():
+            reason = "conversion produced no content"
+            self._admission.reject(fname, reason)
+            raise DocumentRejected(fname, reason)
+
+    def _store_content(
+        self,
+        fname: str,
+        fingerprint: str | None,
+        variant: str,
+        exports: dict[str, str],
+    ):
+        """Reject documents that converted to nothing and cache the exports of
+        the rest
+        """
+        self._check_content(fname, exports[DEFAULT_EXPORT_FORMAT])
+        self._quarantine.release(fname)
+        if self._conversion_cache is not None:
+            for export_format, content in exports.items():
+                self._conversion_cache.put(
+                    fname,
+                    fingerprint,
+                    content,
+                    self._export_variant(variant, export_format),
+                )
+
+    def _submit_slow(
+        self,
+        pool: ConversionPool,
+        slow_docs: collections.deque[tuple[Document, str]],
+        spare: int,
+    ):
+        """Start converting slow documents while the slow lane and the pool
+        have room, leaving the given number of workers free
+        """
+        while (
+            slow_docs
+            and self._slow_in_flight < self._slow_lane.workers
+            and pool.in_flight + spare < pool.workers
+        ):
+            doc, profile = slow_docs.popleft()
+            pool.submit((doc, profile, True), doc.path, profile)
+            self._slow_in_flight += 1
+
+    def _get_conversion_pool(self) -> ConversionPool:
+        if self._conversion_pool is None:
+            self._conversion_pool = ConversionPool(
+                self._conversion_pool_config,
+                functools.partial(
+                    docling_converter,
+                    self._profiles.profiles,
+                    self._chunking,
+                    tuple(self.export_formats),
+                ),
+            )
+        return self._conversion_pool
+
+    def _finish_conversions(
+        self,
+        results: list[
+            tuple[
+                tuple[Document, str, bool],
+                dict[str, str] | None,
+                Exception | None,
+                float,
+            ]
+        ],
+    ) -> Iterator[Document]:
+        """Set the content of the converted documents and yield the ones that
+        succeeded
+        """
+        for (doc, profile, slow), content, error, seconds in results:
+            if slow:
+                self._slow_in_flight -= 1
+            stat = doc.stat()
+            self._slow_lane.record(
+                doc.path, seconds, None if stat is None else stat.st_size
+            )
+            try:
+                if error is not None:
+                    raise error
+                self._store_content(
+                    doc.path,
+                    doc.fingerprint(),
+                    self._profiles.cache_variant(profile),
+                    content,
+                )
+            except Exception as err:
+                log.warning("Unable to convert document %s: %s", doc.path, err)
+                log.debug4(err)
+                self._on_load_error(doc, err)
+                continue
+            doc.content = content
+            yield doc
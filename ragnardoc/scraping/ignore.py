@@ -0,0 +1,251 @@
+"""
+Gitignore-style ignore files.
+
+Any directory under a scrape root may contain an ignore file (.ragnardocignore
+by default) with gitignore-style patterns. The patterns apply to the directory
+holding the file and everything beneath it. Patterns in deeper ignore files
+take precedence over those in shallower ones, and within a single file, the
+last matching pattern wins. Ignored directories are not walked at all.
+
+Supported syntax:
+
+- Blank lines and lines starting with # are skipped
+- A leading ! negates the pattern, re-including anything a previous pattern
+  ignored (files in an ignored directory can't be re-included)
+- A trailing / only matches directories
+- A pattern with a / at the beginning or in the middle is relative to the
+  directory holding the ignore file. Otherwise, it matches at any depth.
+- * matches anything except /, ? matches any single character except /, and
+  [...] matches a character class
+- A leading **/ matches in all directories, a trailing /** matches everything
+  inside, and /**/ matches zero or more directories
+"""
+# Standard
+from dataclasses import dataclass
+import json
+import os
+import re
+
+# First Party
+import alog
+
+# Local
+from .. import syscalls
+from ..storage import StorageBase
+
+log = alog.use_channel("IGNORE")
+
+
+@dataclass(frozen=True)
+class IgnorePattern:
+    """A single compiled pattern from an ignore file"""
+
+    regex: re.Pattern
+    negated: bool
+    dir_only: bool
+
+
+class IgnoreRules:
+    """The compiled patterns from a single ignore file"""
+
+    def __init__(self, base_dir: str, patterns: list[IgnorePattern]):
+        self.base_dir = base_dir
+        self.patterns = patterns
+        self._prefix = os.path.join(base_dir, "")
+
+    @classmethod
+    def from_file(cls, path: str) -> "IgnoreRules":
+        """Parse the ignore file at the given path"""
+        with syscalls.open_file(path, encoding="utf-8", errors="replace") as handle:
+            return cls.from_lines(os.path.dirname(path), handle.read().splitlines())
+
+    @classmethod
+    def from_lines(cls, base_dir: str, lines: list[str]) -> "IgnoreRules":
+        """Parse the lines of an ignore file for the given directory"""
+        patterns = []
+        for line in lines:
+            if pattern := cls._parse_line(line):
+                patterns.append(pattern)
+        return cls(base_dir, patterns)
+
+    def match(self, path: str, is_dir: bool) -> bool | None:
+        """Determine whether the given path is ignored by these rules. None is
+        returned if no pattern matches.
+        """
+        if not path.startswith(self._prefix):
+            return None
+        relpath = path[len(self._prefix) :]
+        if os.sep != "/":
+            relpath = relpath.replace(os.sep, "/")
+        for pattern in reversed(self.patterns):
+            if pattern.dir_only and not is_dir:
+                continue
+            if pattern.regex.match(relpath):
+                return not pattern.negated
+        return None
+
+    ## Impl ##
+
+    @classmethod
+    def _parse_line(cls, line: str) -> IgnorePattern | None:
+        # Strip unescaped trailing whitespace
+        stripped = line.rstrip()
+        if stripped.endswith("\\") and len(stripped) < len(line):
+            stripped += line[len(stripped)]
+        line = stripped
+        if not line or line.startswith("#"):
+            return None
+
+        negated = False
+        if line.startswith("!"):
+            negated = True
+            line = line[1:]
+        elif line.startswith("\\!") or line.startswith("\\#"):
+            line = line[1:]
+
+        dir_only = line.endswith("/")
+        line = line.rstrip("/")
+        if not line:
+            return None
+
+        # Patterns with a slash anywhere but the end are relative to the base
+        anchored = "/" in line
+        line = line.lstrip("/")
+        body = cls._translate(line)
+        expr = f"^{body}$" if anchored else f"^(?:.*/)?{body}$"
+        try:
+            regex = re.compile(expr)
+        except re.error as err:
+            log.warning("Invalid ignore pattern [%s]: %s", line, err)
+            return None
+        return IgnorePattern(regex=regex, negated=negated, dir_only=dir_only)
+
+    @staticmethod
+    def _translate(pattern: str) -> str:
+        """Translate a glob pattern to a regular expression body"""
+        out = []
+        i, size = 0, len(pattern)
+        while i < size:
+            char = pattern[i]
+            if char == "*":
+                if pattern.startswith("**", i) and (i == 0 or pattern[i - 1] == "/"):
+                    end = i + 2
+                    if end == size:
+                        out.append(".*")
+                        i = end
+                        continue
+                    if pattern[end] == "/":
+                        out.append("(?:.*/)?")
+                        i = end + 1
+                        continue
+                out.append("[^/]*")
+                while i < size and pattern[i] == "*":
+                    i += 1
+                continue
+            if char == "?":
+                out.append("[^/]")
+            elif char == "[":
+                end = pattern.find("]", i + 2 if pattern.startswith("[!", i) else i + 1)
+                if end < 0:
+                    out.append(re.escape(char))
+                else:
+                    contents = pattern[i + 1 : end].replace("\\", "\\\\")
+                    if contents.startswith("!"):
+                        contents = "^" + contents[1:]
+                    out.append(f"[{contents}]")
+                    i = end
+            elif char == "\\" and i + 1 < size:
+                i += 1
+                out.append(re.escape(pattern[i]))
+            else:
+                out.append(re.escape(char))
+            i += 1
+        return "".join(out)
+
+
+# A stack of ignore rules from the root-most to the deepest directory
+IgnoreStack = tuple[IgnoreRules, ...]
+
+
+def is_ignored(stack: IgnoreStack, path: str, is_dir: bool) -> bool:
+    """Determine whether the path is ignored by the stack of rules. Rules from
+    deeper ignore files take precedence.
+    """
+    for rules in reversed(stack):
+        if (result := rules.match(path, is_dir)) is not None:
+            return result
+    return False
+
+
+class IgnoreRuleCache:
+    """Cache of compiled ignore files keyed by path and invalidated when the
+    ignore file's mtime or size changes. If given a storage namespace, the
+    parsed patterns are also stored there so that unchanged ignore files are
+    not read again by later scrapes (e.g. each service cycle's run).
+    """
+
+    _storage_prefix = "ignore_rules"
+
+    def __init__(self, storage: StorageBase.StorageNamespaceBase | None = None):
+        self._storage = storage
+        self._cache: dict[str, tuple[list[int], IgnoreRules]] = {}
+
+    def get(self, path: str, stat: os.stat_result | None = None) -> IgnoreRules | None:
+        """Get the compiled rules for the ignore file at the given path. If the
+        stat result for the file is already known, it is used rather than
+        reading it again. None is returned if the file can't be read.
+        """
+        try:
+            if stat is None:
+                stat = syscalls.stat(path)
+            meta = [stat.st_mtime_ns, stat.st_size]
+            cached = self._cache.get(path)
+            if cached and cached[0] == meta:
+                return cached[1]
+            if (rules := self._load(path, meta)) is None:
+                log.debug2("Loading ignore file %s", path)
+                rules = IgnoreRules.from_file(path)
+                self._store(path, meta, rules)
+        except OSError as err:
+            log.debug3("Unable to read ignore file %s: %s", path, err)
+            self._cache.pop(path, None)
+            # NOTE: Most directories have no ignore file, so only stored rules
+            #   are deleted rather than writing for every directory
+            key = self._storage_key(path)
+            if self._storage is not None and self._storage.get(key) is not None:
+                self._storage.pop(key)
+            return None
+        self._cache[path] = (meta, rules)
+        return rules
+
+    ## Impl ##
+
+    def _storage_key(self, path: str) -> str:
+        return f"{self._storage_prefix}:{path}"
+
+    def _load(self, path: str, meta: list[int]) -> IgnoreRules | None:
+        """Load the stored patterns if they were parsed from this version of
+        the ignore file
+        """
+        if self._storage is None or not (
+            stored := self._storage.get(self._storage_key(path))
+        ):
+            return None
+        stored_meta, patterns = json.loads(stored)
+        if stored_meta != meta:
+            return None
+        return IgnoreRules(
+            os.path.dirname(path),
+            [
+                IgnorePattern(re.compile(expr), negated, dir_only)
+                for expr, negated, dir_only in patterns
+            ],
+        )
+
+    def _store(self, path: str, meta: list[int], rules: IgnoreRules):
+        if self._storage is not None:
+            patterns = [
+                [pattern.regex.pattern, pattern.negated, pattern.dir_only]
+                for pattern in rules.patterns
+            ]
+            self._storage.set(self._storage_key(path), json.dumps([meta, patterns]))
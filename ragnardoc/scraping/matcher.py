@@ -0,0 +1,89 @@
+"""
+Precompiled include/exclude matching for scraped paths.
+
+All exact paths are held in sets and all regular expressions for each side are
+combined into a single alternation so that matching a file is a constant number
+of lookups rather than a scan over every configured rule. Exclude rules are also
+used to prune whole directories during the walk when it is safe to do so.
+"""
+# Standard
+import os
+import re
+
+# First Party
+import alog
+
+log = alog.use_channel("MATCHER")
+
+
+class PathMatcher:
+    __doc__ = __doc__
+
+    # Regex constructs that inspect text after the point where the match ends.
+    # If an exclude expression contains any of these, a match against a
+    # directory does not guarantee a match against the files beneath it, so the
+    # expression can't be used for pruning.
+    _NON_PREFIX_SAFE_TOKENS = ("$", r"\Z", r"\b", r"\B", "(?=", "(?!")
+
+    def __init__(
+        self,
+        include_paths: list[str] | None = None,
+        include_regexprs: list[str] | None = None,
+        exclude_paths: list[str] | None = None,
+        exclude_regexprs: list[str] | None = None,
+    ):
+        self.include_paths = frozenset(include_paths or [])
+        self.exclude_paths = frozenset(exclude_paths or [])
+        self._exclude_dirs = frozenset(
+            os.path.normpath(path) for path in self.exclude_paths
+        )
+
+        # With no include expressions, everything is included
+        self._include_all = not include_regexprs
+        self._include_exprs = self._compile(include_regexprs or [])
+        self._exclude_exprs = self._compile(exclude_regexprs or [])
+        self._prune_exprs = self._compile(
+            [
+                expr
+                for expr in exclude_regexprs or []
+                if not any(tok in expr for tok in self._NON_PREFIX_SAFE_TOKENS)
+            ]
+        )
+
+    def matches(self, path: str) -> bool:
+        """Determine whether the given file path should be scraped"""
+        return (
+            self._include_all
+            or path in self.include_paths
+            or self._match(self._include_exprs, path)
+        ) and not (path in self.exclude_paths or self._match(self._exclude_exprs, path))
+
+    def prune_dir(self, dirpath: str) -> bool:
+        """Determine whether every file beneath the given directory is excluded
+        so that the directory does not need to be walked at all
+        """
+        return os.path.normpath(dirpath) in self._exclude_dirs or self._match(
+            self._prune_exprs, os.path.join(dirpath, "")
+        )
+
+    ## Impl ##
+
+    @staticmethod
+    def _compile(exprs: list[str]) -> list[re.Pattern]:
+        """Compile the expressions into a single alternation. If they can't be
+        combined (e.g. conflicting group names, inline flags, or numbered
+        backreferences), fall back to matching them individually.
+        """
+        if not exprs:
+            return []
+        if len(exprs) == 1 or any(re.search(r"\\[1-9]", expr) for expr in exprs):
+            return [re.compile(expr) for expr in exprs]
+        try:
+            return [re.compile("|".join(f"(?:{expr})" for expr in exprs))]
+        except re.error as err:
+            log.debug("Unable to combine expressions %s: %s", exprs, err)
+            return [re.compile(expr) for expr in exprs]
+
+    @staticmethod
+    def _match(exprs: list[re.Pattern], candidate: str) -> bool:
+        return any(expr.match(candidate) for expr in exprs)
@@ -0,0 +1,127 @@
+"""
+Quarantine of documents whose content can't be loaded.
+
+Documents that fail to convert or decode (e.g. corrupt PDFs or raw text files
+that are not valid UTF-8) would otherwise be converted again and fail again in
+every ingestion cycle. Each failure is recorded with the document's
+fingerprint and the error, and the document is skipped when scraped until it
+changes or its retry time passes. The time until a retry starts at the initial
+backoff and doubles with each consecutive failure up to the maximum backoff.
+"""
+# Standard
+from datetime import datetime
+import json
+import threading
+import time
+
+# First Party
+import aconfig
+import alog
+
+# Local
+from ..storage import StorageBase
+
+log = alog.use_channel("QUARANTINE")
+
+
+class Quarantine:
+    __doc__ = __doc__
+
+    _records_key = "quarantine"
+
+    def __init__(
+        self, storage: StorageBase.StorageNamespaceBase, config: aconfig.Config
+    ):
+        self._storage = storage
+        self._enabled = config.enabled
+        self._initial_backoff = config.initial_backoff_hours * 3600
+        self._max_backoff = config.max_backoff_hours * 3600
+
+        # Records of the failures for each path. Failures are recorded from the
+        # ingestion threads, so the records are guarded by a lock.
+        self._records: dict[str, dict] = json.loads(
+            self._storage.get(self._records_key) or "{}"
+        )
+        self._dirty = False
+        self._lock = threading.Lock()
+
+    def holds(self, path: str, fingerprint: str | None) -> bool:
+        """Whether the document is quarantined and should be skipped. Records
+        for earlier versions of the document are dropped.
+        """
+        if not self._enabled or fingerprint is None:
+            return False
+        with self._lock:
+            if (record := self._records.get(path)) is None:
+                return False
+            if record["fingerprint"] != fingerprint:
+                log.debug("Releasing changed document %s from quarantine", path)
+                del self._records[path]
+                self._dirty = True
+                return False
+        if time.time() < record["retry_at"]:
+            log.debug2("Skipping quarantined document %s", path)
+            return True
+        log.debug("Retrying quarantined document %s", path)
+        return False
+
+    def add(self, path: str, fingerprint: str | None, error: Exception):
+        """Record that loading the current version of the document failed"""
+        if not self._enabled or fingerprint is None:
+            return
+        now = time.time()
+        with self._lock:
+            record = self._records.get(path)
+            failures = 1
+            if record is not None and record["fingerprint"] == fingerprint:
+                failures = record["failures"] + 1
+            backoff = min(
+                self._max_backoff, self._initial_backoff * 2 ** (failures - 1)
+            )
+            self._records[path] = {
+                "fingerprint": fingerprint,
+                "error": type(error).__name__,
+                "message": str(error).split("\n", 1)[0],
+                "failures": failures,
+                "failed_at": now,
+                "retry_at": now + backoff,
+            }
+            self._dirty = True
+        log.info(
+            "Quarantined document %s until %s after %d failure(s): %s",
+            path,
+            datetime.fromtimestamp(now + backoff).isoformat(timespec="seconds"),
+            failures,
+            error,
+        )
+        self.flush()
+
+    def release(self, paths: list[str] | str):
+        """Remove the documents from quarantine (e.g. once they load)"""
+        paths = [paths] if isinstance(paths, str) else paths
+        with self._lock:
+            for path in paths:
+                if self._records.pop(path, None) is not None:
+                    log.debug("Released %s from quarantine", path)
+                    self._dirty = True
+        self.flush()
+
+    def retain(self, paths: set[str] | dict[str, str]):
+        """Drop the records for all paths that are not in the given set"""
+        with self._lock:
+            if removed := [path for path in self._records if path not in paths]:
+                for path in removed:
+                    del self._records[path]
+                self._dirty = True
+
+    def records(self) -> dict[str, dict]:
+        """The records of the quarantined documents by path"""
+        with self._lock:
+            return {path: dict(record) for path, record in self._records.items()}
+
+    def flush(self):
+        """Persist the records if they've changed"""
+        with self._lock:
+            if self._dirty:
+                self._storage.set(self._records_key, json.dumps(self._records))
+                self._dirty = False
@@ -0,0 +1,75 @@
+"""
+Planning of the set of roots to walk.
+
+Configured roots may overlap: one root may be nested inside another, or the
+same directory may be reachable through a symlink or a bind mount. Walking each
+configured root independently would visit the shared subtrees once per root, so
+the roots are normalized into a minimal set before walking. Any sharing that
+can't be seen from the root paths alone (e.g. bind mounts inside a root) is
+caught during the walk by tracking the (st_dev, st_ino) identity of visited
+directories and files.
+"""
+# Standard
+from collections.abc import Iterable
+import os
+
+# First Party
+import alog
+
+log = alog.use_channel("ROOTS")
+
+# The identity of a physical file or directory
+FileId = tuple[int, int]
+
+
+def file_id(stat: os.stat_result | None) -> FileId | None:
+    """Get the physical identity of a file from its stat result. None is
+    returned for filesystems that don't report inode numbers.
+    """
+    if stat is None or not stat.st_ino:
+        return None
+    return (stat.st_dev, stat.st_ino)
+
+
+def plan_roots(roots: Iterable[str]) -> list[str]:
+    """Normalize the configured roots, dropping any root that is the same
+    directory as an earlier root or that is nested inside another root. The
+    surviving roots keep their configured (user-expanded, absolute) form so
+    that document paths are reported the way the user wrote them.
+
+    NOTE: A dropped nested root is walked as part of its enclosing root, so it
+        is subject to the enclosing root's exclusions and ignore files.
+    """
+    candidates = []
+    seen_ids = set()
+    for root in roots:
+        root = os.path.normpath(os.path.abspath(os.path.expanduser(root)))
+        try:
+            root_id = file_id(os.stat(root))
+        except OSError:
+            root_id = None
+        if root_id is not None:
+            if root_id in seen_ids:
+                log.debug("Dropping duplicate root %s", root)
+                continue
+            seen_ids.add(root_id)
+        real_prefix = os.path.join(os.path.realpath(root), "")
+        if any(real_prefix == other_prefix for _, other_prefix in candidates):
+            log.debug("Dropping duplicate root %s", root)
+            continue
+        candidates.append((root, real_prefix))
+
+    planned = []
+    for root, real_prefix in candidates:
+        if outer := next(
+            (
+                other
+                for other, other_prefix in candidates
+                if other_prefix != real_prefix and real_prefix.startswith(other_prefix)
+            ),
+            None,
+        ):
+            log.debug("Dropping root %s nested inside root %s", root, outer)
+            continue
+        planned.append(root)
+    return planned
@@ -0,0 +1,91 @@
+"""
+Tracking of documents that are slow to convert.
+
+The time each document took to convert and its size are recorded. Documents
+whose last conversion went over the time budget, or that are larger than the
+size budget, are known to be heavy. Their conversions run in a slow lane so
+that they don't hold up the conversion of the documents behind them. Slow
+documents are converted after the others, or alongside them with their own
+concurrency limit when the conversion pool has workers to spare.
+"""
+# Standard
+import json
+import threading
+
+# First Party
+import aconfig
+import alog
+
+# Local
+from ..storage import StorageBase
+from ..types import Document
+
+log = alog.use_channel("SLOWLANE")
+
+
+class SlowLane:
+    __doc__ = __doc__
+
+    _records_key = "conversion_times"
+
+    def __init__(
+        self, storage: StorageBase.StorageNamespaceBase, config: aconfig.Config
+    ):
+        self._storage = storage
+        self._enabled = config.enabled
+        self._time_budget = config.time_budget_seconds
+        self._size_budget = int(config.size_budget_mb * 1024 * 1024)
+        self.workers = max(1, config.workers)
+
+        # Records of the last conversion of each path: [seconds, size]
+        self._records: dict[str, list] = json.loads(
+            self._storage.get(self._records_key) or "{}"
+        )
+        self._dirty = False
+        self._lock = threading.Lock()
+
+    def is_slow(self, doc: Document) -> bool:
+        """Whether the document is known to be heavy to convert"""
+        if not self._enabled:
+            return False
+        if (
+            self._size_budget
+            and (stat := doc.stat()) is not None
+            and stat.st_size > self._size_budget
+        ):
+            return True
+        if self._time_budget and (record := self._records.get(doc.path)):
+            return record[0] > self._time_budget
+        return False
+
+    def record(self, path: str, seconds: float, size: int | None):
+        """Record the time taken to convert the document. The records are
+        persisted on the next flush.
+        """
+        if not self._enabled:
+            return
+        if self._time_budget and seconds > self._time_budget:
+            log.info(
+                "Conversion of %s took %.1fs, over the budget of %ss",
+                path,
+                seconds,
+                self._time_budget,
+            )
+        with self._lock:
+            self._records[path] = [round(seconds, 3), size]
+            self._dirty = True
+
+    def retain(self, paths: set[str] | dict[str, str]):
+        """Drop the records for all paths that are not in the given set"""
+        with self._lock:
+            if removed := [path for path in self._records if path not in paths]:
+                for path in removed:
+                    del self._records[path]
+                self._dirty = True
+
+    def flush(self):
+        """Persist the records if they've changed"""
+        with self._lock:
+            if self._dirty:
+                self._storage.set(self._records_key, json.dumps(self._records))
+                self._dirty = False
@@ -0,0 +1,226 @@
+"""
+Directory walking with a persistent per-directory listing cache.
+
+A directory's mtime/ctime only change when entries are added, removed, or
+renamed within it (or its own metadata changes), so when neither has changed
+since the last walk, the cached listing is reused instead of listing the
+directory again. Subdirectories are still visited since changes deeper in the
+tree do not propagate to the parent's metadata. Each directory's listing is
+stored under its own key so that a change only rewrites the listings of the
+directories that changed.
+
+A reused listing saves the directory read (the scandir call and the stat of
+each entry it returns to tell files from directories), but the files it lists
+are still stat'ed since changes to a file's content don't change its parent
+directory. A listing is not reused if the directory was modified within one
+mtime tick of when it was listed, since an entry added in that same tick would
+leave the directory's mtime unchanged. The cache is off by default since the
+storage reads and writes only pay for themselves where listing a directory is
+slow, such as on network mounts.
+
+Directories are listed with os.scandir and the stat results for the files are
+collected while listing. When configured with multiple workers, subtrees are
+spread across a thread pool so that latency-bound filesystems (NFS, SMB) can
+have many directory operations in flight at once.
+"""
+# Standard
+from collections.abc import Iterator
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+import json
+import os
+import time
+
+# First Party
+import alog
+
+# Local
+from .. import syscalls
+from ..storage import StorageBase
+
+log = alog.use_channel("WALKER")
+
+
+@dataclass
+class DirListing:
+    """The contents of a single directory found during a walk"""
+
+    # The path to the directory
+    parent: str
+    # The names of the subdirectories that will be descended into. This may be
+    # modified in place by the consumer to prune the walk.
+    dirnames: list[str]
+    # The names of the files in the directory
+    filenames: list[str]
+    # The stat results for the files, keyed by name. Files that could not be
+    # stat'ed are omitted.
+    stats: dict[str, os.stat_result]
+    # The stat result for the directory itself
+    dir_stat: os.stat_result | None = None
+
+
+class DirectoryWalker:
+    __doc__ = __doc__
+
+    _dir_cache_key = "dir_cache"
+
+    # The coarsest mtime granularity of the common filesystems (FAT, and SMB
+    # shares backed by it)
+    _mtime_tick_ns = 2_000_000_000
+
+    def __init__(
+        self,
+        storage: StorageBase.StorageNamespaceBase,
+        use_cache: bool = True,
+        workers: int = 1,
+    ):
+        self._storage = storage
+        self._use_cache = use_cache
+        self._workers = max(workers, 1)
+
+    def walk(self, root: str) -> Iterator[DirListing]:
+        """Walk the given root, yielding a DirListing for each directory. Like
+        os.walk, symlinked directories are not followed and the walk can be
+        pruned by modifying the yielded dirnames in place. When running with
+        multiple workers, the order of the listings is not deterministic.
+        """
+        walk_impl = self._walk_parallel if self._workers > 1 else self._walk_serial
+        for cached_entry, entry, listing in walk_impl(root):
+            # Only write back the listings of directories that changed, and
+            # drop the listings of subdirectories that were removed
+            if self._use_cache and entry != cached_entry:
+                self._storage.set(self._cache_key(listing.parent), json.dumps(entry))
+                if cached_entry:
+                    for dirname in set(cached_entry[3]) - set(listing.dirnames):
+                        self._forget(os.path.join(listing.parent, dirname))
+            yield listing
+
+    ## Impl ##
+
+    def _cache_key(self, dirpath: str) -> str:
+        return f"{self._dir_cache_key}:{dirpath}"
+
+    def _cached_entry(self, dirpath: str) -> list | None:
+        if self._use_cache and (cached := self._storage.get(self._cache_key(dirpath))):
+            return json.loads(cached)
+        return None
+
+    def _forget(self, dirpath: str):
+        """Drop the cached listings of a removed directory and its subtree"""
+        if cached := self._storage.pop(self._cache_key(dirpath)):
+            for dirname in json.loads(cached)[3]:
+                self._forget(os.path.join(dirpath, dirname))
+
+    def _walk_serial(self, root: str) -> Iterator[tuple[list | None, list, DirListing]]:
+        """Walk the tree depth-first in the calling thread"""
+        to_visit = [root]
+        while to_visit:
+            parent = to_visit.pop()
+            if result := self._scan_dir(parent, self._cached_entry(parent)):
+                yield result
+                listing = result[2]
+                to_visit.extend(
+                    os.path.join(parent, dirname)
+                    for dirname in reversed(listing.dirnames)
+                )
+
+    def _walk_parallel(
+        self, root: str
+    ) -> Iterator[tuple[list | None, list, DirListing]]:
+        """Walk the tree with each directory scanned on the thread pool. New
+        subdirectories are only submitted once the consumer has seen (and had
+        the chance to prune) their parent. The cached listings are read in the
+        calling thread.
+        """
+        pool = ThreadPoolExecutor(
+            max_workers=self._workers, thread_name_prefix="ragnardoc-walk"
+        )
+        try:
+            pending = {pool.submit(self._scan_dir, root, self._cached_entry(root))}
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    if not (result := future.result()):
+                        continue
+                    yield result
+                    listing = result[2]
+                    for dirname in listing.dirnames:
+                        subdir = os.path.join(listing.parent, dirname)
+                        pending.add(
+                            pool.submit(
+                                self._scan_dir, subdir, self._cached_entry(subdir)
+                            )
+                        )
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+    def _scan_dir(
+        self, parent: str, cached_entry: list | None
+    ) -> tuple[list | None, list, DirListing] | None:
+        """Scan a single directory, using the cached listing if the directory
+        has not changed, and prefetch the stats for all of its files. Returns
+        the cached entry, the entry for this scan, and the listing. Entries are
+        [mtime_ns, ctime_ns, listed_at_ns, dirnames, filenames].
+        """
+        try:
+            st = syscalls.stat(parent)
+        except OSError as err:
+            log.debug("Unable to stat directory %s: %s", parent, err)
+            return None
+        dir_meta = [st.st_mtime_ns, st.st_ctime_ns]
+        if (
+            cached_entry
+            and cached_entry[:2] == dir_meta
+            and cached_entry[2] - st.st_mtime_ns >= self._mtime_tick_ns
+        ):
+            log.debug3("Using cached listing for %s", parent)
+            entry = cached_entry
+            dirnames, filenames = list(cached_entry[3]), cached_entry[4]
+            stats = {}
+            for fname in filenames:
+                try:
+                    stats[fname] = syscalls.stat(os.path.join(parent, fname))
+                except OSError as err:
+                    log.debug3("Unable to stat %s/%s: %s", parent, fname, err)
+        else:
+            log.debug3("Listing %s", parent)
+            # NOTE: Taken before listing so that entries added while listing
+            #   are within the tick
+            listed_at = time.time_ns()
+            try:
+                dirnames, filenames, stats = self._list_dir(parent)
+            except OSError as err:
+                log.debug("Unable to list directory %s: %s", parent, err)
+                return None
+            entry = dir_meta + [listed_at, list(dirnames), filenames]
+        return (
+            cached_entry,
+            entry,
+            DirListing(parent, dirnames, filenames, stats, st),
+        )
+
+    @staticmethod
+    def _list_dir(
+        dirpath: str,
+    ) -> tuple[list[str], list[str], dict[str, os.stat_result]]:
+        """List the directory, splitting entries into directories that should
+        be descended into and files. Symlinks to directories are neither, which
+        matches the default behavior of os.walk. The stat results from the
+        directory entries are kept for the files.
+        """
+        dirnames, filenames, stats = [], [], {}
+        with syscalls.scandir(dirpath) as entries:
+            for entry in entries:
+                try:
+                    is_dir = entry.is_dir()
+                except OSError:
+                    is_dir = False
+                if not is_dir:
+                    filenames.append(entry.name)
+                    try:
+                        stats[entry.name] = syscalls.entry_stat(entry)
+                    except OSError as err:
+                        log.debug3("Unable to stat %s: %s", entry.path, err)
+                elif not entry.is_symlink():
+                    dirnames.append(entry.name)
+        return dirnames, filenames, stats
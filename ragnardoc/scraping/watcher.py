@@ -0,0 +1,204 @@
+"""
+Filesystem change watching using Linux inotify.
+
+The watcher recursively watches a set of root directories (and individual
+files) and reports the paths that have changed. It is implemented directly on
+top of the inotify syscalls via ctypes so that no additional dependencies are
+required. Directories that are excluded from scraping are not watched, which
+keeps the number of watches (a limited kernel resource) down.
+"""
+# Standard
+from collections.abc import Callable
+import ctypes
+import ctypes.util
+import errno
+import os
+import select
+import struct
+import sys
+
+# First Party
+import alog
+
+log = alog.use_channel("WATCHER")
+
+
+class InotifyWatcher:
+    __doc__ = __doc__
+
+    # Event flags from <sys/inotify.h>
+    IN_ATTRIB = 0x00000004
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_FROM = 0x00000040
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_DELETE = 0x00000200
+    IN_DELETE_SELF = 0x00000400
+    IN_MOVE_SELF = 0x00000800
+    IN_Q_OVERFLOW = 0x00004000
+    IN_IGNORED = 0x00008000
+    IN_ISDIR = 0x40000000
+
+    _DIR_MASK = (
+        IN_ATTRIB
+        | IN_CLOSE_WRITE
+        | IN_MOVED_FROM
+        | IN_MOVED_TO
+        | IN_CREATE
+        | IN_DELETE
+        | IN_DELETE_SELF
+        | IN_MOVE_SELF
+    )
+    _FILE_MASK = IN_ATTRIB | IN_CLOSE_WRITE | IN_DELETE_SELF | IN_MOVE_SELF
+
+    # struct inotify_event { int wd; uint32_t mask, cookie, len; char name[]; }
+    _EVENT_HEADER = struct.Struct("iIII")
+    _READ_SIZE = 64 * 1024
+
+    def __init__(self, prune_dir: Callable[[str], bool] | None = None):
+        """Set up the inotify instance
+
+        Args:
+            prune_dir: Callable that determines whether a directory (and
+                everything beneath it) should not be watched
+
+        Raises:
+            OSError: If inotify is not available on this system
+        """
+        if not sys.platform.startswith("linux"):
+            raise OSError(errno.ENOSYS, "inotify is only available on Linux")
+        self._libc = ctypes.CDLL(
+            ctypes.util.find_library("c") or "libc.so.6", use_errno=True
+        )
+        self._fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+        self._prune_dir = prune_dir or (lambda _: False)
+        self._watches: dict[int, str] = {}
+        self._warned_limit = False
+
+        # Set when the kernel event queue overflowed and events were lost. The
+        # owner should perform a full rescan and clear the flag.
+        self.overflowed = False
+
+    def close(self):
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+    def __enter__(self) -> "InotifyWatcher":
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+    @property
+    def num_watches(self) -> int:
+        return len(self._watches)
+
+    def add_tree(self, root: str) -> list[str]:
+        """Watch the given directory and all non-pruned subdirectories. The
+        paths of all files found while adding the watches are returned so that
+        the contents of newly created directories can be ingested.
+        """
+        found_files = []
+        to_visit = [root]
+        while to_visit:
+            dirpath = to_visit.pop()
+            if self._prune_dir(dirpath) or not self._add_watch(dirpath, self._DIR_MASK):
+                continue
+            try:
+                with os.scandir(dirpath) as entries:
+                    for entry in entries:
+                        try:
+                            is_dir = entry.is_dir(follow_symlinks=False)
+                        except OSError:
+                            is_dir = False
+                        if is_dir:
+                            to_visit.append(entry.path)
+                        else:
+                            found_files.append(entry.path)
+            except OSError as err:
+                log.debug("Unable to list %s for watching: %s", dirpath, err)
+        return found_files
+
+    def add_file(self, path: str):
+        """Watch a single file"""
+        self._add_watch(path, self._FILE_MASK)
+
+    def read_changes(self, timeout: float | None = None) -> set[str]:
+        """Wait up to timeout seconds for events and return the set of paths
+        that changed. An empty set is returned if the timeout expires.
+        """
+        changed = set()
+        ready, _, _ = select.select([self._fd], [], [], timeout)
+        if not ready:
+            return changed
+        while True:
+            try:
+                buf = os.read(self._fd, self._READ_SIZE)
+            except BlockingIOError:
+                break
+            if not buf:
+                break
+            self._handle_events(buf, changed)
+        return changed
+
+    ## Impl ##
+
+    def _add_watch(self, path: str, mask: int) -> bool:
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(path), mask)
+        if wd < 0:
+            err = ctypes.get_errno()
+            if err == errno.ENOSPC:
+                if not self._warned_limit:
+                    log.warning(
+                        "Reached the inotify watch limit at %d watches. Changes "
+                        "in unwatched directories will be found by periodic "
+                        "rescans. Consider raising fs.inotify.max_user_watches.",
+                        len(self._watches),
+                    )
+                    self._warned_limit = True
+            else:
+                log.debug("Unable to watch %s: %s", path, os.strerror(err))
+            return False
+        self._watches[wd] = path
+        return True
+
+    def _handle_events(self, buf: bytes, changed: set[str]):
+        offset = 0
+        while offset + self._EVENT_HEADER.size <= len(buf):
+            wd, mask, _, name_len = self._EVENT_HEADER.unpack_from(buf, offset)
+            offset += self._EVENT_HEADER.size
+            name = os.fsdecode(buf[offset : offset + name_len].rstrip(b"\0"))
+            offset += name_len
+
+            if mask & self.IN_Q_OVERFLOW:
+                log.debug("Inotify event queue overflowed")
+                self.overflowed = True
+                continue
+            if mask & self.IN_IGNORED:
+                self._watches.pop(wd, None)
+                continue
+            if (watch_path := self._watches.get(wd)) is None:
+                continue
+
+            path = os.path.join(watch_path, name) if name else watch_path
+            log.debug3("Inotify event %s on %s", hex(mask), path)
+            if mask & self.IN_ISDIR:
+                if mask & (self.IN_CREATE | self.IN_MOVED_TO):
+                    changed.update(self.add_tree(path))
+                elif mask & self.IN_MOVED_FROM:
+                    self._remove_tree(path)
+            changed.add(path)
+
+    def _remove_tree(self, root: str):
+        """Remove the watches for a directory that has been moved away since
+        their paths are no longer valid
+        """
+        prefix = os.path.join(root, "")
+        for wd, path in list(self._watches.items()):
+            if path == root or path.startswith(prefix):
+                self._libc.inotify_rm_watch(self._fd, wd)
+                self._watches.pop(wd, None)
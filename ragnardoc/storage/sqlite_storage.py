@@ -6,6 +6,7 @@ Implementation of the storage abstraction using sqlite3
 import builtins
 import os
 import sqlite3
+import threading
 
 # First Party
 import aconfig
@@ -42,6 +43,9 @@ class SqliteStorage(StorageBase):
         log.debug("DB Path: %s", self._db_path)
         os.makedirs(os.path.dirname(self._db_path), exist_ok=True)
         self._conn = sqlite3.connect(self._db_path, check_same_thread=False)
+        # NOTE: The connection is shared by the ingestion pipeline's threads,
+        #   so each operation holds the lock to keep transactions separate
+        self._lock = threading.RLock()
 
     def __del__(self):
         self._conn.close()
@@ -49,28 +53,33 @@ class SqliteStorage(StorageBase):
     class StorageSqliteNamespace(StorageBase.StorageNamespaceBase):
         """Implementation of the storage namespace using sqlite3"""
 
-        def __init__(self, name: str, conn: sqlite3.Connection):
+        def __init__(
+            self, name: str, conn: sqlite3.Connection, lock: "threading.RLock"
+        ):
             self.name = name
             self._conn = conn
+            self._lock = lock
 
         def set(self, key: str, value: "StorageBase.VALUE_TYPE"):
             type_name = type(value).__name__
             if type_name not in ["str", "int", "float"]:
                 raise TypeError(f"Invalid value type: {type_name}")
-            with self._conn as conn:
+            with self._lock, self._conn as conn:
                 cursor = conn.cursor()
                 self._execute(
                     cursor,
                     f"INSERT OR REPLACE INTO '{self.name}' VALUES (?, ?, ?)",
                     (key, str(value), type_name),
                 )
-            self._conn.commit()
+                self._conn.commit()
 
         def get(self, key: str) -> "StorageBase.VALUE_TYPE":
-            with self._conn as conn:
+            with self._lock, self._conn as conn:
                 cursor = conn.cursor()
                 self._execute(
-                    cursor, f"SELECT * FROM '{self.name}' WHERE key = '{key}' LIMIT 1"
+                    cursor,
+                    f"SELECT * FROM '{self.name}' WHERE key = ? LIMIT 1",
+                    (key,),
                 )
                 result = cursor.fetchone()
                 if not result:
@@ -83,11 +92,14 @@ class SqliteStorage(StorageBase):
             """Delete the key from the namespace and return any value that was
             set
             """
-            current_val = self.get(key)
-            with self._conn as conn:
-                cursor = conn.cursor()
-                self._execute(cursor, f"DELETE FROM '{self.name}' WHERE key=?", (key,))
-            self._conn.commit()
+            with self._lock:
+                current_val = self.get(key)
+                with self._conn as conn:
+                    cursor = conn.cursor()
+                    self._execute(
+                        cursor, f"DELETE FROM '{self.name}' WHERE key=?", (key,)
+                    )
+                self._conn.commit()
             return current_val
 
         @staticmethod
@@ -104,8 +116,8 @@ class SqliteStorage(StorageBase):
             return getattr(builtins, type_name)
 
     def namespace(self, name: str) -> StorageSqliteNamespace:
-        ns = self.StorageSqliteNamespace(name, self._conn)
-        with self._conn as conn:
+        ns = self.StorageSqliteNamespace(name, self._conn, self._lock)
+        with self._lock, self._conn as conn:
             cursor = conn.cursor()
             ns._execute(
                 cursor,
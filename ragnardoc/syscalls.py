@@ -0,0 +1,62 @@
+"""
+Counting of the filesystem syscalls made while scraping and ingesting.
+
+The hot paths call the wrappers here instead of the os functions directly so
+that the number of calls per ingestion cycle can be measured and logged. The
+counts are process-wide and safe to update from the walker's worker threads.
+"""
+# Standard
+from collections import Counter
+from collections.abc import Iterator
+import os
+import threading
+
+_counts = Counter()
+_lock = threading.Lock()
+
+
+def count(name: str, num: int = 1):
+    """Record num calls of the named syscall"""
+    with _lock:
+        _counts[name] += num
+
+
+def counts() -> dict[str, int]:
+    """Get the counts since the last reset"""
+    with _lock:
+        return dict(_counts)
+
+
+def reset() -> dict[str, int]:
+    """Reset the counts, returning the counts up to this point"""
+    with _lock:
+        current = dict(_counts)
+        _counts.clear()
+    return current
+
+
+## Wrappers ####################################################################
+
+
+def stat(path: str, **kwargs) -> os.stat_result:
+    count("stat")
+    return os.stat(path, **kwargs)
+
+
+def scandir(path: str) -> Iterator[os.DirEntry]:
+    count("scandir")
+    return os.scandir(path)
+
+
+def entry_stat(entry: os.DirEntry) -> os.stat_result:
+    """Stat a directory entry. This is a syscall on POSIX systems (but not on
+    Windows) and the result is cached on the entry.
+    """
+    count("stat")
+    return entry.stat()
+
+
+def open_file(path: str, *args, **kwargs):
+    count("open")
+    # NOTE: The caller owns the handle, usually as a context manager
+    return open(path, *args, **kwargs)  # noqa: SIM115
@@ -3,18 +3,45 @@ Common structures for reusable data types
 """
 
 # Standard
+from array import array
+from collections.abc import Callable, Generator, Iterable, Iterator, Sequence
 from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Callable
+from typing import BinaryIO
 import hashlib
+import io
+import mmap
 import os
+import threading
+
+# Local
+from . import syscalls
 
 # Type definition of a conversion function that takes the path to a file and
-# provides the converted raw text
-Converter = Callable[[str], str]
+# provides the converted raw text. Converters that export to more than one
+# format provide the exports by format, including markdown.
+Converter = Callable[[str], str | dict[str, str]]
 
+# The formats that converted documents can be exported to with the extension
+# of each format's files
+EXPORT_FORMATS = {"markdown": ".md", "text": ".txt", "html": ".html", "json": ".json"}
 
-@dataclass
+# The format of a document's content
+DEFAULT_EXPORT_FORMAT = "markdown"
+
+# Type definition of a fingerprint function that takes the path to a file and
+# its current stat result and provides the file's fingerprint
+FingerprintFunction = Callable[[str, os.stat_result], str]
+
+# Type definition of a function that is told when loading a document fails
+LoadErrorHandler = Callable[["Document", Exception], None]
+
+
+# Guards the lazy creation of the per-document load locks
+_LOAD_LOCK_INIT = threading.Lock()
+
+
+@dataclass(slots=True)
 class Document:
 
     ## Public Attributes ##
@@ -29,16 +56,43 @@ class Document:
     metadata: dict[str, str | int | float] = field(default_factory=dict)
     # The function that will be used to convert the document to plain text
     converter: Converter | None = None
+    # The function that will be used to fingerprint the document. If unset,
+    # the fingerprint is computed from the file's metadata.
+    fingerprinter: FingerprintFunction | None = None
+    # The function called with the error when loading the document fails
+    on_load_error: LoadErrorHandler | None = None
 
     ## Private Attributes ##
 
     # The parsed content of the document. Accessed via content property.
     _content: str | None = None
 
+    # The exports of the parsed document in formats other than markdown when
+    # its converter provided them. Accessed via export().
+    _exports: dict[str, str] | None = None
+
     # The last computed fingerprint for the document. Used to uniquely identify
     # the content and invalidate the currently read content if needed.
     _last_fingerprint: str | None = None
 
+    # The stat result captured when the document was scraped or first read.
+    # This is held for the life of the document (a single ingestion cycle) so
+    # that the file is only stat'ed once. Cleared by invalidate().
+    _stat: os.stat_result | None = None
+
+    # The fingerprint computed from the cached stat result
+    _fingerprint: str | None = None
+
+    # Lock that serializes loading so that concurrent readers wait for a single
+    # conversion. Created on first load to keep unloaded documents small.
+    _load_lock: "threading.Lock | None" = field(default=None, repr=False, compare=False)
+
+    # The error from the last failed load along with the fingerprint it was
+    # raised for so that concurrent readers share it rather than retrying
+    _load_error: tuple[str | None, Exception] | None = field(
+        default=None, repr=False, compare=False
+    )
+
     ## Properties ##
 
     @property
@@ -50,31 +104,83 @@ class Document:
         return self._content
 
     @content.setter
-    def content(self, value: str):
-        self._content = value
+    def content(self, value: str | dict[str, str]):
+        """Set the content for the current version of the document, e.g. when
+        it was converted elsewhere. This is either the markdown content or the
+        exports by format.
+        """
+        self._content, self._exports = self._split_exports(value)
+        self._last_fingerprint = self.fingerprint()
 
     ## Public Methods ##
 
+    def stat(self) -> os.stat_result | None:
+        """The stat result for the document's file. The result prefetched while
+        scraping is used if available, otherwise the file is stat'ed once and
+        the result is cached until invalidate() is called. None is returned if
+        the file does not exist.
+        """
+        if self._stat is None:
+            try:
+                self._stat = syscalls.stat(self.path)
+            except FileNotFoundError:
+                return None
+        return self._stat
+
+    def invalidate(self):
+        """Drop the cached stat result and fingerprint so that the next call
+        reads the file's current metadata. Use this when a document object
+        outlives the ingestion cycle it was scraped in.
+        """
+        self._stat = None
+        self._fingerprint = None
+        self._load_error = None
+
+    def release(self):
+        """Drop the loaded content to free its memory once it is no longer
+        needed. It is loaded again if read after this.
+        """
+        self._content = None
+        self._exports = None
+        self._last_fingerprint = None
+
+    def export(self, export_format: str = DEFAULT_EXPORT_FORMAT) -> str:
+        """The content of the document in the given export format. Raw text
+        documents are the same in every format, and converted documents fall
+        back to their markdown content for formats their converter did not
+        provide.
+        """
+        self.load()
+        if export_format == DEFAULT_EXPORT_FORMAT or not (exports := self._exports):
+            return self._content
+        return exports.get(export_format, self._content)
+
     def fingerprint(self) -> str | None:
         """The unique fingerprint for this document.
 
         This is used to determine if/when the document has changed content in
-        order to update it where necessary. The current implementation relies on
-        a single consistent filesystem as the source of documents, so it uses
-        the file metadata rather than a content hash. If the assumption of
-        single filesystem changes in the future, this will need to be updated!
+        order to update it where necessary. The document's fingerprinter is
+        used if set (see ragnardoc.fingerprint for the available strategies).
+        Otherwise, the file metadata is used rather than a content hash.
 
-        NOTE: Even with the efficient metadata implementation, this is a disk
-            operation, so should be used only when needed.
+        NOTE: The fingerprint is cached along with the stat result it is
+            computed from, so it reflects the file as of the first call (or the
+            scrape) until invalidate() is called.
 
         returns:
             fingerprint (str | None): The unique fingerprint if the file is
             valid, otherwise None (forcing re-read in the future).
         """
-        try:
-            st = os.stat(self.path)
-        except FileNotFoundError:
+        if self._fingerprint is not None:
+            return self._fingerprint
+        if (st := self.stat()) is None:
             return None
+        if self.fingerprinter is not None:
+            try:
+                self._fingerprint = self.fingerprinter(self.path, st)
+            except FileNotFoundError:
+                return None
+            return self._fingerprint
         metadata = (
             # File size in bytes
             str(st.st_size),
@@ -83,7 +189,8 @@ class Document:
             # File permissions
             str(st.st_mode),
         )
-        return hashlib.sha256(":".join(metadata).encode()).hexdigest()
+        self._fingerprint = hashlib.sha256(":".join(metadata).encode()).hexdigest()
+        return self._fingerprint
 
     @classmethod
     def from_file(
@@ -91,31 +198,235 @@ class Document:
         path: str | Path,
         root: str | Path,
         converter: Converter | None = None,
+        fingerprinter: FingerprintFunction | None = None,
+        on_load_error: LoadErrorHandler | None = None,
         load: bool = False,
+        stat: os.stat_result | None = None,
         **metadata,
     ):
         """Read the Document from the file. By default, it is lazy loaded unless
-        load is True.
+        load is True. If the file's stat result is already known (e.g. from
+        scraping), it can be given to avoid reading it again.
         """
         inst = cls(
-            path=str(path), root=str(root), converter=converter, metadata=metadata
+            path=str(path),
+            root=str(root),
+            converter=converter,
+            fingerprinter=fingerprinter,
+            on_load_error=on_load_error,
+            metadata=metadata,
+            _stat=stat,
         )
         if load:
             inst.load()
         return inst
 
     def load(self):
-        """If content is not yet set or is invalid, load and convert it"""
+        """If content is not yet set or is invalid, load and convert it.
+
+        This is safe to call from multiple threads. Only one thread loads the
+        content while the others wait for (and share) its result or error.
+        """
         fingerprint = self.fingerprint()
-        if self._content is None or fingerprint != self._last_fingerprint:
-            # NOTE: This is _not_ thread safe! If ingestion supports threading
-            #   (even with the GIL), this will need a lock
+        if not self._needs_load(fingerprint):
+            return
+        with self._get_load_lock():
+            if not self._needs_load(fingerprint):
+                return
+            if self._load_error and self._load_error[0] == fingerprint:
+                raise self._load_error[1]
+            try:
+                if self.converter:
+                    content, exports = self._split_exports(self.converter(self.path))
+                else:
+                    exports = None
+                    with syscalls.open_file(self.path, encoding="utf-8") as handle:
+                        content = handle.read()
+            except Exception as err:
+                self._load_error = (fingerprint, err)
+                if self.on_load_error is not None:
+                    self.on_load_error(self, err)
+                raise
+            # NOTE: The content is set before the fingerprint so that lock-free
+            #   readers never pair the new fingerprint with stale content
+            self._load_error = None
+            self._exports = exports
+            self._content = content
             self._last_fingerprint = fingerprint
-            if self.converter:
-                self._content = self.converter(self.path)
-            else:
-                with open(self.path, encoding="utf-8") as handle:
-                    self._content = handle.read()
+
+    def open_stream(self, export_format: str = DEFAULT_EXPORT_FORMAT) -> BinaryIO:
+        """Open the document's content in the given export format as a UTF-8
+        byte stream. The caller is responsible for closing it.
+
+        Raw text documents that have not been loaded are memory mapped from
+        disk so that their content is never copied into a Python string.
+        Converted documents are loaded (converting them if needed) and their
+        content is encoded.
+        """
+        if self.converter is not None or self._content is not None:
+            return io.BytesIO(self.export(export_format).encode("utf-8"))
+        handle = syscalls.open_file(self.path, "rb")
+        try:
+            mapped = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            # Empty files and files on some filesystems can't be mapped, so
+            # they are streamed from the file directly
+            return handle
+        # NOTE: The mapping holds its own reference to the file
+        handle.close()
+        return mapped
+
+    ## Impl ##
+
+    @staticmethod
+    def _split_exports(
+        value: str | dict[str, str],
+    ) -> tuple[str, dict[str, str] | None]:
+        """Split converted content into the markdown content and the exports in
+        other formats
+        """
+        if isinstance(value, str):
+            return value, None
+        exports = dict(value)
+        return exports.pop(DEFAULT_EXPORT_FORMAT), exports or None
+
+    def _needs_load(self, fingerprint: str | None) -> bool:
+        return self._content is None or fingerprint != self._last_fingerprint
+
+    def _get_load_lock(self) -> "threading.Lock":
+        if self._load_lock is None:
+            with _LOAD_LOCK_INIT:
+                if self._load_lock is None:
+                    self._load_lock = threading.Lock()
+        return self._load_lock
+
+
+class DocumentTable(Sequence[Document]):
+    """Compact columnar storage for a large number of unloaded documents.
+
+    Rather than holding a Document object per file, the table keeps each
+    document's directory (interned per root), its file name (packed into a
+    single byte buffer), and the parts of its stat result needed for
+    fingerprinting and scheduling in typed arrays. Document views are
+    materialized on demand when indexed or iterated, so each access returns a
+    new Document.
+
+    Documents that carry state the columns can't represent (a title, metadata,
+    or loaded content) are kept as-is.
+    """
+
+    # Sentinel size for documents without a stat result
+    _NO_STAT = -1
+
+    def __init__(self, documents: Iterable[Document] = ()):
+        self._roots: list[str] = []
+        self._root_index: dict[str, int] = {}
+        # Distinct (converter, fingerprinter, on_load_error) functions
+        self._functions: list[
+            tuple[
+                Converter | None,
+                FingerprintFunction | None,
+                LoadErrorHandler | None,
+            ]
+        ] = []
+        self._dirs: list[str] = []
+        self._dir_index: dict[tuple[int, str], int] = {}
+        self._dir_roots = array("I")
+
+        # Per-document columns
+        self._dir_ids = array("I")
+        self._name_offsets = array("Q", [0])
+        self._names = bytearray()
+        self._function_ids = array("B")
+        self._modes = array("I")
+        self._sizes = array("q")
+        self._mtimes = array("q")
+        self._inodes = array("Q")
+
+        # Documents that can't be represented in the columns by index
+        self._full_docs: dict[int, Document] = {}
+        for doc in documents:
+            self.append(doc)
+
+    def append(self, doc: Document):
+        """Add the document to the table"""
+        index = len(self)
+        if doc.title is not None or doc.metadata or doc._content is not None:
+            self._full_docs[index] = doc
+        dirname, name = os.path.split(doc.path)
+        root_id = self._root_index.setdefault(doc.root, len(self._roots))
+        if root_id == len(self._roots):
+            self._roots.append(doc.root)
+        dir_id = self._dir_index.setdefault((root_id, dirname), len(self._dirs))
+        if dir_id == len(self._dirs):
+            self._dirs.append(dirname)
+            self._dir_roots.append(root_id)
+        self._dir_ids.append(dir_id)
+        self._names += os.fsencode(name)
+        self._name_offsets.append(len(self._names))
+        functions = (doc.converter, doc.fingerprinter, doc.on_load_error)
+        try:
+            function_id = self._functions.index(functions)
+        except ValueError:
+            function_id = len(self._functions)
+            self._functions.append(functions)
+        self._function_ids.append(function_id)
+        if (stat := doc._stat) is not None:
+            self._modes.append(stat.st_mode)
+            self._sizes.append(stat.st_size)
+            self._mtimes.append(stat.st_mtime_ns)
+            self._inodes.append(stat.st_ino)
+        else:
+            self._modes.append(0)
+            self._sizes.append(self._NO_STAT)
+            self._mtimes.append(0)
+            self._inodes.append(0)
+
+    def __len__(self) -> int:
+        return len(self._dir_ids)
+
+    def __getitem__(self, index: int | slice) -> Document | list[Document]:
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("DocumentTable index out of range")
+        if (doc := self._full_docs.get(index)) is not None:
+            return doc
+        dir_id = self._dir_ids[index]
+        start, end = self._name_offsets[index], self._name_offsets[index + 1]
+        name = os.fsdecode(bytes(self._names[start:end]))
+        converter, fingerprinter, on_load_error = self._functions[
+            self._function_ids[index]
+        ]
+        return Document(
+            path=os.path.join(self._dirs[dir_id], name),
+            root=self._roots[self._dir_roots[dir_id]],
+            converter=converter,
+            fingerprinter=fingerprinter,
+            on_load_error=on_load_error,
+            _stat=self._get_stat(index),
+        )
+
+    def __iter__(self) -> Iterator[Document]:
+        for index in range(len(self)):
+            yield self[index]
+
+    ## Impl ##
+
+    def _get_stat(self, index: int) -> os.stat_result | None:
+        """Rebuild the subset of the stat result that was stored"""
+        if (size := self._sizes[index]) == self._NO_STAT:
+            return None
+        mtime_ns = self._mtimes[index]
+        sec, nsec = divmod(mtime_ns, 1_000_000_000)
+        # NOTE: The float time is computed the same way the os module does so
+        #   that fingerprints match those of a fresh stat
+        return os.stat_result(
+            (self._modes[index], self._inodes[index], 0, 0, 0, 0, size, 0, sec, 0)
+            + (None, sec + nsec * 1e-9, None, None, mtime_ns, None)
+        )
 
 
 @dataclass
@@ -124,5 +435,25 @@ class ScrapeResult:
     that have been removed
     """
 
-    documents: list[Document]
-    removed: list[Document]
+    documents: Sequence[Document]
+    removed: Sequence[Document]
+
+
+class ScrapeStream:
+    """A streaming scrape yields documents as they are found. The set of removed
+    documents can only be known once the full scrape completes, so it is only
+    available after iteration has finished.
+    """
+
+    def __init__(self, documents: Generator[Document, None, Sequence[Document]]):
+        self._documents = documents
+        self._removed = None
+
+    def __iter__(self) -> Iterator[Document]:
+        self._removed = yield from self._documents
+
+    @property
+    def removed(self) -> Sequence[Document]:
+        if self._removed is None:
+            raise RuntimeError("Removed documents unknown until the scrape completes")
+        return self._removed
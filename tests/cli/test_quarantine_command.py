@@ -0,0 +1,77 @@
+"""
+Unit tests for the quarantine command
+"""
+# Standard
+import argparse
+import os
+
+# First Party
+import aconfig
+
+# Local
+from ragnardoc import config
+from ragnardoc.cli.quarantine import QuarantineCommand
+from ragnardoc.scraping import FileScraper
+from ragnardoc.scraping.quarantine import Quarantine
+from ragnardoc.storage import storage_factory
+
+
+def make_quarantine(storage) -> Quarantine:
+    return Quarantine(
+        storage.namespace(FileScraper.storage_namespace), config.scraping.quarantine
+    )
+
+
+def run(**args):
+    args = aconfig.Config(
+        {"release": None, "release_all": False, **args}, override_env_vars=False
+    )
+    QuarantineCommand().run(args)
+
+
+def test_list_and_release(scratch_dir, capsys):
+    """Test that quarantined documents are listed and can be released"""
+    bad_pdf, bad_txt = str(scratch_dir / "bad.pdf"), str(scratch_dir / "bad.txt")
+    storage = storage_factory.construct(config.storage)
+    quarantine = make_quarantine(storage)
+    quarantine.add(bad_pdf, "fp", RuntimeError("corrupt pdf"))
+    quarantine.add(bad_txt, "fp", ValueError("not utf-8"))
+
+    run()
+    out = capsys.readouterr().out
+    assert bad_pdf in out
+    assert "RuntimeError: corrupt pdf" in out
+    assert "failures: 1" in out
+
+    run(release=[bad_pdf])
+    out = capsys.readouterr().out
+    assert bad_pdf not in out
+    assert bad_txt in out
+
+    run(release_all=True)
+    assert capsys.readouterr().out == "No documents are quarantined\n"
+    assert make_quarantine(storage).records() == {}
+
+
+def test_release_symlinked_path(scratch_dir, monkeypatch):
+    """Test that documents under a symlinked directory are released by the
+    path they were quarantined under rather than the resolved path
+    """
+    (scratch_dir / "real").mkdir()
+    (scratch_dir / "link").symlink_to(scratch_dir / "real")
+    linked_pdf = str(scratch_dir / "link" / "bad.pdf")
+    storage = storage_factory.construct(config.storage)
+    make_quarantine(storage).add(linked_pdf, "fp", RuntimeError("corrupt pdf"))
+
+    monkeypatch.chdir(scratch_dir)
+    run(release=[os.path.join("link", ".", "bad.pdf")])
+    assert make_quarantine(storage).records() == {}
+
+
+def test_add_args():
+    """Test that the command adds the expected arguments"""
+    parser = argparse.ArgumentParser()
+    QuarantineCommand().add_args(parser)
+    args = parser.parse_args(["--release", "a.pdf", "b.pdf"])
+    assert args.release == ["a.pdf", "b.pdf"]
+    assert not args.release_all
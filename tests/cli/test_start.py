@@ -5,6 +5,7 @@ Unit tests for the start command
 from datetime import timedelta
 from unittest import mock
 import argparse
+import sys
 import threading
 import time
 
@@ -16,6 +17,7 @@ import aconfig
 
 # Local
 from ragnardoc.cli.start import StartCommand
+from ragnardoc.scraping.watcher import InotifyWatcher
 
 
 @pytest.mark.parametrize(
@@ -59,3 +61,55 @@ def test_add_args():
     StartCommand().add_args(parser)
     args = parser.parse_args([])
     assert hasattr(args, "period")
+    assert hasattr(args, "watch")
+
+
+@pytest.mark.skipif(
+    not sys.platform.startswith("linux"), reason="inotify is only available on Linux"
+)
+def test_run_watch(scratch_dir):
+    """Test that in watch mode, a full ingestion runs first and then changed
+    paths are ingested individually
+    """
+    cmd = StartCommand()
+    cmd._debounce = timedelta(seconds=0.05)
+    cmd._WATCH_POLL_SECONDS = 0.05
+    watcher = InotifyWatcher()
+    watcher.add_tree(str(scratch_dir))
+    args = aconfig.Config({"period": "1h", "watch": True}, override_env_vars=False)
+    with mock.patch.object(cmd, "_make_watcher", return_value=watcher), mock.patch(
+        "subprocess.run"
+    ) as run_mock:
+        run_thread = threading.Thread(target=cmd.run, args=(args,))
+        run_thread.start()
+        time.sleep(0.1)
+        doc = scratch_dir / "doc.txt"
+        doc.write_text("hello")
+        for _ in range(20):
+            if run_mock.call_count >= 2:
+                break
+            time.sleep(0.05)
+        cmd.stop()
+        run_thread.join()
+    assert run_mock.call_count == 2
+    full_cmd = run_mock.call_args_list[0].args[0]
+    assert "--paths" not in full_cmd
+    changed_cmd = run_mock.call_args_list[1].args[0]
+    assert changed_cmd[-2:] == ["--paths", str(doc)]
+
+
+def test_run_watch_unavailable():
+    """Test that if watching is not available, the command falls back to
+    polling
+    """
+    cmd = StartCommand()
+    args = aconfig.Config({"period": "0.1s", "watch": True}, override_env_vars=False)
+    with mock.patch.object(
+        cmd, "_make_watcher", side_effect=OSError("no inotify")
+    ), mock.patch("subprocess.run") as run_mock:
+        run_thread = threading.Thread(target=cmd.run, args=(args,))
+        run_thread.start()
+        time.sleep(0.05)
+        cmd.stop()
+        run_thread.join()
+    run_mock.assert_called_once()
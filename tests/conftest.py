@@ -3,7 +3,10 @@ Shared test setup and fixtures
 """
 # Standard
 from pathlib import Path
+from types import SimpleNamespace
 import abc
+import email.parser
+import email.policy
 import io
 import json
 import os
@@ -68,6 +71,58 @@ def ignore_user_config():
         _tempdir.cleanup()
 
 
+## Conversion Fakes ##########################################################
+
+
+def fake_convert(path: str, profile: str | None = None) -> str:
+    """Stand-in for converting a document with docling. Documents whose name
+    starts with "fail" fail to convert.
+    """
+    if os.path.basename(path).startswith("fail"):
+        raise ValueError(f"Failed to convert {path}")
+    return f"# converted {path}"
+
+
+class FakeDocumentConverter:
+    """Stand-in for the docling DocumentConverter that records the paths it
+    converts
+    """
+
+    def __init__(self):
+        self.calls = []
+
+    def convert(self, path: str):
+        self.calls.append(path)
+        content = fake_convert(path)
+        return SimpleNamespace(
+            document=SimpleNamespace(
+                export_to_markdown=lambda: content,
+                export_to_text=lambda: content.lstrip("# "),
+                export_to_html=lambda: f"<p>{content}</p>",
+            )
+        )
+
+
+def fake_pool_convert(path: str, profile: str | None = None) -> dict[str, str]:
+    """Stand-in for a conversion pool worker's exports of a document"""
+    return {"markdown": fake_convert(path, profile)}
+
+
+def fake_pool_converter():
+    """Converter factory for conversion pool workers that doesn't load docling"""
+    return fake_pool_convert
+
+
+def crash_pool_convert(path: str, profile: str | None = None) -> dict[str, str]:
+    """Stand-in for a conversion pool worker that dies on every document"""
+    os._exit(3)
+
+
+def crashing_pool_converter():
+    """Converter factory for conversion pool workers that die on every document"""
+    return crash_pool_convert
+
+
 ## Server Mock Structure #######################################################
 
 
@@ -85,9 +140,13 @@ class ServerMockBase(abc.ABC):
     def get(self, url, *_, **__) -> requests.Response:
         return self._handle_call("get", url)
 
-    def post(self, url, json=None, files=None, *_, **__) -> requests.Response:
-        if json and files:
-            raise ValueError("Cannot specify both `json` and `files`.")
+    def post(
+        self, url, json=None, files=None, data=None, headers=None, *_, **__
+    ) -> requests.Response:
+        if sum(arg is not None for arg in (json, files, data)) > 1:
+            raise ValueError("Cannot specify more than one of `json`, `files`, `data`.")
+        if data is not None:
+            json, files = self._parse_streamed_body(data, headers or {})
         body = json or files
         return self._handle_call("post", url, body)
 
@@ -96,6 +155,33 @@ class ServerMockBase(abc.ABC):
 
     ## Protected ##
 
+    @staticmethod
+    def _parse_streamed_body(data, headers: dict) -> tuple[dict | None, dict | None]:
+        """Parse a streamed request body into the equivalent json or files
+        arguments
+        """
+        content_type = headers.get("Content-Type", "")
+        if hasattr(data, "read"):
+            raw = data.read()
+            assert len(raw) == len(data), "Streamed body length mismatch"
+        else:
+            raw = b"".join(data)
+        if content_type == "application/json":
+            return json.loads(raw), None
+        if content_type.startswith("multipart/form-data"):
+            message = email.parser.BytesParser(policy=email.policy.HTTP).parsebytes(
+                f"Content-Type: {content_type}\r\n\r\n".encode() + raw
+            )
+            files = {
+                part.get_param("name", header="content-disposition"): (
+                    part.get_filename(),
+                    part.get_payload(decode=True).decode("utf-8"),
+                )
+                for part in message.iter_parts()
+            }
+            return None, files
+        raise ValueError(f"Unsupported streamed content type: {content_type}")
+
     @staticmethod
     def _make_response(
         resp_body: dict | str, status_code: int = 200
@@ -0,0 +1,132 @@
+"""
+Unit tests for the persistent conversion cache
+"""
+# Standard
+import os
+
+# First Party
+import aconfig
+
+# Local
+from ragnardoc.conversion import ConversionCache
+
+## Helpers #####################################################################
+
+
+def make_cache(cache_dir, version="v1", **overrides) -> ConversionCache:
+    cfg = {"path": str(cache_dir), "max_size_mb": 1, "compression_level": 6}
+    cfg.update(overrides)
+    return ConversionCache(aconfig.Config(cfg, override_env_vars=False), version)
+
+
+def entry_files(cache_dir) -> list[str]:
+    return [
+        os.path.join(dirpath, fname)
+        for dirpath, _, fnames in os.walk(cache_dir)
+        for fname in fnames
+    ]
+
+
+## Tests #######################################################################
+
+
+def test_get_put(scratch_dir):
+    """Test that content is returned for the same path and fingerprint only"""
+    cache = make_cache(scratch_dir)
+    assert cache.get("a.pdf", "fp1") is None
+    cache.put("a.pdf", "fp1", "# Hello ü")
+    assert cache.get("a.pdf", "fp1") == "# Hello ü"
+    assert cache.get("a.pdf", "fp2") is None
+    assert cache.get("b.pdf", "fp1") is None
+
+
+def test_no_fingerprint(scratch_dir):
+    """Test that documents without a fingerprint are not cached"""
+    cache = make_cache(scratch_dir)
+    cache.put("a.pdf", None, "content")
+    assert cache.get("a.pdf", None) is None
+    assert not entry_files(scratch_dir)
+
+
+def test_persisted_compressed(scratch_dir):
+    """Test that entries are compressed and seen by new cache instances"""
+    content = "repeated line\n" * 1000
+    make_cache(scratch_dir).put("a.pdf", "fp", content)
+    (entry,) = entry_files(scratch_dir)
+    assert os.path.getsize(entry) < len(content) / 10
+    cache = make_cache(scratch_dir)
+    assert cache.size == os.path.getsize(entry)
+    assert cache.get("a.pdf", "fp") == content
+
+
+def test_version_change(scratch_dir):
+    """Test that entries from another converter version are not used"""
+    make_cache(scratch_dir, version="v1").put("a.pdf", "fp", "old")
+    assert make_cache(scratch_dir, version="v2").get("a.pdf", "fp") is None
+
+
+def test_relative_path_in_home(scratch_dir, monkeypatch):
+    """Test that relative cache paths are placed in ragnardoc_home"""
+    # Local
+    from ragnardoc import config
+
+    monkeypatch.setattr(config, "ragnardoc_home", str(scratch_dir))
+    make_cache("conversion_cache").put("a.pdf", "fp", "content")
+    assert len(entry_files(scratch_dir / "conversion_cache")) == 1
+
+
+def test_lru_eviction(scratch_dir):
+    """Test that the least recently used entries are evicted once the cache
+    exceeds its size
+    """
+    # NOTE: Random hex only compresses to half its size, so each entry is
+    #   ~400KiB and only two fit in the 1MiB budget
+    contents = {name: os.urandom(400 * 1024).hex() for name in "abc"}
+    cache = make_cache(scratch_dir, compression_level=1)
+    cache.put("a", "fp", contents["a"])
+    cache.put("b", "fp", contents["b"])
+    assert cache.get("a", "fp") == contents["a"]
+    cache.put("c", "fp", contents["c"])
+    assert cache.get("b", "fp") is None
+    assert cache.get("a", "fp") == contents["a"]
+    assert cache.get("c", "fp") == contents["c"]
+    assert len(entry_files(scratch_dir)) == 2
+    assert cache.size <= 1024 * 1024
+
+
+def test_lru_order_persisted(scratch_dir):
+    """Test that recency carries over to new cache instances"""
+    contents = {name: os.urandom(400 * 1024).hex() for name in "abc"}
+    cache = make_cache(scratch_dir, compression_level=1)
+    cache.put("a", "fp", contents["a"])
+    cache.put("b", "fp", contents["b"])
+    # Make "b" clearly older than "a" on disk
+    for path in entry_files(scratch_dir):
+        os.utime(path, ns=(0, 0))
+    cache.get("a", "fp")
+
+    cache = make_cache(scratch_dir, compression_level=1)
+    cache.put("c", "fp", contents["c"])
+    assert cache.get("b", "fp") is None
+    assert cache.get("a", "fp") == contents["a"]
+
+
+def test_oversized_entry(scratch_dir):
+    """Test that entries larger than the whole cache are not stored"""
+    cache = make_cache(scratch_dir, max_size_mb=0.001, compression_level=1)
+    cache.put("a", "fp", os.urandom(4096).hex())
+    assert cache.get("a", "fp") is None
+    assert not entry_files(scratch_dir)
+
+
+def test_corrupt_entry(scratch_dir):
+    """Test that unreadable entries are treated as misses and removed"""
+    cache = make_cache(scratch_dir)
+    cache.put("a.pdf", "fp", "content")
+    (entry,) = entry_files(scratch_dir)
+    with open(entry, "wb") as handle:
+        handle.write(b"not zlib")
+    cache = make_cache(scratch_dir)
+    assert cache.get("a.pdf", "fp") is None
+    assert not entry_files(scratch_dir)
+    assert cache.size == 0
@@ -0,0 +1,167 @@
+"""
+Unit tests for chunked conversion of long PDFs
+"""
+# Standard
+import json
+import os
+import time
+
+# Third Party
+import pytest
+
+# First Party
+import aconfig
+
+# Local
+from ragnardoc.conversion import ChunkedConversion
+from ragnardoc.conversion import chunking as chunking_module
+from ragnardoc.conversion import export_document
+
+## Helpers #####################################################################
+
+
+def make_chunking(chunk_dir, **overrides) -> ChunkedConversion:
+    cfg = {
+        "min_pages": 10,
+        "chunk_pages": 4,
+        "path": str(chunk_dir),
+        "max_age_hours": 1,
+    }
+    cfg.update(overrides)
+    return ChunkedConversion(aconfig.Config(cfg, override_env_vars=False), "v1")
+
+
+class RangeConverter:
+    """Converter that records the ranges it converts and can fail on one"""
+
+    def __init__(self, fail_at: int | None = None):
+        self.ranges = []
+        self.fail_at = fail_at
+
+    def __call__(self, start: int, end: int) -> dict[str, str]:
+        if start == self.fail_at:
+            raise RuntimeError("worker died")
+        self.ranges.append((start, end))
+        return {
+            "markdown": f"pages {start}-{end}\n",
+            "json": json.dumps({"pages": [start, end]}),
+        }
+
+
+@pytest.fixture
+def pdf(scratch_dir):
+    path = scratch_dir / "manual.pdf"
+    path.write_bytes(b"%PDF-1.4 fake")
+    yield str(path)
+
+
+## Tests #######################################################################
+
+
+def test_convert_chunks(scratch_dir, pdf):
+    """Test that each range of pages is converted once and the exports are
+    joined in page order
+    """
+    chunking = make_chunking(scratch_dir / "chunks")
+    convert_range = RangeConverter()
+    chunks = []
+    content = chunking.convert(
+        pdf, 10, convert_range, on_chunk=lambda: chunks.append(1)
+    )
+    assert convert_range.ranges == [(1, 4), (5, 8), (9, 10)]
+    assert content["markdown"] == "pages 1-4\n\npages 5-8\n\npages 9-10"
+    assert json.loads(content["json"]) == [
+        {"pages": [1, 4]},
+        {"pages": [5, 8]},
+        {"pages": [9, 10]},
+    ]
+    assert len(chunks) == 3
+    assert os.listdir(scratch_dir / "chunks") == []
+
+
+def test_convert_resume(scratch_dir, pdf):
+    """Test that an interrupted conversion resumes after the last converted
+    range, and that chunks are not reused once the document changes
+    """
+    chunking = make_chunking(scratch_dir / "chunks")
+    with pytest.raises(RuntimeError):
+        chunking.convert(pdf, 10, RangeConverter(fail_at=5))
+    convert_range = RangeConverter()
+    content = chunking.convert(pdf, 10, convert_range)
+    assert convert_range.ranges == [(5, 8), (9, 10)]
+    assert content["markdown"] == "pages 1-4\n\npages 5-8\n\npages 9-10"
+
+    # Other variants and versions of the document start over
+    with pytest.raises(RuntimeError):
+        chunking.convert(pdf, 10, RangeConverter(fail_at=5))
+    convert_range = RangeConverter()
+    chunking.convert(pdf, 10, convert_range, variant="other")
+    assert convert_range.ranges == [(1, 4), (5, 8), (9, 10)]
+    os.utime(pdf, ns=(0, 1_000_000_000))
+    convert_range = RangeConverter()
+    chunking.convert(pdf, 10, convert_range)
+    assert convert_range.ranges == [(1, 4), (5, 8), (9, 10)]
+
+
+def test_prune(scratch_dir, pdf):
+    """Test that abandoned chunks past the maximum age are removed"""
+    chunk_dir = scratch_dir / "chunks"
+    chunking = make_chunking(chunk_dir)
+    with pytest.raises(RuntimeError):
+        chunking.convert(pdf, 10, RangeConverter(fail_at=5))
+    (abandoned,) = os.listdir(chunk_dir)
+    chunking.prune()
+    assert os.listdir(chunk_dir) == [abandoned]
+    old = time.time() - 7200
+    os.utime(chunk_dir / abandoned, (old, old))
+    chunking.prune()
+    assert os.listdir(chunk_dir) == []
+    make_chunking(scratch_dir / "missing").prune()
+
+
+def test_page_count(scratch_dir, monkeypatch):
+    """Test that only PDFs with enough pages are converted in chunks"""
+    pages = {"/docs/long.pdf": 10, "/docs/short.pdf": 9, "/docs/long.docx": 10}
+    monkeypatch.setattr(chunking_module, "pdf_page_count", pages.get)
+    chunking = make_chunking(scratch_dir / "chunks")
+    assert chunking.page_count("/docs/long.pdf") == 10
+    assert chunking.page_count("/docs/short.pdf") is None
+    assert chunking.page_count("/docs/long.docx") is None
+    assert chunking.page_count("/docs/unreadable.pdf") is None
+
+
+def test_export_document(scratch_dir, pdf, monkeypatch):
+    """Test that long documents are converted with docling one page range at a
+    time and other documents in one go, and that every format is exported from
+    the same conversion
+    """
+    calls = []
+
+    class Converter:
+        def convert(self, path, page_range=None):
+            calls.append(page_range)
+            text = "all" if page_range is None else "{}-{}".format(*page_range)
+            document = type(
+                "",
+                (),
+                {
+                    "export_to_markdown": lambda _: f"# {text}",
+                    "export_to_text": lambda _: text,
+                },
+            )()
+            return type("", (), {"document": document})()
+
+    chunking = make_chunking(scratch_dir / "chunks")
+    assert export_document(Converter(), pdf, chunking=chunking) == {"markdown": "# all"}
+    assert export_document(Converter(), pdf, ["text"]) == {
+        "markdown": "# all",
+        "text": "all",
+    }
+    monkeypatch.setattr(chunking_module, "pdf_page_count", lambda _: 10)
+    assert export_document(Converter(), pdf, ["text"], chunking) == {
+        "markdown": "# 1-4\n\n# 5-8\n\n# 9-10",
+        "text": "1-4\n\n5-8\n\n9-10",
+    }
+    assert calls == [None, None, (1, 4), (5, 8), (9, 10)]
+    with pytest.raises(ValueError):
+        export_document(Converter(), pdf, ["pdf"])
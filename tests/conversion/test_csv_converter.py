@@ -0,0 +1,48 @@
+"""
+Unit tests for the CSV converter
+"""
+# Local
+from ragnardoc.conversion import CsvConverter, converter_factory
+
+
+def convert(scratch_dir, text: str, name: str = "doc.csv", **config) -> str:
+    path = scratch_dir / name
+    path.write_text(text, encoding="utf-8")
+    converter = converter_factory.construct({"type": "csv", "config": config})
+    assert isinstance(converter, CsvConverter)
+    return converter.convert(str(path))
+
+
+def test_csv(scratch_dir):
+    """Test that rows are rendered as a markdown table with a header row"""
+    text = 'name,value\na,1\n"b, c",2\n'
+    assert convert(scratch_dir, text) == (
+        "| name | value |\n| --- | --- |\n| a | 1 |\n| b, c | 2 |\n"
+    )
+
+
+def test_tsv(scratch_dir):
+    """Test that the delimiter is detected"""
+    text = "name\tvalue\na\t1\nb\t2\n"
+    assert convert(scratch_dir, text, "doc.tsv") == (
+        "| name | value |\n| --- | --- |\n| a | 1 |\n| b | 2 |\n"
+    )
+
+
+def test_ragged_rows(scratch_dir):
+    """Test that short rows are padded and pipes in cells are escaped"""
+    text = "a,b,c\n1\nx|y,2,3\n"
+    assert convert(scratch_dir, text) == (
+        "| a | b | c |\n| --- | --- | --- |\n| 1 |  |  |\n| x\\|y | 2 | 3 |\n"
+    )
+
+
+def test_max_rows(scratch_dir):
+    """Test that conversion stops at the configured number of rows"""
+    text = "h\n" + "".join(f"{i}\n" for i in range(10))
+    assert convert(scratch_dir, text, max_rows=3) == "| h |\n| --- |\n| 0 |\n| 1 |\n"
+
+
+def test_empty(scratch_dir):
+    """Test that an empty file converts to nothing"""
+    assert convert(scratch_dir, "") == ""
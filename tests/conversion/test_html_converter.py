@@ -0,0 +1,76 @@
+"""
+Unit tests for the HTML converter
+"""
+# Local
+from ragnardoc.conversion import HtmlConverter, converter_factory
+
+
+def convert(scratch_dir, html: str, **config) -> str:
+    path = scratch_dir / "doc.html"
+    path.write_text(html, encoding="utf-8")
+    converter = converter_factory.construct({"type": "html", "config": config})
+    assert isinstance(converter, HtmlConverter)
+    return converter.convert(str(path))
+
+
+def test_headings_and_paragraphs(scratch_dir):
+    """Test that headings and paragraphs become markdown blocks with the source
+    line breaks collapsed
+    """
+    html = """<html><head><title>Ignored</title></head><body>
+    <h1>Title</h1>
+    <p>Some
+       text with <b>bold</b> words.</p>
+    <h3>Sub</h3><p>More</p>
+    </body></html>"""
+    assert convert(scratch_dir, html) == (
+        "# Title\n\nSome text with bold words.\n\n### Sub\n\nMore\n"
+    )
+
+
+def test_non_content_dropped(scratch_dir):
+    """Test that scripts and styles are dropped"""
+    html = "<style>p {}</style><script>var x = '<p>';</script><p>Kept</p>"
+    assert convert(scratch_dir, html) == "Kept\n"
+
+
+def test_unclosed_head(scratch_dir):
+    """Test that the body is kept when the optional </head> is left out"""
+    html = (
+        "<html><head><title>T</title><meta charset='utf-8'>"
+        "<style>h1 {}</style><body><h1>Hello</h1><p>World</p></body></html>"
+    )
+    assert convert(scratch_dir, html) == "# Hello\n\nWorld\n"
+
+
+def test_lists(scratch_dir):
+    """Test that nested lists are rendered as tight markdown lists"""
+    html = "<ul><li>One<ul><li>Inner</li></ul></li><li>Two</li></ul>"
+    assert convert(scratch_dir, html) == "- One\n  - Inner\n- Two\n"
+
+
+def test_pre(scratch_dir):
+    """Test that preformatted blocks keep their whitespace"""
+    html = "<pre>def f():\n    return 1</pre>"
+    assert convert(scratch_dir, html) == "```\ndef f():\n    return 1\n```\n"
+
+
+def test_table(scratch_dir):
+    """Test that tables are rendered as pipe tables"""
+    html = (
+        "<table><tr><th>Name</th><th>Value</th></tr>"
+        "<tr><td>a|b</td><td>1</td></tr></table>"
+    )
+    assert convert(scratch_dir, html) == (
+        "| Name | Value |\n| --- | --- |\n| a\\|b | 1 |\n"
+    )
+
+
+def test_encoding(scratch_dir):
+    """Test that the configured encoding is used to read the file"""
+    path = scratch_dir / "doc.html"
+    path.write_bytes("<p>café</p>".encode("latin-1"))
+    converter = converter_factory.construct(
+        {"type": "html", "config": {"encoding": "latin-1"}}
+    )
+    assert converter.convert(str(path)) == "café\n"
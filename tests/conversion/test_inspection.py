@@ -0,0 +1,141 @@
+"""
+Unit tests for PDF inspection
+"""
+# Standard
+from types import ModuleType
+import sys
+
+# Third Party
+import pytest
+
+# Local
+from ragnardoc.conversion import PdfInspection, inspect_pdf, pdf_page_count
+
+## Helpers #####################################################################
+
+IMAGE = 3
+
+
+class FakePage:
+    def __init__(self, text: str, images: int):
+        self.text = text
+        self.images = images
+        self.closed = False
+
+    def get_textpage(self):
+        page = self
+
+        class TextPage:
+            def get_text_range(self):
+                return page.text
+
+            def close(self):
+                pass
+
+        return TextPage()
+
+    def get_objects(self, filter=None):
+        assert filter == [IMAGE]
+        return iter([object()] * self.images)
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def fake_pdfium(monkeypatch):
+    """Install a stand-in for pypdfium2 that opens documents from a dict of
+    path to pages
+    """
+    documents = {}
+    opened = []
+
+    class PdfDocument:
+        def __init__(self, path):
+            if path not in documents:
+                raise RuntimeError(f"Failed to load document: {path}")
+            self.pages = documents[path]
+            self.closed = False
+            opened.append(self)
+
+        def __len__(self):
+            return len(self.pages)
+
+        def __getitem__(self, index):
+            return self.pages[index]
+
+        def close(self):
+            self.closed = True
+
+    pdfium = ModuleType("pypdfium2")
+    pdfium.PdfDocument = PdfDocument
+    pdfium_c = ModuleType("pypdfium2.raw")
+    pdfium_c.FPDF_PAGEOBJ_IMAGE = IMAGE
+    pdfium.raw = pdfium_c
+    monkeypatch.setitem(sys.modules, "pypdfium2", pdfium)
+    monkeypatch.setitem(sys.modules, "pypdfium2.raw", pdfium_c)
+    yield documents, opened
+
+
+## Tests #######################################################################
+
+
+def test_inspect_text_pdf(fake_pdfium):
+    """Test that pages with a text layer are counted and don't need OCR"""
+    documents, opened = fake_pdfium
+    documents["a.pdf"] = [
+        FakePage("A paragraph of real text", 1),
+        FakePage("More text on page two", 0),
+        FakePage("", 0),
+    ]
+    inspection = inspect_pdf("a.pdf")
+    assert inspection == PdfInspection(
+        pages=3, inspected=3, text_pages=2, image_pages=0
+    )
+    assert inspection.has_text
+    assert not inspection.needs_ocr
+    assert all(page.closed for page in documents["a.pdf"])
+    assert opened[0].closed
+
+
+def test_inspect_scanned_pdf(fake_pdfium):
+    """Test that image pages with little or no text need OCR"""
+    documents, _ = fake_pdfium
+    documents["a.pdf"] = [FakePage("Some text on the page", 0), FakePage(" 1 \n", 1)]
+    inspection = inspect_pdf("a.pdf")
+    assert inspection.text_pages == 1
+    assert inspection.image_pages == 1
+    assert inspection.needs_ocr
+    assert not inspect_pdf("a.pdf", min_chars=100).has_text
+
+
+def test_inspect_max_pages(fake_pdfium):
+    """Test that long documents have an even sample of pages inspected"""
+    documents, _ = fake_pdfium
+    pages = [FakePage("Text layer on this page", 0) for _ in range(10)]
+    documents["a.pdf"] = pages
+    inspection = inspect_pdf("a.pdf", max_pages=4)
+    assert (inspection.pages, inspection.inspected) == (10, 4)
+    assert not inspection.complete
+    assert [i for i, page in enumerate(pages) if page.closed] == [0, 2, 5, 7]
+
+
+def test_inspect_unreadable(fake_pdfium):
+    """Test that documents that can't be read are not inspected"""
+    assert inspect_pdf("missing.pdf") is None
+
+
+def test_inspect_no_pdfium(monkeypatch):
+    """Test that nothing is inspected without pypdfium2"""
+    monkeypatch.setitem(sys.modules, "pypdfium2", None)
+    assert inspect_pdf("a.pdf") is None
+    assert pdf_page_count("a.pdf") is None
+
+
+def test_page_count(fake_pdfium):
+    """Test that pages are counted without reading them"""
+    documents, opened = fake_pdfium
+    documents["a.pdf"] = [FakePage("", 0)] * 3
+    assert pdf_page_count("a.pdf") == 3
+    assert opened[0].closed
+    assert pdf_page_count("missing.pdf") is None
@@ -0,0 +1,284 @@
+"""
+Unit tests for the conversion worker pool
+"""
+# Standard
+import os
+import time
+
+# Third Party
+import pytest
+
+# First Party
+import aconfig
+
+# Local
+from ragnardoc.conversion import (
+    ConversionFailed,
+    ConversionPool,
+    ConversionTimeout,
+    ConverterUnavailable,
+)
+from ragnardoc.conversion import pool as pool_module
+
+## Helpers #####################################################################
+
+
+def fake_converter():
+    """Converter whose behavior is chosen by the file name"""
+    started = os.getpid()
+
+    def convert(path: str) -> str:
+        name = os.path.basename(path)
+        if name.startswith("slow"):
+            time.sleep(30)
+        if name.startswith("nap"):
+            time.sleep(0.5)
+        if name.startswith("steps"):
+            for _ in range(6):
+                time.sleep(0.3)
+                pool_module.heartbeat()
+        if name.startswith("fail"):
+            raise ValueError(f"bad document {name}")
+        if name.startswith("crash"):
+            os._exit(3)
+        if name.startswith("noconv"):
+            raise ConverterUnavailable(f"no converter for {name}")
+        return f"{name} by {started}"
+
+    return convert
+
+
+def make_pool(**overrides) -> ConversionPool:
+    cfg = {
+        "workers": 2,
+        "timeout": 10,
+        "max_documents": 0,
+        "max_rss_mb": 0,
+        "start_method": "spawn",
+    }
+    cfg.update(overrides)
+    return ConversionPool(aconfig.Config(cfg, override_env_vars=False), fake_converter)
+
+
+def convert_all(pool: ConversionPool, paths: list[str]) -> dict:
+    """Run all paths through the pool and return the results by path"""
+    results = {}
+    for path in paths:
+        while not pool.has_capacity:
+            results.update((tag, res) for tag, *res, _ in pool.wait())
+        pool.submit(path, path)
+    while pool.in_flight:
+        results.update((tag, res) for tag, *res, _ in pool.wait())
+    return results
+
+
+def worker_pid(content: str) -> str:
+    return content.rsplit(" ", 1)[-1]
+
+
+## Tests #######################################################################
+
+
+def test_convert():
+    """Test that documents are converted on warm workers"""
+    paths = [f"doc{i}.pdf" for i in range(6)]
+    with make_pool() as pool:
+        results = convert_all(pool, paths)
+    assert set(results) == set(paths)
+    assert all(error is None for _, error in results.values())
+    assert all(content.startswith(path) for path, (content, _) in results.items())
+    assert len({worker_pid(content) for content, _ in results.values()}) <= 2
+
+
+def test_capacity():
+    """Test that no more documents than workers are in flight"""
+    with make_pool(workers=1) as pool:
+        pool.submit("a", "a.pdf")
+        assert not pool.has_capacity
+        with pytest.raises(RuntimeError):
+            pool.submit("b", "b.pdf")
+        ((tag, content, error, seconds),) = pool.wait()
+        assert (tag, error) == ("a", None)
+        assert seconds >= 0
+        assert pool.has_capacity
+
+
+def test_warm():
+    """Test that warming starts all workers before documents are submitted"""
+    with make_pool(workers=2) as pool:
+        pool.warm()
+        assert len(pool._idle) == 2
+        pids = {worker.process.pid for worker in pool._idle}
+        results = convert_all(pool, ["a.pdf", "b.pdf"])
+    assert {worker_pid(content) for content, _ in results.values()} <= {
+        str(pid) for pid in pids
+    }
+
+
+def test_warm_count():
+    """Test that warming starts only the requested number of workers"""
+    with make_pool(workers=3) as pool:
+        pool.warm(1)
+        assert len(pool._idle) == 1
+        pool.warm(1)
+        assert len(pool._idle) == 1
+        pool.warm(5)
+        assert len(pool._idle) == 3
+
+
+def test_recycle_max_documents():
+    """Test that workers are replaced after converting max_documents"""
+    paths = [f"doc{i}.pdf" for i in range(4)]
+    with make_pool(workers=1, max_documents=2) as pool:
+        results = convert_all(pool, paths)
+    pids = [worker_pid(results[path][0]) for path in paths]
+    assert pids[0] == pids[1]
+    assert pids[2] == pids[3]
+    assert pids[0] != pids[2]
+
+
+def test_recycle_max_rss():
+    """Test that workers are replaced once they grow past the memory ceiling"""
+    # NOTE: Any Python process is larger than 1MB
+    with make_pool(workers=1, max_rss_mb=1) as pool:
+        results = convert_all(pool, ["a.pdf", "b.pdf"])
+    assert worker_pid(results["a.pdf"][0]) != worker_pid(results["b.pdf"][0])
+
+
+def test_failure():
+    """Test that converter errors are returned without losing the worker"""
+    with make_pool(workers=1) as pool:
+        results = convert_all(pool, ["fail.pdf", "ok.pdf"])
+    _, error = results["fail.pdf"]
+    assert isinstance(error, ConversionFailed)
+    assert "bad document fail.pdf" in str(error)
+    assert not isinstance(error, ConverterUnavailable)
+    assert results["ok.pdf"][1] is None
+
+
+def test_converter_unavailable():
+    """Test that converter load failures keep their type across the worker"""
+    with make_pool(workers=1) as pool:
+        results = convert_all(pool, ["noconv.pdf", "ok.pdf"])
+    assert isinstance(results["noconv.pdf"][1], ConverterUnavailable)
+    assert results["ok.pdf"][1] is None
+
+
+def test_crash():
+    """Test that a worker dying mid conversion fails only its document"""
+    with make_pool(workers=1) as pool:
+        results = convert_all(pool, ["crash.pdf", "ok.pdf"])
+    assert isinstance(results["crash.pdf"][1], ConverterUnavailable)
+    assert results["ok.pdf"][0].startswith("ok.pdf")
+
+
+def test_timeout():
+    """Test that conversions past the timeout are abandoned and the worker is
+    replaced
+    """
+    with make_pool(workers=2, timeout=1) as pool:
+        start = time.monotonic()
+        results = convert_all(pool, ["slow.pdf", "ok1.pdf", "ok2.pdf"])
+        assert time.monotonic() - start < 20
+    assert isinstance(results["slow.pdf"][1], ConversionTimeout)
+    assert results["ok1.pdf"][1] is None
+    assert results["ok2.pdf"][1] is None
+
+
+def test_elapsed():
+    """Test that the time taken by each conversion is reported without the
+    time taken to start the worker
+    """
+    with make_pool(workers=1) as pool:
+        pool.submit("nap", "nap.pdf")
+        ((_, _, error, seconds),) = pool.wait()
+    assert error is None
+    assert 0.5 <= seconds < 1.5
+
+
+def test_wait_timeout():
+    """Test that waiting with a timeout returns once it passes even if no
+    conversion has finished
+    """
+    with make_pool(workers=1) as pool:
+        pool.submit("nap", "nap.pdf")
+        assert pool.wait(0) == []
+        start = time.monotonic()
+        while not (results := pool.wait(0.1)):
+            assert time.monotonic() - start < 20
+    assert [tag for tag, *_ in results] == ["nap"]
+
+
+def test_elapsed_read_late():
+    """Test that the time a finished result waits to be read is not counted"""
+    with make_pool(workers=1) as pool:
+        pool.submit("first", "first.pdf")
+        pool.wait()
+        pool.submit("ok", "ok.pdf")
+        time.sleep(2)
+        ((_, _, error, seconds),) = pool.wait()
+    assert error is None
+    assert seconds < 0.5
+
+
+def test_heartbeat():
+    """Test that conversions reporting progress are not timed out while the
+    time between heartbeats stays under the timeout
+    """
+    with make_pool(workers=1, timeout=1) as pool:
+        results = convert_all(pool, ["steps.pdf"])
+    assert results["steps.pdf"][1] is None
+    pool_module.heartbeat()
+
+
+@pytest.mark.parametrize(
+    ["files", "expected"],
+    [
+        ({"/sys/fs/cgroup/cpu.max": "150000 100000"}, 1.5),
+        ({"/sys/fs/cgroup/cpu.max": "max 100000"}, None),
+        (
+            {
+                "/sys/fs/cgroup/cpu/cpu.cfs_quota_us": "200000",
+                "/sys/fs/cgroup/cpu/cpu.cfs_period_us": "100000",
+            },
+            2,
+        ),
+        (
+            {
+                "/sys/fs/cgroup/cpu/cpu.cfs_quota_us": "-1",
+                "/sys/fs/cgroup/cpu/cpu.cfs_period_us": "100000",
+            },
+            None,
+        ),
+        ({}, None),
+    ],
+)
+def test_cgroup_cpu_quota(files, expected, monkeypatch):
+    """Test that cgroup v1 and v2 CPU quotas are parsed"""
+    monkeypatch.setattr(pool_module, "_read_first_line", files.get)
+    assert pool_module._cgroup_cpu_quota() == expected
+
+
+@pytest.mark.parametrize(
+    ["files", "expected"],
+    [
+        ({"/sys/fs/cgroup/memory.max": "1073741824"}, 1073741824),
+        ({"/sys/fs/cgroup/memory.max": "max"}, None),
+        ({"/sys/fs/cgroup/memory/memory.limit_in_bytes": str(2**63)}, None),
+        ({}, None),
+    ],
+)
+def test_cgroup_memory_limit(files, expected, monkeypatch):
+    """Test that cgroup v1 and v2 memory limits are parsed"""
+    monkeypatch.setattr(pool_module, "_read_first_line", files.get)
+    assert pool_module._cgroup_memory_limit() == expected
+
+
+def test_default_workers(monkeypatch):
+    """Test that the default pool size is limited by CPUs and memory"""
+    monkeypatch.setattr(pool_module, "available_cpus", lambda: 8)
+    monkeypatch.setattr(pool_module, "available_memory", lambda: 10 * 1024**3)
+    assert pool_module.default_workers(4 * 1024**3) == 2
+    assert pool_module.default_workers(0) == 8
+    monkeypatch.setattr(pool_module, "available_memory", lambda: 1024**3)
+    assert pool_module.default_workers(4 * 1024**3) == 1
@@ -0,0 +1,197 @@
+"""
+Unit tests for conversion profiles
+"""
+# Standard
+import json
+import os
+
+# Third Party
+import pytest
+
+# First Party
+import aconfig
+
+# Local
+from ragnardoc import config
+from ragnardoc.config.merge import merge_configs
+from ragnardoc.conversion import (
+    ConverterUnavailable,
+    PdfInspection,
+    ProfileSelector,
+    build_docling_converter,
+)
+from ragnardoc.conversion import profiles as profiles_module
+
+## Helpers #####################################################################
+
+
+def make_selector(**overrides) -> ProfileSelector:
+    # NOTE: Round trip through json to get a mutable copy of the nested config
+    base_config = json.loads(json.dumps(config.scraping.conversion_profiles))
+    return ProfileSelector(
+        aconfig.Config(merge_configs(base_config, overrides), override_env_vars=False)
+    )
+
+
+## Tests #######################################################################
+
+
+def test_select_default():
+    """Test that documents with no matching rule use the default profile,
+    which keeps docling's default options unless configured
+    """
+    assert make_selector().select("/docs/a.pdf") == "accurate"
+    selector = make_selector(default="fast")
+    assert selector.select("/docs/a.pdf") == "fast"
+
+
+def test_select_rules(scratch_dir):
+    """Test that the first matching rule chooses the profile"""
+    root = str(scratch_dir)
+    selector = make_selector(
+        rules=[
+            {"profile": "accurate", "extensions": ["PNG", ".jpg"]},
+            {"profile": "fast", "paths": [root], "extensions": ["pdf"]},
+            {"profile": "fast", "regexprs": [".*/drafts/"]},
+        ]
+    )
+    assert selector.select(os.path.join(root, "scan.png")) == "accurate"
+    assert selector.select(os.path.join(root, "sub", "a.PDF")) == "fast"
+    assert selector.select(os.path.join(root, "a.docx")) == "accurate"
+    assert selector.select(root + "_other/a.pdf") == "accurate"
+    assert selector.select("/docs/drafts/a.docx") == "fast"
+
+
+def test_select_routing(monkeypatch):
+    """Test that PDFs that no rule matches are routed by whether their pages
+    need OCR
+    """
+    inspections = {
+        "/docs/paper.pdf": PdfInspection(10, 10, 10, 0),
+        "/docs/scan.PDF": PdfInspection(3, 3, 0, 3),
+        "/docs/mixed.pdf": PdfInspection(3, 3, 2, 1),
+        "/docs/ruled.pdf": PdfInspection(3, 3, 0, 3),
+        "/docs/sampled.pdf": PdfInspection(100, 50, 50, 0),
+    }
+    inspected = []
+
+    def inspect(path, min_chars, max_pages):
+        inspected.append(path)
+        return inspections.get(path)
+
+    monkeypatch.setattr(profiles_module, "inspect_pdf", inspect)
+    selector = make_selector(
+        rules=[{"profile": "fast", "regexprs": [".*/ruled"]}],
+        routing={"enabled": True},
+    )
+    assert selector.select("/docs/paper.pdf") == "digital"
+    assert selector.select("/docs/scan.PDF") == "balanced"
+    assert selector.select("/docs/mixed.pdf") == "balanced"
+    assert selector.select("/docs/sampled.pdf") == "balanced"
+    assert selector.select("/docs/unreadable.pdf") == "accurate"
+    assert selector.select("/docs/ruled.pdf") == "fast"
+    assert selector.select("/docs/a.docx") == "accurate"
+    assert "/docs/ruled.pdf" not in inspected
+    assert "/docs/a.docx" not in inspected
+
+    assert make_selector().select("/docs/paper.pdf") == "accurate"
+
+
+def test_select_routing_once(scratch_dir, monkeypatch):
+    """Test that each version of a PDF is only inspected once"""
+    inspected = []
+
+    def inspect(path, min_chars, max_pages):
+        inspected.append(path)
+        return PdfInspection(1, 1, 1, 0)
+
+    monkeypatch.setattr(profiles_module, "inspect_pdf", inspect)
+    pdf = scratch_dir / "paper.pdf"
+    pdf.write_bytes(b"%PDF-1.4 fake")
+    selector = make_selector(routing={"enabled": True})
+    assert selector.select(str(pdf)) == "digital"
+    assert selector.select(str(pdf), os.stat(pdf)) == "digital"
+    assert inspected == [str(pdf)]
+    pdf.write_bytes(b"%PDF-1.4 changed fake")
+    assert selector.select(str(pdf)) == "digital"
+    assert inspected == [str(pdf), str(pdf)]
+
+
+@pytest.mark.parametrize(
+    "overrides",
+    [
+        {"default": "missing"},
+        {"rules": [{"profile": "missing", "extensions": ["pdf"]}]},
+        {"profiles": {"fast": {"do_magic": True}}},
+        {"routing": {"enabled": True, "text_profile": "missing"}},
+    ],
+)
+def test_invalid_config(overrides):
+    """Test that unknown profiles and options are rejected up front"""
+    with pytest.raises(ValueError):
+        make_selector(**overrides)
+
+
+def test_cache_variant():
+    """Test that the cache variant changes with the profile's options"""
+    variant = make_selector().cache_variant("fast")
+    assert make_selector().cache_variant("fast") == variant
+    assert make_selector().cache_variant("accurate") != variant
+    changed = make_selector(profiles={"fast": {"do_ocr": True}})
+    assert changed.cache_variant("fast") != variant
+
+
+def test_docling_converter_per_profile(monkeypatch):
+    """Test that the worker converter builds one converter per profile"""
+    built = []
+
+    class Converter:
+        def __init__(self, options):
+            self.options = options
+
+        def convert(self, path):
+            document = type("", (), {"export_to_markdown": lambda _: path})()
+            return type("", (), {"document": document})()
+
+    def build(options):
+        built.append(options)
+        return Converter(options)
+
+    monkeypatch.setattr(profiles_module, "build_docling_converter", build)
+    profiles = {"fast": {"do_ocr": False}, "accurate": {"do_ocr": True}}
+    convert = profiles_module.docling_converter(profiles)
+    assert convert("a.pdf", "fast") == {"markdown": "a.pdf"}
+    convert("b.pdf", "fast")
+    convert("c.pdf", "accurate")
+    assert built == [{"do_ocr": False}, {"do_ocr": True}]
+
+
+def test_docling_converter_unavailable(monkeypatch):
+    """Test that failures to build a converter are told apart from failures to
+    convert a document
+    """
+
+    def build(_):
+        raise ModuleNotFoundError("No module named 'docling'")
+
+    monkeypatch.setattr(profiles_module, "build_docling_converter", build)
+    convert = profiles_module.docling_converter({"fast": {}})
+    with pytest.raises(ConverterUnavailable, match="fast converter"):
+        convert("a.pdf", "fast")
+
+
+def test_build_docling_converter_options():
+    """Test that profile options are applied to docling's PDF pipeline"""
+    pytest.importorskip("docling.datamodel.pipeline_options")
+    # Third Party
+    from docling.datamodel.base_models import InputFormat
+    from docling.datamodel.pipeline_options import TableFormerMode
+
+    converter = build_docling_converter(
+        {"do_ocr": False, "do_table_structure": True, "table_mode": "fast"}
+    )
+    for input_format in [InputFormat.PDF, InputFormat.IMAGE]:
+        options = converter.format_to_options[input_format].pipeline_options
+        assert options.do_ocr is False
+        assert options.do_table_structure is True
+        assert options.table_structure_options.mode == TableFormerMode.FAST
@@ -0,0 +1,115 @@
+"""
+Unit tests for the content fingerprinter
+"""
+# Standard
+from unittest import mock
+import hashlib
+import os
+
+# Third Party
+import pytest
+
+# Local
+from ragnardoc.fingerprint import ContentFingerprinter, fingerprinter_factory
+from ragnardoc.storage.dict_storage import DictStorage
+
+## Helpers #####################################################################
+
+
+def make_fingerprinter(storage=None, **config) -> ContentFingerprinter:
+    return fingerprinter_factory.construct(
+        {"type": "content", "config": config}, storage=storage or DictStorage()
+    )
+
+
+def fingerprint(fingerprinter, path) -> str:
+    return fingerprinter.fingerprint(str(path), os.stat(path))
+
+
+## Tests #######################################################################
+
+
+def test_content_hash(scratch_dir):
+    """Test that the fingerprint is the hash of the file's content"""
+    path = scratch_dir / "doc.txt"
+    path.write_bytes(b"hello world")
+    assert (
+        fingerprint(make_fingerprinter(), path)
+        == "blake2b:" + hashlib.blake2b(b"hello world").hexdigest()
+    )
+    assert (
+        fingerprint(make_fingerprinter(algorithm="sha256"), path)
+        == "sha256:" + hashlib.sha256(b"hello world").hexdigest()
+    )
+
+
+def test_empty_file(scratch_dir):
+    """Test that empty files (which can't be memory mapped) are hashed"""
+    path = scratch_dir / "empty.txt"
+    path.write_bytes(b"")
+    assert (
+        fingerprint(make_fingerprinter(), path)
+        == "blake2b:" + hashlib.blake2b(b"").hexdigest()
+    )
+
+
+def test_mmap_fallback(scratch_dir):
+    """Test that files that can't be memory mapped are read instead"""
+    path = scratch_dir / "doc.txt"
+    path.write_bytes(b"hello world")
+    with mock.patch("mmap.mmap", side_effect=OSError("nope")):
+        assert (
+            fingerprint(make_fingerprinter(), path)
+            == "blake2b:" + hashlib.blake2b(b"hello world").hexdigest()
+        )
+
+
+def test_touch_keeps_fingerprint(scratch_dir):
+    """Test that metadata-only changes don't change the fingerprint while
+    content changes do
+    """
+    fingerprinter = make_fingerprinter()
+    path = scratch_dir / "doc.txt"
+    path.write_bytes(b"hello world")
+    fp1 = fingerprint(fingerprinter, path)
+    os.utime(path, ns=(0, 1_000_000_000))
+    assert fingerprint(fingerprinter, path) == fp1
+    path.write_bytes(b"hello there")
+    assert fingerprint(fingerprinter, path) != fp1
+
+
+def test_content_only_hashed_on_metadata_change(scratch_dir):
+    """Test that the content is only read when the metadata has changed, even
+    across instances sharing storage
+    """
+    storage = DictStorage()
+    path = scratch_dir / "doc.txt"
+    path.write_bytes(b"hello world")
+    fp1 = fingerprint(make_fingerprinter(storage), path)
+    fingerprinter = make_fingerprinter(storage)
+    with mock.patch.object(fingerprinter, "_hash_file") as hash_mock:
+        assert fingerprint(fingerprinter, path) == fp1
+        hash_mock.assert_not_called()
+    os.utime(path, ns=(0, 1_000_000_000))
+    with mock.patch.object(
+        fingerprinter, "_hash_file", side_effect=fingerprinter._hash_file
+    ) as hash_mock:
+        assert fingerprint(fingerprinter, path) == fp1
+        hash_mock.assert_called_once()
+
+
+def test_forget(scratch_dir):
+    """Test that the stored hashes of removed files are dropped"""
+    storage = DictStorage()
+    fingerprinter = make_fingerprinter(storage)
+    path = scratch_dir / "doc.txt"
+    path.write_bytes(b"hello world")
+    fingerprint(fingerprinter, path)
+    fingerprinter.forget([str(path)])
+    assert not storage.namespace("__core_fingerprint__")._data
+
+
+def test_invalid_algorithm():
+    """Test that an unknown hash algorithm is an error at construction"""
+    with pytest.raises(ValueError):
+        make_fingerprinter(algorithm="not-a-hash")
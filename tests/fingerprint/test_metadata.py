@@ -0,0 +1,40 @@
+"""
+Unit tests for the metadata fingerprinter
+"""
+# Standard
+import os
+
+# Local
+from ragnardoc.fingerprint import MetadataFingerprinter, fingerprinter_factory
+from ragnardoc.storage.dict_storage import DictStorage
+
+
+def make_fingerprinter() -> MetadataFingerprinter:
+    return fingerprinter_factory.construct({"type": "metadata"}, storage=DictStorage())
+
+
+def test_construct():
+    """Test that the fingerprinter can be constructed by the factory"""
+    assert isinstance(make_fingerprinter(), MetadataFingerprinter)
+
+
+def test_metadata_changes(scratch_dir):
+    """Test that the fingerprint changes with the file's metadata"""
+    fingerprinter = make_fingerprinter()
+    path = scratch_dir / "doc.txt"
+    path.write_text("hello")
+    os.utime(path, ns=(0, 1_000_000_000))
+    fp1 = fingerprinter.fingerprint(str(path), os.stat(path))
+    assert fingerprinter.fingerprint(str(path), os.stat(path)) == fp1
+
+    # Nanosecond mtime changes are seen
+    os.utime(path, ns=(0, 1_000_000_001))
+    fp2 = fingerprinter.fingerprint(str(path), os.stat(path))
+    assert fp2 != fp1
+
+    # Replacing the file with the same metadata changes the inode
+    replacement = scratch_dir / "new.txt"
+    replacement.write_text("hello")
+    os.utime(replacement, ns=(0, 1_000_000_001))
+    os.replace(replacement, path)
+    assert fingerprinter.fingerprint(str(path), os.stat(path)) != fp2
@@ -3,6 +3,7 @@ Unit tests for testing the AnythingLLM ingestor
 """
 # Standard
 from contextlib import contextmanager
+from pathlib import Path
 from unittest import mock
 import io
 import json
@@ -210,8 +211,8 @@ def anythingllm_mock_ctx(workspaces: list[str]):
         yield mock_server
 
 
-@pytest.fixture
-def anythingllm():
+@pytest.fixture(params=[False, True], ids=["buffered", "streamed"])
+def anythingllm(request):
     workspaces = ["workspace1", "workspace2"]
     with anythingllm_mock_ctx(workspaces) as mock_server:
         storage = storage_factory.construct({"type": "dict"})
@@ -221,6 +222,7 @@ def anythingllm():
                 "workspaces": workspaces,
                 "apikey": "my-key",
                 "root_folder": "ragnardoc_tests",
+                "stream_uploads": request.param,
             },
             override_env_vars=False,
         )
@@ -250,6 +252,13 @@ def test_anythingllm_ingest_delete(anythingllm, data_dir):
 
     # Make sure both docs found in correct folder
     assert len(anythingllm.mock.docs[anythingllm._root_folder]) == 2
+    uploaded = {
+        body["metadata"]["title"]: body["textContent"]
+        for body in anythingllm.mock.docs[anythingllm._root_folder].values()
+    }
+    assert uploaded == {
+        anythingllm._get_doc_title(doc): Path(doc.path).read_text() for doc in docs
+    }
 
     # Make sure docs are associated with both workspaces
     assert len(anythingllm.mock.workspaces["workspace1"]["documents"]) == 2
@@ -224,8 +224,8 @@ def open_webui_mock_ctx():
         yield mock_server
 
 
-@pytest.fixture
-def open_webui_mock():
+@pytest.fixture(params=[False, True], ids=["buffered", "streamed"])
+def open_webui_mock(request):
     with open_webui_mock_ctx() as mock_server:
         storage = storage_factory.construct({"type": "dict"})
         cfg = aconfig.Config(
@@ -233,6 +233,7 @@ def open_webui_mock():
                 "base_url": mock_server.base_url,
                 "apikey": "my-key",
                 "knowledge": "ragnardoc_tests",
+                "stream_uploads": request.param,
             },
             override_env_vars=False,
         )
@@ -288,6 +289,8 @@ def test_open_webui_ingest_delete(open_webui_mock, mutable_data_dir):
     assert open_webui_mock.mock.files[doc_id]["data"]["content"] != new_content
     with open(docs[0].path, "w") as handle:
         handle.write("I added some interesting different content!")
+    # NOTE: The docs are reused across cycles, so drop the cached metadata
+    docs[0].invalidate()
     open_webui_mock.ingest(docs)
     assert open_webui_mock.mock.files[doc_id]["data"]["content"] == new_content
 
@@ -316,3 +319,19 @@ def test_open_webui_duplicate_content_ok(open_webui_mock, data_dir):
     # Re-do ingestion and make sure the doc is marked as "done"
     open_webui_mock.ingest(docs)
     assert len(open_webui_mock._storage._data) == 1
+
+
+def test_open_webui_export_format(open_webui_mock, mutable_data_dir):
+    """Test that converted documents are uploaded in the export format"""
+    open_webui_mock.export_format = "text"
+    pdf = mutable_data_dir / "doc.pdf"
+    pdf.write_bytes(b"%PDF-1.4 fake")
+    doc = Document.from_file(
+        pdf,
+        mutable_data_dir,
+        converter=lambda _: {"markdown": "# converted", "text": "converted"},
+    )
+    open_webui_mock.ingest([doc])
+    (uploaded,) = open_webui_mock.mock.files.values()
+    assert uploaded["filename"] == "doc.pdf (data).txt"
+    assert uploaded["data"]["content"] == "converted"
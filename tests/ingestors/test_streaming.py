@@ -0,0 +1,70 @@
+"""
+Unit tests for the streamed request bodies
+"""
+# Standard
+from unittest import mock
+import io
+import json
+
+# Third Party
+import pytest
+
+# Local
+from ragnardoc.ingestors import streaming
+from tests.conftest import ServerMockBase
+
+
+class ClosedTrackingBytesIO(io.BytesIO):
+    was_closed = False
+
+    def close(self):
+        self.was_closed = True
+        super().close()
+
+
+@pytest.mark.parametrize("read_size", [-1, 1, 7, streaming.CHUNK_SIZE])
+def test_multipart_file_body(read_size):
+    """Test that the multipart body has the right length and parses back to
+    the file regardless of the read size
+    """
+    stream = ClosedTrackingBytesIO("some content with ünïcode".encode())
+    body = streaming.MultipartFileBody("file", 'my "doc".txt', stream)
+    chunks = []
+    while chunk := body.read(read_size):
+        chunks.append(chunk)
+    raw = b"".join(chunks)
+    assert len(raw) == len(body)
+    assert stream.was_closed
+
+    _, files = ServerMockBase._parse_streamed_body(
+        iter([raw]), {"Content-Type": body.content_type}
+    )
+    assert files == {"file": ("my %22doc%22.txt", "some content with ünïcode")}
+
+
+def test_multipart_file_body_partial_stream():
+    """Test that only the remainder of a partially read stream is sent"""
+    stream = io.BytesIO(b"skip:keep")
+    stream.read(5)
+    body = streaming.MultipartFileBody("file", "doc.txt", stream)
+    raw = body.read()
+    assert len(raw) == len(body)
+    assert b"keep" in raw and b"skip" not in raw
+
+
+@pytest.mark.parametrize(
+    "text", ["simple", 'quotes " and \\ and \n newlines', "multi-byte ü€😀" * 5, ""]
+)
+def test_json_text_body(text):
+    """Test that the streamed JSON is valid and holds the text and fields, even
+    when multi-byte characters span chunk boundaries
+    """
+    stream = ClosedTrackingBytesIO(text.encode("utf-8"))
+    with mock.patch.object(streaming, "CHUNK_SIZE", 3):
+        raw = b"".join(streaming.json_text_body(stream, "content", meta={"a": 1}))
+    assert json.loads(raw) == {"content": text, "meta": {"a": 1}}
+    assert stream.was_closed
+
+    stream = io.BytesIO(text.encode("utf-8"))
+    raw = b"".join(streaming.json_text_body(stream, "content"))
+    assert json.loads(raw) == {"content": text}
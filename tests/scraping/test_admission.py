@@ -0,0 +1,175 @@
+"""
+Unit tests for the pre-conversion admission policy
+"""
+# Standard
+from unittest import mock
+import json
+import os
+
+# Third Party
+import pytest
+
+# First Party
+import aconfig
+
+# Local
+from ragnardoc.scraping.admission import AdmissionPolicy
+from ragnardoc.storage.dict_storage import DictStorage
+from ragnardoc.types import Document
+
+## Helpers #####################################################################
+
+
+def make_policy(storage=None, **overrides) -> AdmissionPolicy:
+    config = {
+        "enabled": True,
+        "max_size_mb": 1,
+        "max_size_mb_by_extension": {"txt": 0.001},
+        "sniff_bytes": 1024,
+    }
+    config.update(overrides)
+    return AdmissionPolicy(
+        storage or DictStorage().namespace("test"),
+        aconfig.Config(config, override_env_vars=False),
+        ["txt", "md"],
+    )
+
+
+def admit(policy: AdmissionPolicy, path) -> str | None:
+    path = str(path)
+    return policy.admit(path, Document(path, "").fingerprint())
+
+
+## Tests #######################################################################
+
+
+@pytest.mark.parametrize(
+    ["fname", "content", "rejected"],
+    [
+        ("ok.txt", b"hello world", False),
+        ("empty.txt", b"", True),
+        ("big.txt", b"a" * 2048, True),
+        ("big.md", b"a" * 2048, False),
+        ("binary.txt", b"hello\0world", True),
+        ("latin1.md", "caf\xe9 au lait".encode("latin-1"), True),
+        ("utf8.md", "caf\xe9".encode(), False),
+        ("doc.pdf", b"%PDF-1.7\n...", False),
+        ("doc.pdf", b"\n\n%PDF-1.4\n...", False),
+        ("fake.pdf", b"this is not a pdf", True),
+        ("doc.docx", b"PK\x03\x04...", False),
+        ("fake.docx", b"<html></html>", True),
+        ("page.html", b"<html>hi</html>", False),
+        ("page.html", b"<html>\0\0\0</html>", True),
+        ("unknown.xyz", b"\0\0\0", False),
+    ],
+)
+def test_admission_checks(scratch_dir, fname, content, rejected):
+    """Test that size limits and content sniffing are applied"""
+    path = scratch_dir / fname
+    path.write_bytes(content)
+    reason = admit(make_policy(), path)
+    assert bool(reason) == rejected
+
+
+def test_utf8_split_at_sniff_boundary(scratch_dir):
+    """Test that a multi-byte character cut off by the sniff window does not
+    cause a rejection
+    """
+    path = scratch_dir / "doc.md"
+    path.write_bytes(b"a" * 1023 + "\xe9".encode())
+    assert admit(make_policy(), path) is None
+
+
+def test_size_limit_disabled(scratch_dir):
+    """Test that a zero size limit disables the check"""
+    path = scratch_dir / "doc.md"
+    path.write_bytes(b"a" * 2 * 1024 * 1024)
+    assert admit(make_policy(max_size_mb=0), path) is None
+    assert admit(make_policy(), path)
+
+
+def test_disabled(scratch_dir):
+    """Test that nothing is rejected when the policy is disabled"""
+    path = scratch_dir / "empty.txt"
+    path.write_bytes(b"")
+    assert admit(make_policy(enabled=False), path) is None
+
+
+def test_records_persisted(scratch_dir):
+    """Test that results are recorded by fingerprint and only re-checked when
+    the document changes
+    """
+    storage = DictStorage().namespace("test")
+    path = scratch_dir / "doc.pdf"
+    path.write_bytes(b"not a pdf")
+    policy = make_policy(storage)
+    assert admit(policy, path)
+    policy.flush()
+
+    # A new policy instance uses the persisted record without reading the file
+    policy = make_policy(storage)
+    os.chmod(path, 0)
+    try:
+        assert admit(policy, path)
+    finally:
+        os.chmod(path, 0o644)
+
+    # Once the file changes, it is checked again
+    path.write_bytes(b"%PDF-1.7 this is now a real pdf!")
+    assert admit(policy, path) is None
+
+
+def test_reject_after_admission(scratch_dir):
+    """Test that an admitted document can be rejected after the fact (e.g.
+    after conversion) and stays rejected until it changes
+    """
+    storage = DictStorage().namespace("test")
+    path = scratch_dir / "doc.pdf"
+    path.write_bytes(b"%PDF-1.7 but empty")
+    policy = make_policy(storage)
+    assert admit(policy, path) is None
+    policy.reject(str(path), "conversion produced no content")
+    assert admit(make_policy(storage), path) == "conversion produced no content"
+
+
+def test_retain(scratch_dir):
+    """Test that records for paths that no longer exist are dropped"""
+    storage = DictStorage().namespace("test")
+    path1 = scratch_dir / "doc1.txt"
+    path1.write_bytes(b"")
+    path2 = scratch_dir / "doc2.txt"
+    path2.write_bytes(b"")
+    policy = make_policy(storage)
+    admit(policy, path1)
+    admit(policy, path2)
+    policy.retain({str(path1)})
+    policy.flush()
+    assert set(make_policy(storage)._records) == {str(path1)}
+
+
+def test_admitted_not_stored_by_path(scratch_dir):
+    """Test that only rejections are stored by path and that admitted
+    documents are not checked again by a new policy instance
+    """
+    storage = DictStorage().namespace("test")
+    good = scratch_dir / "good.pdf"
+    good.write_bytes(b"%PDF-1.7 a real pdf")
+    bad = scratch_dir / "bad.pdf"
+    bad.write_bytes(b"not a pdf")
+    policy = make_policy(storage)
+    assert admit(policy, good) is None
+    assert admit(policy, bad)
+    policy.flush()
+    assert set(json.loads(storage.get(AdmissionPolicy._records_key))) == {str(bad)}
+    assert str(good) not in storage.get(AdmissionPolicy._admitted_key)
+
+    policy = make_policy(storage)
+    with mock.patch.object(policy, "_check") as check:
+        assert admit(policy, good) is None
+        assert admit(policy, bad)
+    check.assert_not_called()
+
+    # Admitted documents that are gone are dropped after a full scrape
+    policy.retain({str(bad)})
+    policy.flush()
+    assert json.loads(storage.get(AdmissionPolicy._admitted_key)) == []
@@ -0,0 +1,801 @@
+"""
+Unit tests for the file scraper
+"""
+# Standard
+from unittest import mock
+import json
+import os
+import sys
+import threading
+import time
+
+# Third Party
+import pytest
+
+# First Party
+import aconfig
+
+# Local
+from ragnardoc import config
+from ragnardoc.config.merge import merge_configs
+from ragnardoc.conversion import ConversionPool, ConverterUnavailable, FormatConverter
+from ragnardoc.scraping import FileScraper
+from ragnardoc.scraping.admission import DocumentRejected
+from ragnardoc.scraping.slow_lane import SlowLane
+from ragnardoc.storage.dict_storage import DictStorage
+from ragnardoc.storage.sqlite_storage import SqliteStorage
+from tests.conftest import (
+    FakeDocumentConverter,
+    crashing_pool_converter,
+    fake_convert,
+    fake_pool_converter,
+)
+
+## Helpers #####################################################################
+
+
+class UpperConverter(FormatConverter):
+    """Format converter plugin that upper-cases the file's text"""
+
+    name = "upper"
+    config_schema = {"type": "object"}
+
+    def __init__(self, config, instance_name):
+        pass
+
+    def convert(self, path: str) -> str:
+        with open(path, encoding="utf-8") as handle:
+            return handle.read().upper()
+
+
+def make_scraper(storage=None, **overrides) -> FileScraper:
+    # NOTE: Round trip through json to get a mutable copy of the nested config
+    base_config = json.loads(json.dumps(config.scraping))
+    scraping_config = aconfig.Config(
+        merge_configs(base_config, overrides), override_env_vars=False
+    )
+    return FileScraper(storage or DictStorage(), scraping_config)
+
+
+def use_fake_converter(scraper: FileScraper) -> FakeDocumentConverter:
+    """Use a fake in place of the docling converters for all profiles"""
+    converter = FakeDocumentConverter()
+    scraper._load_converter = lambda _: converter
+    return converter
+
+
+def doc_paths(docs) -> set[str]:
+    return {doc.path for doc in docs}
+
+
+## Tests #######################################################################
+
+
+def test_scrape(data_dir):
+    """Test that all files under the roots are found"""
+    scraper = make_scraper(roots=[str(data_dir)])
+    result = scraper.scrape()
+    assert doc_paths(result.documents) == {
+        str(data_dir / "sample.txt"),
+        str(data_dir / "sample_docs" / "README.md"),
+        str(data_dir / "sample_docs" / "nested" / "sample.txt"),
+    }
+    assert all(doc.root == str(data_dir) for doc in result.documents)
+    assert not result.removed
+
+
+def test_scrape_excluded_dirs(data_dir):
+    """Test that files in excluded directories are not found"""
+    scraper = make_scraper(roots=[str(data_dir)], exclude={"regexprs": [".*/nested/"]})
+    result = scraper.scrape()
+    assert doc_paths(result.documents) == {
+        str(data_dir / "sample.txt"),
+        str(data_dir / "sample_docs" / "README.md"),
+    }
+
+
+def test_scrape_removed(mutable_data_dir):
+    """Test that removed files are detected on subsequent scrapes"""
+    scraper = make_scraper(roots=[str(mutable_data_dir)])
+    scraper.scrape()
+    removed = mutable_data_dir / "sample.txt"
+    removed.unlink()
+    result = scraper.scrape()
+    assert doc_paths(result.removed) == {str(removed)}
+    assert str(removed) not in doc_paths(result.documents)
+
+
+def test_scrape_paths(mutable_data_dir):
+    """Test that individual changed paths can be scraped"""
+    root = str(mutable_data_dir)
+    scraper = make_scraper(roots=[root], exclude={"regexprs": [".*\\.md"]})
+    scraper.scrape()
+
+    # New files are found
+    new_file = mutable_data_dir / "new.txt"
+    new_file.write_text("hello")
+    excluded_file = mutable_data_dir / "new.md"
+    excluded_file.write_text("hello")
+    outside_file = mutable_data_dir.parent / "outside.txt"
+    outside_file.write_text("hello")
+    result = scraper.scrape_paths(
+        [str(new_file), str(excluded_file), str(outside_file)]
+    )
+    assert doc_paths(result.documents) == {str(new_file)}
+    assert result.documents[0].root == root
+    assert not result.removed
+
+    # Removed directories remove all docs beneath them
+    nested_dir = mutable_data_dir / "sample_docs" / "nested"
+    nested_file = nested_dir / "sample.txt"
+    nested_file.unlink()
+    os.rmdir(nested_dir)
+    result = scraper.scrape_paths([str(nested_dir)])
+    assert not result.documents
+    assert doc_paths(result.removed) == {str(nested_file)}
+
+    # The full scrape sees the partial results and does not report them again
+    result = scraper.scrape()
+    assert str(new_file) in doc_paths(result.documents)
+    assert not result.removed
+
+
+def test_scrape_ignore_files(mutable_data_dir):
+    """Test that hierarchical ignore files are respected by full and partial
+    scrapes
+    """
+    root = str(mutable_data_dir)
+    (mutable_data_dir / ".ragnardocignore").write_text("nested/\n*.md\n")
+    sample_docs = mutable_data_dir / "sample_docs"
+    (sample_docs / ".ragnardocignore").write_text("!README.md\n")
+    scraper = make_scraper(roots=[root])
+    assert doc_paths(scraper.scrape().documents) == {
+        str(mutable_data_dir / "sample.txt"),
+        str(sample_docs / "README.md"),
+    }
+
+    # Changed files in ignored locations are not scraped individually either
+    ignored_md = mutable_data_dir / "other.md"
+    ignored_md.write_text("hi")
+    result = scraper.scrape_paths(
+        [
+            str(ignored_md),
+            str(sample_docs / "README.md"),
+            str(sample_docs / "nested" / "sample.txt"),
+            str(mutable_data_dir / ".ragnardocignore"),
+        ]
+    )
+    assert doc_paths(result.documents) == {str(sample_docs / "README.md")}
+
+
+def test_scrape_iter(mutable_data_dir):
+    """Test that streaming scrapes yield documents before the walk completes and
+    report removals at the end
+    """
+    scraper = make_scraper(roots=[str(mutable_data_dir)])
+    scraper.scrape()
+    removed = mutable_data_dir / "sample.txt"
+    removed.unlink()
+
+    stream = scraper.scrape_iter()
+    stream_iter = iter(stream)
+    first = next(stream_iter)
+    assert first.path.startswith(str(mutable_data_dir))
+    rest = list(stream_iter)
+    assert doc_paths([first] + rest) == {
+        str(mutable_data_dir / "sample_docs" / "README.md"),
+        str(mutable_data_dir / "sample_docs" / "nested" / "sample.txt"),
+    }
+    assert doc_paths(stream.removed) == {str(removed)}
+
+
+def test_scrape_admission(mutable_data_dir):
+    """Test that documents rejected by the admission policy are not yielded
+    and are not reported as removed
+    """
+    root = str(mutable_data_dir)
+    scraper = make_scraper(roots=[root])
+    scraper.scrape()
+    empty = mutable_data_dir / "empty.txt"
+    empty.write_text("")
+    fake_pdf = mutable_data_dir / "fake.pdf"
+    fake_pdf.write_text("not a pdf")
+    result = scraper.scrape()
+    paths = doc_paths(result.documents)
+    assert str(empty) not in paths
+    assert str(fake_pdf) not in paths
+    assert str(mutable_data_dir / "sample.txt") in paths
+    assert not result.removed
+
+    # Partial scrapes apply the same policy
+    result = scraper.scrape_paths([str(empty), str(fake_pdf)])
+    assert not result.documents
+
+
+def test_scrape_overlapping_roots(mutable_data_dir):
+    """Test that nested and duplicate roots only find each file once under
+    the outermost root
+    """
+    root = str(mutable_data_dir)
+    nested = str(mutable_data_dir / "sample_docs")
+    scraper = make_scraper(roots=[nested, root, root + os.sep])
+    assert scraper.roots == [root]
+    result = scraper.scrape()
+    assert len(result.documents) == 3
+    assert all(doc.root == root for doc in result.documents)
+
+
+def test_scrape_linked_files(mutable_data_dir):
+    """Test that hard links and symlinks to the same file are only scraped
+    once
+    """
+    original = mutable_data_dir / "sample.txt"
+    os.link(original, mutable_data_dir / "sample_docs" / "hardlink.txt")
+    (mutable_data_dir / "symlink.txt").symlink_to(original)
+    scraper = make_scraper(roots=[str(mutable_data_dir)])
+    paths = doc_paths(scraper.scrape().documents)
+    assert len(paths) == 3
+    assert len({os.stat(path).st_ino for path in paths}) == 3
+
+
+def test_scrape_content_fingerprint(mutable_data_dir):
+    """Test that with content fingerprinting, touched files keep their
+    fingerprint across scrapes
+    """
+    scraper = make_scraper(
+        roots=[str(mutable_data_dir)], fingerprint={"type": "content"}
+    )
+    first = {doc.path: doc.fingerprint() for doc in scraper.scrape().documents}
+    touched = mutable_data_dir / "sample.txt"
+    os.utime(touched, ns=(0, 1_000_000_000))
+    second = {doc.path: doc.fingerprint() for doc in scraper.scrape().documents}
+    assert second == first
+
+
+def test_scrape_conversion_cache(mutable_data_dir, scratch_dir):
+    """Test that converted content is reused across scraper instances until
+    the document changes
+    """
+    pdf = mutable_data_dir / "doc.pdf"
+    pdf.write_bytes(b"%PDF-1.4 fake")
+    cache_config = {"path": str(scratch_dir)}
+
+    def converted_content():
+        scraper = make_scraper(
+            roots=[str(mutable_data_dir)], conversion_cache=cache_config
+        )
+        use_fake_converter(scraper)
+        (doc,) = (doc for doc in scraper.scrape().documents if doc.path == str(pdf))
+        return doc.content, scraper.converter.calls
+
+    content, calls = converted_content()
+    assert calls == [str(pdf)]
+    cached_content, calls = converted_content()
+    assert cached_content == content
+    assert not calls
+
+    # A changed document is converted again
+    pdf.write_bytes(b"%PDF-1.4 changed fake")
+    _, calls = converted_content()
+    assert calls == [str(pdf)]
+
+
+def test_export_formats(mutable_data_dir, scratch_dir):
+    """Test that every export format is derived from a single conversion and
+    that the exports are cached together
+    """
+    pdf = mutable_data_dir / "doc.pdf"
+    pdf.write_bytes(b"%PDF-1.4 fake")
+    cache_config = {"path": str(scratch_dir)}
+
+    def converted_exports(export_formats):
+        scraper = make_scraper(
+            roots=[str(mutable_data_dir)], conversion_cache=cache_config
+        )
+        scraper.export_formats = export_formats
+        use_fake_converter(scraper)
+        (doc,) = (doc for doc in scraper.scrape().documents if doc.path == str(pdf))
+        return doc, scraper.converter.calls
+
+    doc, calls = converted_exports(["markdown", "text"])
+    assert doc.export() == fake_convert(str(pdf))
+    assert doc.export("text") == f"converted {pdf}"
+    assert doc.export("json") == doc.content
+    assert calls == [str(pdf)]
+
+    # Both formats come from the cache, and a format that was not exported
+    # before needs another conversion
+    doc, calls = converted_exports(["markdown", "text"])
+    assert doc.export("text") == f"converted {pdf}"
+    assert not calls
+    doc, calls = converted_exports(["html", "markdown"])
+    assert doc.export("html") == f"<p>{doc.content}</p>"
+    assert calls == [str(pdf)]
+
+
+def test_convert_documents(mutable_data_dir, scratch_dir):
+    """Test that documents that need conversion are converted on the pool and
+    that the rest pass straight through
+    """
+    pdfs = [mutable_data_dir / f"doc{i}.pdf" for i in range(3)]
+    for pdf in pdfs:
+        pdf.write_bytes(b"%PDF-1.4 fake")
+    scraper = make_scraper(
+        roots=[str(mutable_data_dir)],
+        conversion_cache={"path": str(scratch_dir)},
+        conversion_pool={"workers": 2},
+    )
+    scraper._conversion_pool = ConversionPool(
+        scraper._conversion_pool_config, fake_pool_converter
+    )
+    docs = scraper.scrape().documents
+    skipped = str(pdfs[0])
+
+    def needs_conversion(doc):
+        return doc.path != skipped
+
+    ready = list(scraper.convert_documents(docs, needs_conversion))
+    scraper._conversion_pool.close()
+    assert doc_paths(ready) == doc_paths(docs)
+
+    # The converted content is current, so reading it does not convert again
+    use_fake_converter(scraper)
+    for doc in ready:
+        if doc.path.endswith(".pdf") and doc.path != skipped:
+            assert doc._content == fake_convert(doc.path)
+            assert doc.content == doc._content
+        else:
+            assert doc._content is None
+    assert not scraper.converter.calls
+
+    # Converted content is cached for the next cycle
+    def no_submit(*_):
+        raise AssertionError("Cached document converted again")
+
+    scraper._conversion_pool.submit = no_submit
+    cached = scraper.convert_documents(scraper.scrape().documents, needs_conversion)
+    for doc in cached:
+        if doc.path.endswith(".pdf") and doc.path != skipped:
+            assert doc._content == fake_convert(doc.path)
+
+
+def test_pool_warms_pending(mutable_data_dir):
+    """Test that converting a single document starts a single pool worker"""
+    (mutable_data_dir / "doc.pdf").write_bytes(b"%PDF-1.4 fake")
+    scraper = make_scraper(
+        roots=[str(mutable_data_dir)],
+        conversion_cache={"enabled": False},
+        conversion_pool={"workers": 3},
+    )
+    pool = ConversionPool(scraper._conversion_pool_config, fake_pool_converter)
+    scraper._conversion_pool = pool
+    docs = [doc for doc in scraper.scrape().documents if doc.path.endswith(".pdf")]
+    with mock.patch.object(
+        pool, "_start_worker", wraps=pool._start_worker
+    ) as start_worker, pool:
+        (doc,) = scraper.convert_documents(docs, lambda _: True)
+        assert doc.content == fake_convert(doc.path)
+        start_worker.assert_called_once()
+
+
+def test_converter_lazy(mutable_data_dir):
+    """Test that docling is not loaded by a cycle that converts nothing"""
+    (mutable_data_dir / "doc.pdf").write_bytes(b"%PDF-1.4 fake")
+    # NOTE: A None entry in sys.modules makes the import fail
+    with mock.patch.dict(sys.modules, {"docling.document_converter": None}):
+        scraper = make_scraper(roots=[str(mutable_data_dir)])
+        docs = scraper.scrape().documents
+        assert len(list(scraper.convert_documents(docs, lambda _: False))) == 4
+        assert not scraper._converters
+        assert not scraper._preloading
+
+
+def test_converter_preload(mutable_data_dir):
+    """Test that the converter is loaded in the background once a document
+    that needs it is found
+    """
+    pdf = mutable_data_dir / "doc.pdf"
+    pdf.write_bytes(b"%PDF-1.4 fake")
+    scraper = make_scraper(
+        roots=[str(mutable_data_dir)], conversion_pool={"enabled": False}
+    )
+    loaded = threading.Event()
+    load_threads = []
+
+    def load_converter(_):
+        load_threads.append(threading.current_thread())
+        loaded.set()
+        return FakeDocumentConverter()
+
+    scraper._load_converter = load_converter
+    docs = scraper.scrape().documents
+    list(scraper.convert_documents(docs, lambda doc: doc.path != str(pdf)))
+    assert not loaded.is_set()
+    list(scraper.convert_documents(docs, lambda _: True))
+    assert loaded.wait(5)
+    assert load_threads[0] is not threading.main_thread()
+
+    # Conversion uses the preloaded converter
+    (doc,) = (doc for doc in docs if doc.path == str(pdf))
+    assert doc.content == fake_convert(str(pdf))
+    assert len(load_threads) == 1
+
+
+def test_convert_profiles(mutable_data_dir):
+    """Test that documents are converted with the profile their rules select"""
+    fast = mutable_data_dir / "fast.pdf"
+    default = mutable_data_dir / "default.docx"
+    fast.write_bytes(b"%PDF-1.4 fake")
+    default.write_bytes(b"PK\x03\x04 fake")
+    scraper = make_scraper(
+        roots=[str(mutable_data_dir)],
+        conversion_cache={"enabled": False},
+        conversion_profiles={"rules": [{"profile": "fast", "extensions": ["pdf"]}]},
+    )
+    loaded = []
+
+    def load_converter(profile):
+        loaded.append(profile)
+        return FakeDocumentConverter()
+
+    scraper._load_converter = load_converter
+    docs = {doc.path: doc for doc in scraper.scrape().documents}
+    assert docs[str(fast)].content == fake_convert(str(fast))
+    assert loaded == ["fast"]
+    docs[str(default)].load()
+    assert loaded == ["fast", "accurate"]
+
+
+def test_format_converters(mutable_data_dir):
+    """Test that formats with a lightweight converter are converted without
+    loading docling, and that other formats still fall back to docling
+    """
+    (mutable_data_dir / "page.html").write_text("<h1>Title</h1><p>Some text</p>")
+    (mutable_data_dir / "table.csv").write_text("a,b\n1,2\n")
+    (mutable_data_dir / "empty.html").write_text("<script>x = 1</script>")
+    (mutable_data_dir / "doc.pdf").write_bytes(b"%PDF-1.4 fake")
+    scraper = make_scraper(
+        roots=[str(mutable_data_dir)],
+        conversion_cache={"enabled": False},
+        conversion_pool={"enabled": False},
+        preload_converter=False,
+    )
+    loaded = []
+
+    def load_converter(profile):
+        loaded.append(profile)
+        return FakeDocumentConverter()
+
+    scraper._load_converter = load_converter
+    docs = {
+        os.path.basename(doc.path): doc
+        for doc in scraper.convert_documents(scraper.scrape().documents, lambda _: True)
+    }
+    assert docs["page.html"].content == "# Title\n\nSome text\n"
+    assert docs["table.csv"].content == "| a | b |\n| --- | --- |\n| 1 | 2 |\n"
+    with pytest.raises(DocumentRejected):
+        docs["empty.html"].load()
+    assert not loaded
+    docs["doc.pdf"].load()
+    assert loaded == ["accurate"]
+
+
+def test_format_converter_plugin(mutable_data_dir):
+    """Test that converter plugins can be imported by class path and override
+    the converter for an extension
+    """
+    (mutable_data_dir / "page.html").write_text("<p>hi</p>")
+    scraper = make_scraper(
+        roots=[str(mutable_data_dir)],
+        conversion_cache={"enabled": False},
+        converters={
+            ".HTML": {
+                "type": UpperConverter.name,
+                "import_class": f"{UpperConverter.__module__}.UpperConverter",
+            }
+        },
+    )
+    (doc,) = (doc for doc in scraper.scrape().documents if doc.path.endswith("html"))
+    assert doc.content == "<P>HI</P>"
+
+
+def test_scrape_quoted_paths(mutable_data_dir, scratch_dir):
+    """Test that paths containing quotes can be scraped with sqlite storage"""
+    quoted_dir = mutable_data_dir / "John's docs"
+    quoted_dir.mkdir()
+    (quoted_dir / "it's.txt").write_text("text")
+    (quoted_dir / ".ragnardocignore").write_text("*.tmp\n")
+    storage = SqliteStorage(
+        aconfig.Config(
+            {"db_path": str(scratch_dir / "storage.db")}, override_env_vars=False
+        )
+    )
+    scraper = make_scraper(storage, roots=[str(mutable_data_dir)], cache_dirs=True)
+    assert str(quoted_dir / "it's.txt") in doc_paths(scraper.scrape().documents)
+    assert str(quoted_dir / "it's.txt") in doc_paths(scraper.scrape().documents)
+
+
+def test_convert_documents_streams(mutable_data_dir):
+    """Test that converted documents are handed on as they finish while the
+    pool still has free workers
+    """
+    pdf = mutable_data_dir / "doc.pdf"
+    pdf.write_bytes(b"%PDF-1.4 fake")
+    txts = [mutable_data_dir / f"doc{i}.txt" for i in range(10)]
+    for txt in txts:
+        txt.write_text("text")
+    scraper = make_scraper(
+        roots=[str(mutable_data_dir)],
+        conversion_cache={"enabled": False},
+        conversion_pool={"workers": 2},
+    )
+    scraper._conversion_pool = ConversionPool(
+        scraper._conversion_pool_config, fake_pool_converter
+    )
+    docs = {doc.path: doc for doc in scraper.scrape().documents}
+
+    def documents():
+        yield docs[str(pdf)]
+        for txt in txts:
+            time.sleep(0.4)
+            yield docs[str(txt)]
+
+    with scraper._conversion_pool:
+        ready = [doc.path for doc in scraper.convert_documents(documents(), bool)]
+    assert sorted(ready) == sorted(map(str, [pdf, *txts]))
+    assert ready.index(str(pdf)) < len(txts)
+
+
+def test_quarantine_failed_documents(mutable_data_dir):
+    """Test that documents that fail to load are skipped in later scrapes
+    until they change
+    """
+    bad_pdf = mutable_data_dir / "bad.pdf"
+    bad_pdf.write_bytes(b"%PDF-1.4 corrupt")
+    bad_txt = mutable_data_dir / "bad.txt"
+    bad_txt.write_bytes(b"a" * 10000 + b"\xff\xfe")
+    storage = DictStorage()
+    scraper = make_scraper(
+        storage,
+        roots=[str(mutable_data_dir)],
+        conversion_cache={"enabled": False},
+        conversion_pool={"enabled": False},
+        preload_converter=False,
+    )
+    converter = use_fake_converter(scraper)
+    converter.convert = mock.Mock(side_effect=RuntimeError("corrupt pdf"))
+    docs = {doc.path: doc for doc in scraper.scrape().documents}
+    for path, error in [(bad_pdf, RuntimeError), (bad_txt, UnicodeDecodeError)]:
+        with pytest.raises(error):
+            docs[str(path)].load()
+        # The failure is shared rather than retried by other readers
+        with pytest.raises(error):
+            docs[str(path)].load()
+    assert converter.convert.call_count == 1
+
+    # The quarantined documents are skipped, but not treated as removed
+    scraper = make_scraper(storage, roots=[str(mutable_data_dir)])
+    result = scraper.scrape()
+    assert str(bad_pdf) not in doc_paths(result.documents)
+    assert str(bad_txt) not in doc_paths(result.documents)
+    assert not result.removed
+
+    # Once fixed, the document is scraped again
+    bad_txt.write_text("fixed")
+    assert str(bad_txt) in doc_paths(scraper.scrape().documents)
+
+
+def test_quarantine_pool_failures(mutable_data_dir, scratch_dir):
+    """Test that documents that fail on the conversion pool are quarantined"""
+    (mutable_data_dir / "fail.pdf").write_bytes(b"%PDF-1.4 fake")
+    storage = DictStorage()
+    scraper = make_scraper(
+        storage,
+        roots=[str(mutable_data_dir)],
+        conversion_cache={"enabled": False},
+        conversion_pool={"workers": 1},
+    )
+    scraper._conversion_pool = ConversionPool(
+        scraper._conversion_pool_config, fake_pool_converter
+    )
+    with scraper._conversion_pool:
+        converted = list(
+            scraper.convert_documents(
+                [
+                    doc
+                    for doc in scraper.scrape().documents
+                    if doc.path.endswith("fail.pdf")
+                ],
+                lambda _: True,
+            )
+        )
+    assert not converted
+    scraper = make_scraper(storage, roots=[str(mutable_data_dir)])
+    assert not any(doc.path.endswith("fail.pdf") for doc in scraper.scrape().documents)
+
+
+def test_no_quarantine_converter_unavailable(mutable_data_dir, scratch_dir):
+    """Test that documents are not quarantined when the converter fails to
+    load or its worker exits
+    """
+    (mutable_data_dir / "doc.pdf").write_bytes(b"%PDF-1.4 fake")
+    (mutable_data_dir / "crash.pdf").write_bytes(b"%PDF-1.4 fake")
+    storage = DictStorage()
+    scraper = make_scraper(
+        storage,
+        roots=[str(mutable_data_dir)],
+        conversion_cache={"enabled": False},
+        conversion_pool={"enabled": False},
+        preload_converter=False,
+    )
+    scraper._load_converter = mock.Mock(side_effect=ModuleNotFoundError("docling"))
+    (doc,) = (doc for doc in scraper.scrape().documents if doc.path.endswith("doc.pdf"))
+    with pytest.raises(ConverterUnavailable):
+        doc.load()
+
+    scraper = make_scraper(
+        storage,
+        roots=[str(mutable_data_dir)],
+        conversion_cache={"enabled": False},
+        conversion_pool={"workers": 1},
+    )
+    scraper._conversion_pool = ConversionPool(
+        scraper._conversion_pool_config, crashing_pool_converter
+    )
+    with scraper._conversion_pool:
+        converted = list(
+            scraper.convert_documents(
+                [
+                    doc
+                    for doc in scraper.scrape().documents
+                    if doc.path.endswith("crash.pdf")
+                ],
+                lambda _: True,
+            )
+        )
+    assert not converted
+
+    scraper = make_scraper(storage, roots=[str(mutable_data_dir)])
+    paths = doc_paths(scraper.scrape().documents)
+    assert str(mutable_data_dir / "doc.pdf") in paths
+    assert str(mutable_data_dir / "crash.pdf") in paths
+
+
+def test_slow_lane(mutable_data_dir):
+    """Test that documents known to be slow are converted after the others
+    when the pool has no workers to spare
+    """
+    pdfs = [mutable_data_dir / f"doc{i}.pdf" for i in range(4)]
+    for pdf in pdfs:
+        pdf.write_bytes(b"%PDF-1.4 fake")
+    heavy = str(pdfs[0])
+    scraper = make_scraper(
+        roots=[str(mutable_data_dir)],
+        conversion_cache={"enabled": False},
+        conversion_pool={"workers": 1},
+    )
+    scraper._slow_lane.record(heavy, 3600, 10)
+    scraper._conversion_pool = ConversionPool(
+        scraper._conversion_pool_config, fake_pool_converter
+    )
+    docs = sorted(
+        [doc for doc in scraper.scrape().documents if doc.path.endswith(".pdf")],
+        key=lambda doc: doc.path,
+    )
+    with scraper._conversion_pool:
+        ready = list(scraper.convert_documents(docs, lambda _: True))
+    assert [doc.path for doc in ready] == [str(pdf) for pdf in pdfs[1:]] + [heavy]
+    assert ready[-1].content == fake_convert(heavy)
+
+    # The conversion time is recorded, so the document is no longer slow
+    assert not scraper._slow_lane.is_slow(ready[-1])
+
+
+def test_slow_lane_flushed_once(mutable_data_dir):
+    """Test that conversion times are persisted once all conversions are done
+    rather than after each one
+    """
+    pdfs = [mutable_data_dir / f"doc{i}.pdf" for i in range(3)]
+    for pdf in pdfs:
+        pdf.write_bytes(b"%PDF-1.4 fake")
+    storage = DictStorage()
+    scraper = make_scraper(
+        storage,
+        roots=[str(mutable_data_dir)],
+        conversion_cache={"enabled": False},
+        conversion_pool={"workers": 1},
+    )
+    scraper._conversion_pool = ConversionPool(
+        scraper._conversion_pool_config, fake_pool_converter
+    )
+    docs = [doc for doc in scraper.scrape().documents if doc.path.endswith(".pdf")]
+    with mock.patch.object(
+        scraper._slow_lane, "flush", wraps=scraper._slow_lane.flush
+    ) as flush:
+        with scraper._conversion_pool:
+            ready = list(scraper.convert_documents(docs, lambda _: True))
+        assert len(ready) == len(pdfs)
+        flush.assert_called_once()
+
+    # Without the pool, the times are persisted when the scraper is closed
+    storage = DictStorage()
+    scraper = make_scraper(
+        storage,
+        roots=[str(mutable_data_dir)],
+        conversion_cache={"enabled": False},
+        conversion_pool={"enabled": False},
+        preload_converter=False,
+    )
+    use_fake_converter(scraper)
+    namespace = storage.namespace(FileScraper.storage_namespace)
+    (doc,) = (doc for doc in scraper.scrape().documents if doc.path == str(pdfs[0]))
+    doc.load()
+    assert doc.path not in json.loads(namespace.get(SlowLane._records_key) or "{}")
+    scraper.close()
+    assert doc.path in json.loads(namespace.get(SlowLane._records_key))
+
+
+def test_slow_lane_spare_workers(mutable_data_dir):
+    """Test that slow documents only take pool workers that are spare and are
+    limited to the slow lane's concurrency
+    """
+    pdfs = [mutable_data_dir / f"doc{i}.pdf" for i in range(6)]
+    for pdf in pdfs:
+        pdf.write_bytes(b"%PDF-1.4 fake")
+    scraper = make_scraper(
+        roots=[str(mutable_data_dir)],
+        conversion_cache={"enabled": False},
+        conversion_pool={"workers": 3},
+        slow_lane={"workers": 1},
+    )
+    for pdf in pdfs[:3]:
+        scraper._slow_lane.record(str(pdf), 3600, 10)
+    pool = ConversionPool(scraper._conversion_pool_config, fake_pool_converter)
+    scraper._conversion_pool = pool
+    submitted = []
+    submit = pool.submit
+
+    def checked_submit(tag, *args):
+        submit(tag, *args)
+        submitted.append(tag)
+        assert scraper._slow_in_flight <= 1
+
+    pool.submit = checked_submit
+    docs = sorted(
+        [doc for doc in scraper.scrape().documents if doc.path.endswith(".pdf")],
+        key=lambda doc: doc.path,
+    )
+    with pool:
+        ready = list(scraper.convert_documents(docs, lambda _: True))
+    assert doc_paths(ready) == {str(pdf) for pdf in pdfs}
+    # The first slow document starts right away on a spare worker, and the
+    # rest wait for it rather than taking the workers of the fast documents
+    assert [(tag[0].path, tag[2]) for tag in submitted[:4]] == [
+        (str(pdfs[0]), True),
+        (str(pdfs[3]), False),
+        (str(pdfs[4]), False),
+        (str(pdfs[5]), False),
+    ]
+
+
+def test_slow_lane_without_pool(mutable_data_dir):
+    """Test that without the pool, slow documents are handed on last"""
+    pdfs = [mutable_data_dir / f"doc{i}.pdf" for i in range(3)]
+    for pdf in pdfs:
+        pdf.write_bytes(b"%PDF-1.4 fake")
+    scraper = make_scraper(
+        roots=[str(mutable_data_dir)],
+        conversion_cache={"enabled": False},
+        conversion_pool={"enabled": False},
+        preload_converter=False,
+    )
+    use_fake_converter(scraper)
+    scraper._slow_lane.record(str(pdfs[0]), 3600, 10)
+    docs = sorted(scraper.scrape().documents, key=lambda doc: doc.path)
+    ready = list(scraper.convert_documents(docs, lambda _: True))
+    assert ready[-1].path == str(pdfs[0])
+    assert doc_paths(ready) == doc_paths(docs)
+
+    # Converting records the time taken
+    ready[-1].load()
+    assert not scraper._slow_lane.is_slow(ready[-1])
@@ -0,0 +1,137 @@
+"""
+Unit tests for gitignore-style ignore files
+"""
+# Standard
+import os
+
+# Third Party
+import pytest
+
+# Local
+from ragnardoc import syscalls
+from ragnardoc.scraping.ignore import IgnoreRuleCache, IgnoreRules, is_ignored
+from ragnardoc.storage.dict_storage import DictStorage
+
+BASE = os.path.join(os.sep, "base")
+
+
+def _path(*parts: str) -> str:
+    return os.path.join(BASE, *parts)
+
+
+@pytest.mark.parametrize(
+    ["lines", "relpath", "is_dir", "ignored"],
+    [
+        # Basename patterns match at any depth
+        (["*.log"], "foo.log", False, True),
+        (["*.log"], "a/b/foo.log", False, True),
+        (["*.log"], "foo.txt", False, False),
+        # Stars don't cross directories
+        (["a*/b.txt"], "abc/b.txt", False, True),
+        (["a*/b.txt"], "a/x/b.txt", False, False),
+        # Patterns with slashes are anchored
+        (["/build"], "build", True, True),
+        (["/build"], "src/build", True, False),
+        (["docs/tmp"], "docs/tmp", True, True),
+        (["docs/tmp"], "x/docs/tmp", True, False),
+        # Directory-only patterns
+        (["cache/"], "cache", True, True),
+        (["cache/"], "cache", False, False),
+        (["cache/"], "a/cache", True, True),
+        # Double star forms
+        (["**/secret"], "a/b/secret", False, True),
+        (["**/secret"], "secret", False, True),
+        (["out/**"], "out/a/b.txt", False, True),
+        (["out/**"], "out", True, False),
+        (["a/**/z.txt"], "a/z.txt", False, True),
+        (["a/**/z.txt"], "a/b/c/z.txt", False, True),
+        # Character classes and single characters
+        (["file[0-9].txt"], "file3.txt", False, True),
+        (["file[!0-9].txt"], "file3.txt", False, False),
+        (["file?.txt"], "fileA.txt", False, True),
+        (["file?.txt"], "file/.txt", False, False),
+        # Negation with the last match winning
+        (["*.log", "!keep.log"], "keep.log", False, False),
+        (["!keep.log", "*.log"], "keep.log", False, True),
+        # Comments, escapes, and blanks
+        (["# comment", "", "   "], "# comment", False, False),
+        (["\\#notcomment"], "#notcomment", False, True),
+        (["\\!bang"], "!bang", False, True),
+    ],
+)
+def test_patterns(lines, relpath, is_dir, ignored):
+    """Test that gitignore-style patterns are interpreted correctly"""
+    rules = IgnoreRules.from_lines(BASE, lines)
+    assert is_ignored((rules,), _path(*relpath.split("/")), is_dir) == ignored
+
+
+def test_outside_base_not_matched():
+    """Test that rules don't apply outside of their directory"""
+    rules = IgnoreRules.from_lines(_path("sub"), ["*"])
+    assert rules.match(_path("other.txt"), False) is None
+    assert rules.match(_path("sub", "other.txt"), False) is True
+
+
+def test_deeper_rules_take_precedence():
+    """Test that rules in deeper ignore files override shallower ones"""
+    top = IgnoreRules.from_lines(BASE, ["*.pdf"])
+    nested = IgnoreRules.from_lines(_path("keep"), ["!*.pdf"])
+    stack = (top, nested)
+    assert is_ignored(stack, _path("foo.pdf"), False)
+    assert not is_ignored(stack, _path("keep", "foo.pdf"), False)
+    assert not is_ignored(stack, _path("keep", "foo.txt"), False)
+
+
+def test_rule_cache(scratch_dir):
+    """Test that compiled rules are cached until the file's mtime changes"""
+    ignore_path = str(scratch_dir / ".ragnardocignore")
+    with open(ignore_path, "w") as handle:
+        handle.write("*.log\n")
+    cache = IgnoreRuleCache()
+    rules1 = cache.get(ignore_path)
+    assert rules1 is cache.get(ignore_path)
+    assert rules1.match(str(scratch_dir / "a.log"), False)
+
+    # Update the file and make sure the mtime is different
+    with open(ignore_path, "w") as handle:
+        handle.write("*.txt\n")
+    stat = os.stat(ignore_path)
+    os.utime(ignore_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000))
+    rules2 = cache.get(ignore_path)
+    assert rules2 is not rules1
+    assert rules2.match(str(scratch_dir / "a.log"), False) is None
+    assert rules2.match(str(scratch_dir / "a.txt"), False)
+
+    # Missing files have no rules
+    os.remove(ignore_path)
+    assert cache.get(ignore_path) is None
+
+
+def test_rule_cache_storage(scratch_dir):
+    """Test that parsed rules are reused across cache instances (e.g. across
+    service cycles) until the file changes
+    """
+    ignore_path = str(scratch_dir / ".ragnardocignore")
+    with open(ignore_path, "w") as handle:
+        handle.write("*.log\n!keep.log\nbuild/\n")
+    storage = DictStorage().namespace("test")
+    rules1 = IgnoreRuleCache(storage).get(ignore_path)
+
+    # A new cache does not read the unchanged file again
+    syscalls.reset()
+    rules2 = IgnoreRuleCache(storage).get(ignore_path)
+    assert "open" not in syscalls.counts()
+    for relpath, is_dir in [("a.log", False), ("keep.log", False), ("build", True)]:
+        path = str(scratch_dir / relpath)
+        assert rules2.match(path, is_dir) == rules1.match(path, is_dir)
+
+    # Changed files are read again
+    with open(ignore_path, "w") as handle:
+        handle.write("*.txt\n")
+    rules3 = IgnoreRuleCache(storage).get(ignore_path)
+    assert rules3.match(str(scratch_dir / "a.log"), False) is None
+
+    # Missing files drop their stored rules
+    os.remove(ignore_path)
+    assert IgnoreRuleCache(storage).get(ignore_path) is None
+    assert storage.get(f"ignore_rules:{ignore_path}") is None
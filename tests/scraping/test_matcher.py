@@ -0,0 +1,81 @@
+"""
+Unit tests for the compiled include/exclude matcher
+"""
+# Third Party
+import pytest
+
+# Local
+from ragnardoc.scraping.matcher import PathMatcher
+
+
+def test_match_all_by_default():
+    """Test that with no rules, everything matches and nothing is pruned"""
+    matcher = PathMatcher()
+    assert matcher.matches("/foo/bar.txt")
+    assert not matcher.prune_dir("/foo")
+
+
+def test_include_regexprs():
+    """Test that multiple include expressions are combined correctly"""
+    matcher = PathMatcher(include_regexprs=[r".*\.md", r".*\.txt"])
+    assert matcher.matches("/foo/bar.txt")
+    assert matcher.matches("/foo/bar.md")
+    assert not matcher.matches("/foo/bar.pdf")
+
+
+def test_include_paths():
+    """Test that exact include paths match even if no expressions match"""
+    matcher = PathMatcher(include_paths=["/foo/bar.pdf"], include_regexprs=[r".*\.md"])
+    assert matcher.matches("/foo/bar.pdf")
+    assert not matcher.matches("/foo/baz.pdf")
+
+
+def test_exclude_wins():
+    """Test that exclusions take precedence over inclusions"""
+    matcher = PathMatcher(
+        include_paths=["/foo/bar.md"],
+        include_regexprs=[r".*\.md"],
+        exclude_paths=["/foo/bar.md"],
+        exclude_regexprs=[r".*/secret/.*"],
+    )
+    assert not matcher.matches("/foo/bar.md")
+    assert not matcher.matches("/foo/secret/baz.md")
+    assert matcher.matches("/foo/baz.md")
+
+
+@pytest.mark.parametrize(
+    ["exclude_regexprs", "exclude_paths", "dirpath", "pruned"],
+    [
+        ([r".*/node_modules/"], [], "/src/node_modules", True),
+        ([r".*/node_modules/"], [], "/src/node_modules_extra", False),
+        ([r".*/\.git/.*", r".*\.log"], [], "/src/.git", True),
+        ([r".*\.log$"], [], "/src/foo.log", False),
+        ([r".*/build(?!/keep)"], [], "/src/build", False),
+        ([], ["/src/vendor"], "/src/vendor", True),
+        ([], ["/src/vendor/"], "/src/vendor", True),
+        ([], ["/src/vendor"], "/src/vendored", False),
+    ],
+)
+def test_prune_dir(exclude_regexprs, exclude_paths, dirpath, pruned):
+    """Test that directories are only pruned when everything beneath them is
+    guaranteed to be excluded
+    """
+    matcher = PathMatcher(
+        exclude_paths=exclude_paths, exclude_regexprs=exclude_regexprs
+    )
+    assert matcher.prune_dir(dirpath) == pruned
+    if pruned and exclude_regexprs:
+        assert not matcher.matches(f"{dirpath}/some/file.txt")
+
+
+def test_uncombinable_expressions():
+    """Test that expressions which can't be combined into a single alternation
+    are still matched correctly
+    """
+    matcher = PathMatcher(
+        include_regexprs=[r"(?P<x>.*)\.md", r"(?P<x>.*)\.txt", r"(.)\1.*"]
+    )
+    assert matcher.matches("foo.md")
+    assert matcher.matches("foo.txt")
+    assert matcher.matches("aab.pdf")
+    assert not matcher.matches("ab.pdf")
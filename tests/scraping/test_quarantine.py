@@ -0,0 +1,89 @@
+"""
+Unit tests for the quarantine of documents that fail to load
+"""
+# Standard
+from unittest import mock
+
+# First Party
+import aconfig
+
+# Local
+from ragnardoc.scraping.quarantine import Quarantine
+from ragnardoc.storage.dict_storage import DictStorage
+
+## Helpers #####################################################################
+
+HOUR = 3600
+
+
+def make_quarantine(storage=None, **overrides) -> Quarantine:
+    config = {"enabled": True, "initial_backoff_hours": 1, "max_backoff_hours": 3}
+    config.update(overrides)
+    return Quarantine(
+        storage or DictStorage().namespace("test"),
+        aconfig.Config(config, override_env_vars=False),
+    )
+
+
+## Tests #######################################################################
+
+
+def test_quarantine_until_retry():
+    """Test that failed documents are held until their retry time and that
+    the backoff doubles up to the maximum with each failure
+    """
+    quarantine = make_quarantine()
+    with mock.patch("time.time", return_value=0):
+        assert not quarantine.holds("a.pdf", "fp1")
+        quarantine.add("a.pdf", "fp1", ValueError("bad pdf\ntraceback"))
+        assert quarantine.holds("a.pdf", "fp1")
+        record = quarantine.records()["a.pdf"]
+        assert record["error"] == "ValueError"
+        assert record["message"] == "bad pdf"
+        assert record["retry_at"] == HOUR
+    with mock.patch("time.time", return_value=HOUR):
+        assert not quarantine.holds("a.pdf", "fp1")
+        quarantine.add("a.pdf", "fp1", ValueError("bad pdf"))
+    assert quarantine.records()["a.pdf"]["failures"] == 2
+    assert quarantine.records()["a.pdf"]["retry_at"] == 3 * HOUR
+    with mock.patch("time.time", return_value=3 * HOUR):
+        quarantine.add("a.pdf", "fp1", ValueError("bad pdf"))
+    assert quarantine.records()["a.pdf"]["retry_at"] == 6 * HOUR
+
+
+def test_quarantine_changed():
+    """Test that documents are released once they change"""
+    quarantine = make_quarantine()
+    quarantine.add("a.pdf", "fp1", ValueError("bad pdf"))
+    assert quarantine.holds("a.pdf", "fp1")
+    assert not quarantine.holds("a.pdf", "fp2")
+    assert quarantine.records() == {}
+
+    # A failure of the new version starts the backoff over
+    quarantine.add("a.pdf", "fp1", ValueError("bad pdf"))
+    quarantine.add("a.pdf", "fp2", ValueError("bad pdf"))
+    assert quarantine.records()["a.pdf"]["failures"] == 1
+
+
+def test_quarantine_persisted():
+    """Test that records persist in storage and can be released"""
+    storage = DictStorage().namespace("test")
+    quarantine = make_quarantine(storage)
+    quarantine.add("a.pdf", "fp1", ValueError("bad pdf"))
+    quarantine.add("b.txt", "fp1", UnicodeDecodeError("utf-8", b"\xff", 0, 1, "bad"))
+    reloaded = make_quarantine(storage)
+    assert reloaded.holds("a.pdf", "fp1")
+    assert reloaded.records()["b.txt"]["error"] == "UnicodeDecodeError"
+
+    reloaded.release("a.pdf")
+    reloaded.retain({"a.pdf"})
+    reloaded.flush()
+    assert make_quarantine(storage).records() == {}
+
+
+def test_quarantine_disabled():
+    """Test that nothing is held when the quarantine is disabled"""
+    quarantine = make_quarantine(enabled=False)
+    quarantine.add("a.pdf", "fp1", ValueError("bad pdf"))
+    assert not quarantine.holds("a.pdf", "fp1")
+    assert quarantine.records() == {}
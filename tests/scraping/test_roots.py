@@ -0,0 +1,72 @@
+"""
+Unit tests for root set planning
+"""
+# Standard
+import os
+
+# Local
+from ragnardoc.scraping.roots import file_id, plan_roots
+
+
+def test_plan_roots_nested(scratch_dir):
+    """Test that roots nested inside other roots are dropped regardless of
+    order
+    """
+    outer = scratch_dir / "outer"
+    inner = outer / "inner"
+    other = scratch_dir / "other"
+    inner.mkdir(parents=True)
+    other.mkdir()
+    assert plan_roots([str(inner), str(outer), str(other)]) == [
+        str(outer),
+        str(other),
+    ]
+
+
+def test_plan_roots_sibling_prefix(scratch_dir):
+    """Test that roots sharing a string prefix are not considered nested"""
+    (scratch_dir / "docs").mkdir()
+    (scratch_dir / "docs2").mkdir()
+    roots = [str(scratch_dir / "docs"), str(scratch_dir / "docs2")]
+    assert plan_roots(roots) == roots
+
+
+def test_plan_roots_duplicates(scratch_dir):
+    """Test that the same directory configured twice, including through a
+    symlink or with a trailing slash, is only kept once
+    """
+    real = scratch_dir / "real"
+    real.mkdir()
+    link = scratch_dir / "link"
+    link.symlink_to(real)
+    assert plan_roots([str(real), str(link), str(real) + os.sep]) == [str(real)]
+    assert plan_roots([str(link), str(real)]) == [str(link)]
+
+
+def test_plan_roots_symlink_nested(scratch_dir):
+    """Test that a root that is nested in another root through a symlink is
+    dropped
+    """
+    real = scratch_dir / "real"
+    (real / "sub").mkdir(parents=True)
+    link = scratch_dir / "link"
+    link.symlink_to(real / "sub")
+    assert plan_roots([str(link), str(real)]) == [str(real)]
+
+
+def test_plan_roots_missing(scratch_dir):
+    """Test that missing roots are kept so that they're picked up if created"""
+    missing = str(scratch_dir / "missing")
+    assert plan_roots([missing, missing]) == [missing]
+
+
+def test_plan_roots_expanduser():
+    """Test that user directories are expanded"""
+    assert plan_roots(["~"]) == [os.path.expanduser("~")]
+
+
+def test_file_id(txt_data_file):
+    """Test that the file identity comes from the device and inode"""
+    stat = os.stat(txt_data_file)
+    assert file_id(stat) == (stat.st_dev, stat.st_ino)
+    assert file_id(None) is None
@@ -0,0 +1,81 @@
+"""
+Unit tests for tracking documents that are slow to convert
+"""
+# First Party
+import aconfig
+
+# Local
+from ragnardoc.scraping.slow_lane import SlowLane
+from ragnardoc.storage.dict_storage import DictStorage
+from ragnardoc.types import Document
+
+## Helpers #####################################################################
+
+
+def make_lane(storage=None, **overrides) -> SlowLane:
+    config = {
+        "enabled": True,
+        "time_budget_seconds": 10,
+        "size_budget_mb": 0.001,
+        "workers": 1,
+    }
+    config.update(overrides)
+    return SlowLane(
+        storage or DictStorage().namespace("test"),
+        aconfig.Config(config, override_env_vars=False),
+    )
+
+
+## Tests #######################################################################
+
+
+def test_slow_by_time(scratch_dir):
+    """Test that documents whose last conversion went over the time budget are
+    slow until a conversion comes in under it
+    """
+    path = scratch_dir / "doc.pdf"
+    path.write_bytes(b"small")
+    doc = Document.from_file(path, scratch_dir)
+    lane = make_lane()
+    assert not lane.is_slow(doc)
+    lane.record(doc.path, 10, 5)
+    assert not lane.is_slow(doc)
+    lane.record(doc.path, 30, 5)
+    assert lane.is_slow(doc)
+    lane.record(doc.path, 1, 5)
+    assert not lane.is_slow(doc)
+
+
+def test_slow_by_size(scratch_dir):
+    """Test that documents over the size budget are slow before they are ever
+    converted
+    """
+    path = scratch_dir / "doc.pdf"
+    path.write_bytes(b"x" * 2048)
+    assert make_lane().is_slow(Document.from_file(path, scratch_dir))
+    assert not make_lane(size_budget_mb=0).is_slow(Document.from_file(path, "/"))
+
+
+def test_records_persisted(scratch_dir):
+    """Test that conversion times persist in storage and are dropped for
+    documents that are gone
+    """
+    storage = DictStorage().namespace("test")
+    lane = make_lane(storage, size_budget_mb=0)
+    lane.record("/docs/a.pdf", 30, 5)
+    lane.record("/docs/b.pdf", 30, 5)
+    assert not make_lane(storage).is_slow(Document("/docs/a.pdf", "/docs"))
+    lane.flush()
+    assert make_lane(storage).is_slow(Document("/docs/a.pdf", "/docs"))
+    lane.retain({"/docs/b.pdf"})
+    lane.flush()
+    reloaded = make_lane(storage)
+    assert not reloaded.is_slow(Document("/docs/a.pdf", "/docs"))
+    assert reloaded.is_slow(Document("/docs/b.pdf", "/docs"))
+
+
+def test_disabled():
+    """Test that nothing is slow when the slow lane is disabled"""
+    lane = make_lane(enabled=False)
+    lane.record("/docs/a.pdf", 30, 5)
+    assert not lane.is_slow(Document("/docs/a.pdf", "/docs"))
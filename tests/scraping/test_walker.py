@@ -0,0 +1,211 @@
+"""
+Unit tests for the directory walker
+"""
+# Standard
+from unittest import mock
+import json
+import os
+
+# Third Party
+import pytest
+
+# Local
+from ragnardoc import syscalls
+from ragnardoc.scraping.walker import DirectoryWalker
+from ragnardoc.storage.dict_storage import DictStorage
+
+
+def _all_files(walker: DirectoryWalker, root: str) -> set[str]:
+    return {
+        os.path.join(listing.parent, fname)
+        for listing in walker.walk(root)
+        for fname in listing.filenames
+    }
+
+
+def _expected_files(root: str) -> set[str]:
+    return {
+        os.path.join(parent, fname)
+        for parent, _, files in os.walk(root)
+        for fname in files
+    }
+
+
+@pytest.mark.parametrize("workers", [1, 4])
+def test_walk_matches_os_walk(data_dir, workers):
+    """Test that the walker finds the same files as os.walk"""
+    walker = DirectoryWalker(DictStorage().namespace("test"), workers=workers)
+    assert _all_files(walker, str(data_dir)) == _expected_files(str(data_dir))
+
+
+@pytest.mark.parametrize("workers", [1, 4])
+def test_walk_deep_tree(scratch_dir, workers):
+    """Test that a deeper and wider tree is walked fully in parallel"""
+    for i in range(5):
+        parent = scratch_dir
+        for depth in range(4):
+            parent = parent / f"d{i}_{depth}"
+            parent.mkdir()
+            (parent / "doc.txt").write_text(f"{i}/{depth}")
+    walker = DirectoryWalker(DictStorage().namespace("test"), workers=workers)
+    found = _all_files(walker, str(scratch_dir))
+    assert len(found) == 20
+    assert found == _expected_files(str(scratch_dir))
+
+
+@pytest.mark.parametrize("use_cache", [True, False])
+def test_walk_prefetches_stats(mutable_data_dir, use_cache):
+    """Test that the file stats are collected while walking, including for
+    directories whose listings come from the cache
+    """
+    walker = DirectoryWalker(DictStorage().namespace("test"), use_cache=use_cache)
+    for _ in range(2):
+        for listing in walker.walk(str(mutable_data_dir)):
+            assert set(listing.stats) == set(listing.filenames)
+            for fname, stat in listing.stats.items():
+                expected = os.stat(os.path.join(listing.parent, fname))
+                assert stat.st_size == expected.st_size
+                assert stat.st_mtime_ns == expected.st_mtime_ns
+
+
+@pytest.mark.parametrize("workers", [1, 4])
+def test_walk_pruning(data_dir, workers):
+    """Test that the walk can be pruned by modifying dirnames in place"""
+    walker = DirectoryWalker(DictStorage().namespace("test"), workers=workers)
+    parents = []
+    for listing in walker.walk(str(data_dir)):
+        parents.append(listing.parent)
+        listing.dirnames[:] = [name for name in listing.dirnames if name != "nested"]
+    assert os.path.join(str(data_dir), "sample_docs", "nested") not in parents
+    assert os.path.join(str(data_dir), "sample_docs") in parents
+
+
+@pytest.mark.parametrize("workers", [1, 4])
+def test_walk_reuses_unchanged_listings(mutable_data_dir, workers):
+    """Test that unchanged directories are not listed again on a second walk"""
+    root = str(mutable_data_dir)
+    walker = DirectoryWalker(DictStorage().namespace("test"), workers=workers)
+    first = _all_files(walker, root)
+    with mock.patch.object(
+        DirectoryWalker, "_list_dir", side_effect=DirectoryWalker._list_dir
+    ) as list_mock:
+        second = _all_files(walker, root)
+        list_mock.assert_not_called()
+    assert first == second
+
+
+def test_walk_relists_changed_directories(mutable_data_dir):
+    """Test that adding and removing files is picked up on subsequent walks"""
+    root = str(mutable_data_dir)
+    walker = DirectoryWalker(DictStorage().namespace("test"))
+    _all_files(walker, root)
+
+    # Add a new file in a nested directory and remove an existing one
+    new_file = mutable_data_dir / "sample_docs" / "nested" / "new.txt"
+    new_file.write_text("new!")
+    removed_file = mutable_data_dir / "sample.txt"
+    removed_file.unlink()
+
+    with mock.patch.object(
+        DirectoryWalker, "_list_dir", side_effect=DirectoryWalker._list_dir
+    ) as list_mock:
+        found = _all_files(walker, root)
+        assert {call.args[0] for call in list_mock.call_args_list} == {
+            root,
+            os.path.join(root, "sample_docs", "nested"),
+        }
+    assert str(new_file) in found
+    assert str(removed_file) not in found
+    assert found == _expected_files(root)
+
+
+def test_walk_unchanged_saves_listing(mutable_data_dir):
+    """Test that unchanged directories are not read again, while the files
+    they hold are still stat'ed
+    """
+    root = str(mutable_data_dir)
+    walker = DirectoryWalker(DictStorage().namespace("test"))
+    _all_files(walker, root)
+    syscalls.reset()
+    found = _all_files(walker, root)
+    counts = syscalls.counts()
+    assert "scandir" not in counts
+    assert counts["stat"] == sum(1 for _ in os.walk(root)) + len(found)
+
+
+def test_walk_same_tick_change(scratch_dir):
+    """Test that a directory modified within an mtime tick of being listed is
+    listed again, even if its metadata did not change
+    """
+    fresh = scratch_dir / "fresh"
+    fresh.mkdir()
+    (fresh / "first.txt").write_text("first")
+    storage = DictStorage().namespace("test")
+    walker = DirectoryWalker(storage)
+    assert _all_files(walker, str(fresh)) == {str(fresh / "first.txt")}
+
+    # Add a file in the same tick, so the cached metadata still matches
+    (fresh / "second.txt").write_text("second")
+    stat = os.stat(fresh)
+    entry = json.loads(storage.get(f"dir_cache:{fresh}"))
+    entry[:2] = [stat.st_mtime_ns, stat.st_ctime_ns]
+    storage.set(f"dir_cache:{fresh}", json.dumps(entry))
+    assert len(_all_files(walker, str(fresh))) == 2
+
+    # Listings taken well after the last change are reused
+    (fresh / "third.txt").write_text("third")
+    stat = os.stat(fresh)
+    entry = json.loads(storage.get(f"dir_cache:{fresh}"))
+    entry[:3] = [stat.st_mtime_ns, stat.st_ctime_ns, stat.st_mtime_ns + 10**10]
+    storage.set(f"dir_cache:{fresh}", json.dumps(entry))
+    assert len(_all_files(walker, str(fresh))) == 2
+
+
+def test_walk_per_directory_cache(mutable_data_dir):
+    """Test that listings are cached per directory and that the listings of
+    removed directories are dropped
+    """
+    root = str(mutable_data_dir)
+    storage = DictStorage().namespace("test")
+    walker = DirectoryWalker(storage)
+    _all_files(walker, root)
+    nested = mutable_data_dir / "sample_docs" / "nested"
+    assert storage.get(f"dir_cache:{root}") is not None
+    assert storage.get(f"dir_cache:{nested}") is not None
+
+    # Only the changed directory's listing is written
+    (mutable_data_dir / "new.txt").write_text("new")
+    with mock.patch.object(storage, "set", wraps=storage.set) as set_mock:
+        _all_files(walker, root)
+    assert [call.args[0] for call in set_mock.call_args_list] == [f"dir_cache:{root}"]
+
+    # Removing a directory drops its listing
+    for path in nested.iterdir():
+        path.unlink()
+    nested.rmdir()
+    _all_files(walker, root)
+    assert storage.get(f"dir_cache:{nested}") is None
+
+
+def test_walk_no_cache(mutable_data_dir):
+    """Test that with caching disabled, every directory is listed every time"""
+    root = str(mutable_data_dir)
+    storage = DictStorage().namespace("test")
+    walker = DirectoryWalker(storage, use_cache=False)
+    _all_files(walker, root)
+    with mock.patch.object(
+        DirectoryWalker, "_list_dir", side_effect=DirectoryWalker._list_dir
+    ) as list_mock:
+        _all_files(walker, root)
+        assert list_mock.call_count == 3
+    assert storage.get(f"dir_cache:{root}") is None
+
+
+def test_walk_does_not_follow_symlinked_dirs(scratch_dir):
+    """Test that symlinked directories are not descended into"""
+    real_dir = scratch_dir / "real"
+    real_dir.mkdir()
+    (real_dir / "doc.txt").write_text("hi")
+    (scratch_dir / "link").symlink_to(real_dir, target_is_directory=True)
+    walker = DirectoryWalker(DictStorage().namespace("test"))
+    assert _all_files(walker, str(scratch_dir)) == {str(real_dir / "doc.txt")}
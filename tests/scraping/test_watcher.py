@@ -0,0 +1,108 @@
+"""
+Unit tests for the inotify watcher
+"""
+# Standard
+import sys
+
+# Third Party
+import pytest
+
+# Local
+from ragnardoc.scraping.watcher import InotifyWatcher
+
+pytestmark = pytest.mark.skipif(
+    not sys.platform.startswith("linux"), reason="inotify is only available on Linux"
+)
+
+
+def _read_until(watcher: InotifyWatcher, expected: set[str]) -> set[str]:
+    """Read changes until all expected paths are seen or a timeout is hit"""
+    changed = set()
+    for _ in range(10):
+        changed.update(watcher.read_changes(0.1))
+        if expected <= changed:
+            break
+    return changed
+
+
+def test_file_changes(scratch_dir):
+    """Test that creating, modifying, and deleting files are all seen"""
+    with InotifyWatcher() as watcher:
+        watcher.add_tree(str(scratch_dir))
+        new_file = scratch_dir / "doc.txt"
+        new_file.write_text("hello")
+        assert str(new_file) in _read_until(watcher, {str(new_file)})
+        new_file.write_text("world")
+        assert str(new_file) in _read_until(watcher, {str(new_file)})
+        new_file.unlink()
+        assert str(new_file) in _read_until(watcher, {str(new_file)})
+
+
+def test_no_changes(scratch_dir):
+    """Test that an empty set is returned when nothing changes"""
+    with InotifyWatcher() as watcher:
+        watcher.add_tree(str(scratch_dir))
+        assert watcher.read_changes(0.01) == set()
+
+
+def test_nested_and_new_dirs(scratch_dir):
+    """Test that nested directories are watched and that the contents of newly
+    created directories are reported
+    """
+    nested = scratch_dir / "a" / "b"
+    nested.mkdir(parents=True)
+    with InotifyWatcher() as watcher:
+        watcher.add_tree(str(scratch_dir))
+        assert watcher.num_watches == 3
+
+        nested_file = nested / "doc.txt"
+        nested_file.write_text("hello")
+        assert str(nested_file) in _read_until(watcher, {str(nested_file)})
+
+        # Create a new directory and a file in it. Once the new directory is
+        # watched, changes inside of it are seen.
+        new_dir = scratch_dir / "c"
+        new_dir.mkdir()
+        assert str(new_dir) in _read_until(watcher, {str(new_dir)})
+        assert watcher.num_watches == 4
+        new_file = new_dir / "doc.txt"
+        new_file.write_text("hi")
+        assert str(new_file) in _read_until(watcher, {str(new_file)})
+
+
+def test_moved_in_dir(scratch_dir):
+    """Test that files in a directory moved into a watched tree are reported"""
+    watched = scratch_dir / "watched"
+    watched.mkdir()
+    outside = scratch_dir / "outside"
+    (outside / "sub").mkdir(parents=True)
+    (outside / "sub" / "doc.txt").write_text("hello")
+    with InotifyWatcher() as watcher:
+        watcher.add_tree(str(watched))
+        (outside).rename(watched / "moved")
+        expected = str(watched / "moved" / "sub" / "doc.txt")
+        assert expected in _read_until(watcher, {expected})
+
+
+def test_pruned_dirs(scratch_dir):
+    """Test that pruned directories are not watched"""
+    (scratch_dir / "node_modules" / "pkg").mkdir(parents=True)
+    (scratch_dir / "src").mkdir()
+    with InotifyWatcher(
+        prune_dir=lambda path: path.endswith("node_modules")
+    ) as watcher:
+        watcher.add_tree(str(scratch_dir))
+        assert watcher.num_watches == 2
+        ignored = scratch_dir / "node_modules" / "pkg" / "index.js"
+        ignored.write_text("ignored")
+        assert str(ignored) not in _read_until(watcher, {str(ignored)})
+
+
+def test_watch_file(scratch_dir):
+    """Test that individual files can be watched"""
+    doc = scratch_dir / "doc.txt"
+    doc.write_text("hello")
+    with InotifyWatcher() as watcher:
+        watcher.add_file(str(doc))
+        doc.write_text("world")
+        assert str(doc) in _read_until(watcher, {str(doc)})
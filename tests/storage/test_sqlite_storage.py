@@ -2,6 +2,7 @@
 Unit tests for dict-based storage
 """
 # Standard
+from concurrent.futures import ThreadPoolExecutor
 from unittest import mock
 
 # Third Party
@@ -35,6 +36,20 @@ def test_namespace_get_set_pop(scratch_dir):
     assert ns.get("key1") is None
 
 
+def test_quoted_keys(scratch_dir):
+    """Test that keys containing quotes are stored and found"""
+    inst = storage_factory.construct(
+        {"type": "sqlite", "config": {"db_path": str(scratch_dir / "storage.db")}}
+    )
+    ns = inst.namespace("test")
+    key = "dir_cache:/home/john/John's docs"
+    assert ns.get(key) is None
+    ns.set(key, "value")
+    assert ns.get(key) == "value"
+    assert ns.pop(key) == "value"
+    assert ns.get(key) is None
+
+
 def test_multi_namespace(scratch_dir):
     """Test that multiple namespaces can be managed independently"""
     inst = storage_factory.construct(
@@ -88,3 +103,26 @@ def test_config_defaults(scratch_dir):
     with mock.patch.object(config, "ragnardoc_home", scratch_dir):
         inst = storage_factory.construct({"type": "sqlite"})
         assert inst._db_path == str(scratch_dir / "storage.db")
+
+
+def test_concurrent_namespaces(scratch_dir):
+    """Test that namespaces can be used from several threads at once, as the
+    ingestion pipeline does
+    """
+    inst = storage_factory.construct(
+        {"type": "sqlite", "config": {"db_path": str(scratch_dir / "storage.db")}}
+    )
+    namespaces = [inst.namespace(f"ns{i}") for i in range(4)]
+
+    def work(ns):
+        for i in range(200):
+            ns.set(f"key{i}", i)
+            assert ns.get(f"key{i}") == i
+            if i % 2:
+                assert ns.pop(f"key{i}") == i
+
+    with ThreadPoolExecutor(len(namespaces)) as pool:
+        list(pool.map(work, namespaces))
+    for ns in namespaces:
+        assert ns.get("key0") == 0
+        assert ns.get("key1") is None
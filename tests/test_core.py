@@ -0,0 +1,169 @@
+"""
+Unit tests for the core ingestion cycle
+"""
+# Standard
+import json
+import os
+
+# Third Party
+import pytest
+
+# First Party
+import aconfig
+
+# Local
+from ragnardoc import config, syscalls
+from ragnardoc.config.merge import merge_configs
+from ragnardoc.conversion import ConversionPool
+from ragnardoc.core import RagnardocCore
+from ragnardoc.ingestors import ingestor_factory
+from ragnardoc.ingestors.base import Ingestor
+from tests.conftest import fake_convert, fake_pool_converter
+
+## Helpers #####################################################################
+
+
+class RecordingIngestor(Ingestor):
+    """Ingestor that records the calls made to it"""
+
+    name = "recording"
+    config_schema = {"type": "object"}
+    instances = []
+
+    def __init__(self, *_, **__):
+        self.ingested = []
+        self.deleted = []
+        self.converted = {}
+        self.instances.append(self)
+
+    def ingest(self, documents):
+        self.ingested.append([doc.path for doc in documents if doc.fingerprint()])
+        self.converted.update(
+            (doc.path, doc._content) for doc in documents if doc._content is not None
+        )
+
+    def delete(self, documents):
+        self.deleted.extend(doc.path for doc in documents)
+
+
+ingestor_factory.register(RecordingIngestor)
+
+
+@pytest.fixture
+def recording_ingestors():
+    RecordingIngestor.instances.clear()
+    yield RecordingIngestor.instances
+    RecordingIngestor.instances.clear()
+
+
+def make_core(**overrides) -> RagnardocCore:
+    # NOTE: Round trip through json to get a mutable copy of the nested config
+    base_config = json.loads(json.dumps(config.config_instance))
+    base_config["storage"] = {"type": "dict"}
+    base_config["ingestion"]["plugins"] = [{"type": "recording"}]
+    return RagnardocCore(
+        aconfig.Config(merge_configs(base_config, overrides), override_env_vars=False)
+    )
+
+
+## Tests #######################################################################
+
+
+def test_ingest_batches(mutable_data_dir, recording_ingestors):
+    """Test that documents are ingested in batches of the configured size"""
+    core = make_core(
+        scraping={"roots": [str(mutable_data_dir)]},
+        ingestion={"batch_size": 2},
+    )
+    core.ingest()
+    assert len(recording_ingestors) == 1
+    batches = recording_ingestors[0].ingested
+    assert [len(batch) for batch in batches] == [2, 1]
+    assert not recording_ingestors[0].deleted
+
+
+def test_ingest_deletes(mutable_data_dir, recording_ingestors):
+    """Test that removed documents are deleted after ingestion"""
+    core = make_core(scraping={"roots": [str(mutable_data_dir)]})
+    core.ingest()
+    removed = mutable_data_dir / "sample.txt"
+    removed.unlink()
+    core.ingest()
+    assert recording_ingestors[0].deleted == [str(removed)]
+
+
+def test_ingest_paths(mutable_data_dir, recording_ingestors):
+    """Test that a cycle can be limited to individual paths"""
+    core = make_core(scraping={"roots": [str(mutable_data_dir)]})
+    changed = str(mutable_data_dir / "sample.txt")
+    core.ingest(paths=[changed])
+    assert recording_ingestors[0].ingested == [[changed]]
+
+
+def test_ingest_pinned_first(mutable_data_dir, recording_ingestors):
+    """Test that the scheduler orders documents before they are batched"""
+    pinned = str(mutable_data_dir / "sample_docs" / "nested")
+    core = make_core(
+        scraping={"roots": [str(mutable_data_dir)]},
+        ingestion={"batch_size": 1, "scheduling": {"pinned": [pinned]}},
+    )
+    core.ingest()
+    assert recording_ingestors[0].ingested[0] == [os.path.join(pinned, "sample.txt")]
+
+
+def test_ingest_stats_once(mutable_data_dir, recording_ingestors):
+    """Test that each file is only stat'ed once per cycle with multiple
+    ingestors fingerprinting every document
+    """
+    core = make_core(
+        scraping={"roots": [str(mutable_data_dir)], "cache_dirs": False},
+        ingestion={"plugins": [{"type": "recording"}, {"type": "recording"}]},
+    )
+    core.ingest()
+    num_dirs = sum(1 for _ in os.walk(mutable_data_dir))
+    num_files = sum(len(files) for _, _, files in os.walk(mutable_data_dir))
+    assert syscalls.counts()["stat"] == num_dirs + num_files
+    assert len(recording_ingestors) == 2
+    assert all(len(ingestor.ingested[0]) == 3 for ingestor in recording_ingestors)
+
+
+def test_ingest_converts_needed(mutable_data_dir, recording_ingestors, monkeypatch):
+    """Test that documents an ingestor needs are converted ahead of ingestion
+    and that documents no ingestor needs are not converted at all
+    """
+    needed = mutable_data_dir / "needed.pdf"
+    unneeded = mutable_data_dir / "unneeded.pdf"
+    for path in [needed, unneeded]:
+        path.write_bytes(b"%PDF-1.4 fake")
+    monkeypatch.setattr(
+        RecordingIngestor,
+        "needs_ingest",
+        lambda _, doc: doc.path != str(unneeded),
+        raising=False,
+    )
+    core = make_core(
+        scraping={
+            "roots": [str(mutable_data_dir)],
+            "conversion_cache": {"enabled": False},
+            "conversion_pool": {"workers": 1},
+        },
+    )
+    pool = ConversionPool(core.scraper._conversion_pool_config, fake_pool_converter)
+    core.scraper._conversion_pool = pool
+    core.ingest()
+
+    # The pool's workers are stopped at the end of the cycle
+    assert core.scraper._conversion_pool is None
+    assert not pool.in_flight and not pool._idle
+    (ingestor,) = recording_ingestors
+    assert ingestor.converted == {str(needed): fake_convert(str(needed))}
+    assert str(unneeded) in sum(ingestor.ingested, [])
+
+
+def test_export_formats(mutable_data_dir, recording_ingestors, monkeypatch):
+    """Test that the scraper exports the formats of all ingestors"""
+    core = make_core(scraping={"roots": [str(mutable_data_dir)]})
+    assert core.scraper.export_formats == ["markdown"]
+    monkeypatch.setattr(RecordingIngestor, "export_format", "text")
+    core = make_core(scraping={"roots": [str(mutable_data_dir)]})
+    assert core.scraper.export_formats == ["markdown", "text"]
@@ -0,0 +1,141 @@
+"""
+Unit tests for the staged ingestion pipeline
+"""
+# Standard
+import threading
+import time
+
+# Third Party
+import pytest
+
+# Local
+from ragnardoc.ingestors.base import Ingestor
+from ragnardoc.pipeline import IngestionPipeline
+from ragnardoc.types import Document
+
+## Helpers #####################################################################
+
+
+class ContentIngestor(Ingestor):
+    """Ingestor that records the content of the documents it is given"""
+
+    name = "content"
+    config_schema = {"type": "object"}
+
+    def __init__(self, gate: threading.Event | None = None, fail: bool = False):
+        self.batches = []
+        self.gate = gate
+        self.fail = fail
+
+    def ingest(self, documents):
+        if self.gate is not None:
+            assert self.gate.wait(10)
+        if self.fail:
+            raise RuntimeError("ingestion failed")
+        self.batches.append([(doc.path, doc.content) for doc in documents])
+
+    def delete(self, documents):
+        pass
+
+
+def make_docs(num_docs: int) -> list[Document]:
+    docs = []
+    for i in range(num_docs):
+        doc = Document(f"doc{i}", "root")
+        doc.content = f"content {i}"
+        docs.append(doc)
+    return docs
+
+
+## Tests #######################################################################
+
+
+def test_run_all_ingestors():
+    """Test that every document is offered to every ingestor in batches"""
+    ingestors = [ContentIngestor(), ContentIngestor()]
+    docs = make_docs(5)
+    IngestionPipeline(ingestors, batch_size=2, queue_depth=1).run(docs)
+    expected = [(doc.path, f"content {i}") for i, doc in enumerate(docs)]
+    for ingestor in ingestors:
+        assert [len(batch) for batch in ingestor.batches] == [2, 2, 1]
+        assert sum(ingestor.batches, []) == expected
+
+
+def test_run_releases_content():
+    """Test that content is released once all ingestors are done with it"""
+    docs = make_docs(3)
+    IngestionPipeline([ContentIngestor(), ContentIngestor()], 2, 2).run(docs)
+    assert all(doc._content is None for doc in docs)
+
+
+def test_run_no_ingestors():
+    """Test that the documents are still consumed without any ingestors"""
+    consumed = []
+
+    def gen():
+        for doc in make_docs(3):
+            consumed.append(doc)
+            yield doc
+
+    IngestionPipeline([], 2, 2).run(gen())
+    assert len(consumed) == 3
+
+
+def test_run_backpressure():
+    """Test that a slow ingestor pauses the scrape once its queue is full and
+    that the other ingestors keep going in the meantime
+    """
+    batch_size, queue_depth = 2, 3
+    gate = threading.Event()
+    slow, fast = ContentIngestor(gate), ContentIngestor()
+    produced = []
+
+    def gen():
+        for doc in make_docs(20):
+            produced.append(doc)
+            yield doc
+
+    pipeline = IngestionPipeline([slow, fast], batch_size, queue_depth)
+    thread = threading.Thread(target=pipeline.run, args=(gen(),))
+    thread.start()
+    deadline = time.monotonic() + 10
+    while len(fast.batches) < 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert len(fast.batches) >= 2
+    # The slow ingestor holds one batch and has a full queue, and the scrape is
+    # blocked handing it one more document
+    time.sleep(0.2)
+    assert len(produced) <= batch_size + queue_depth + 1
+    gate.set()
+    thread.join(10)
+    assert not thread.is_alive()
+    assert len(sum(slow.batches, [])) == len(sum(fast.batches, [])) == 20
+
+
+def test_run_ingestor_failure():
+    """Test that a failing ingestor doesn't stop the others"""
+    failing, ok = ContentIngestor(fail=True), ContentIngestor()
+    docs = make_docs(3)
+    IngestionPipeline([failing, ok], 2, 2).run(docs)
+    assert len(sum(ok.batches, [])) == 3
+    assert all(doc._content is None for doc in docs)
+
+
+def test_run_scrape_failure():
+    """Test that a failing scrape is raised once the ingestors have stopped
+    and that queued documents are not ingested
+    """
+    gate = threading.Event()
+    ingestor = ContentIngestor(gate)
+
+    def gen():
+        yield from make_docs(4)
+        gate.set()
+        raise ValueError("scrape failed")
+
+    with pytest.raises(ValueError):
+        IngestionPipeline([ingestor], batch_size=2, queue_depth=10).run(gen())
+    assert not any(
+        thread.name.startswith("ingest-") for thread in threading.enumerate()
+    )
+    assert len(ingestor.batches) <= 1
@@ -0,0 +1,133 @@
+"""
+Unit tests for the ingestion scheduler
+"""
+# Standard
+import os
+
+# Third Party
+import pytest
+
+# First Party
+import aconfig
+
+# Local
+from ragnardoc.scheduling import Scheduler
+from ragnardoc.types import Document
+
+## Helpers #####################################################################
+
+
+def make_scheduler(**overrides) -> Scheduler:
+    config = {"policy": "recent", "pinned": [], "window": 0}
+    config.update(overrides)
+    return Scheduler(aconfig.Config(config, override_env_vars=False))
+
+
+@pytest.fixture
+def docs(scratch_dir):
+    """Documents in walk order with varying age, size, and type"""
+    specs = [
+        # name, size, age in seconds
+        ("old_big.txt", 300, 300),
+        ("new_pdf.pdf", 10, 0),
+        ("mid_small.md", 10, 100),
+        ("old_small.txt", 20, 200),
+    ]
+    now = 1_700_000_000
+    docs = []
+    for name, size, age in specs:
+        path = scratch_dir / name
+        path.write_bytes(b"x" * size)
+        os.utime(path, (now - age, now - age))
+        docs.append(
+            Document.from_file(
+                path,
+                root=scratch_dir,
+                converter=str if name.endswith(".pdf") else None,
+            )
+        )
+    return docs
+
+
+def names(docs) -> list[str]:
+    return [os.path.basename(doc.path) for doc in docs]
+
+
+## Tests #######################################################################
+
+
+def test_schedule_recent(docs):
+    """Test that the most recently modified documents come first"""
+    assert names(make_scheduler().schedule(docs)) == [
+        "new_pdf.pdf",
+        "mid_small.md",
+        "old_small.txt",
+        "old_big.txt",
+    ]
+
+
+def test_schedule_cost(docs):
+    """Test that raw text and small documents come first"""
+    assert names(make_scheduler(policy="cost").schedule(docs)) == [
+        "mid_small.md",
+        "old_small.txt",
+        "old_big.txt",
+        "new_pdf.pdf",
+    ]
+
+
+def test_schedule_walk(docs):
+    """Test that the walk policy keeps the original order"""
+    assert names(make_scheduler(policy="walk").schedule(docs)) == names(docs)
+
+
+def test_schedule_pinned(docs, scratch_dir):
+    """Test that pinned files and directories always come first"""
+    sub_dir = scratch_dir / "sub"
+    sub_dir.mkdir()
+    pinned_doc = sub_dir / "pinned.txt"
+    pinned_doc.write_text("hi")
+    os.utime(pinned_doc, (0, 0))
+    docs.append(Document.from_file(pinned_doc, root=scratch_dir))
+
+    scheduler = make_scheduler(
+        pinned=[str(sub_dir), str(scratch_dir / "old_big.txt")], policy="walk"
+    )
+    assert names(scheduler.schedule(docs))[:2] == ["old_big.txt", "pinned.txt"]
+    scheduler = make_scheduler(pinned=[str(sub_dir)])
+    assert names(scheduler.schedule(docs))[:2] == ["pinned.txt", "new_pdf.pdf"]
+
+
+def test_schedule_window(docs):
+    """Test that documents are released once the window is full so that the
+    schedule streams
+    """
+    consumed = []
+
+    def doc_stream():
+        for doc in docs:
+            consumed.append(doc)
+            yield doc
+
+    scheduled = make_scheduler(window=2).schedule(doc_stream())
+    first = next(scheduled)
+    assert len(consumed) == 3
+    assert names([first]) == ["new_pdf.pdf"]
+    assert names(scheduled) == ["mid_small.md", "old_small.txt", "old_big.txt"]
+
+
+def test_schedule_missing_file(scratch_dir):
+    """Test that documents whose files are gone are scheduled last"""
+    present = scratch_dir / "present.txt"
+    present.write_text("hi")
+    docs = [
+        Document(path=str(scratch_dir / "missing.txt"), root=str(scratch_dir)),
+        Document.from_file(present, root=scratch_dir),
+    ]
+    assert names(make_scheduler().schedule(docs)) == ["present.txt", "missing.txt"]
+
+
+def test_invalid_policy():
+    """Test that an unknown policy is an error"""
+    with pytest.raises(ValueError):
+        make_scheduler(policy="random")
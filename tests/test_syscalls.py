@@ -0,0 +1,52 @@
+"""
+Unit tests for syscall counting
+"""
+# Standard
+import os
+
+# Local
+from ragnardoc import syscalls
+from ragnardoc.types import Document
+
+
+def test_counts(txt_data_file, data_dir):
+    """Test that the wrappers count their calls until reset"""
+    syscalls.reset()
+    syscalls.stat(txt_data_file)
+    with syscalls.scandir(data_dir) as entries:
+        for entry in entries:
+            syscalls.entry_stat(entry)
+    with syscalls.open_file(txt_data_file) as handle:
+        handle.read()
+    num_entries = len(os.listdir(data_dir))
+    assert syscalls.counts() == {"stat": 1 + num_entries, "scandir": 1, "open": 1}
+    assert syscalls.reset()["stat"] == 1 + num_entries
+    assert syscalls.counts() == {}
+
+
+def test_document_stats_once(txt_data_file, data_dir):
+    """Test that a document only stats its file once no matter how many times
+    it is fingerprinted or loaded
+    """
+    syscalls.reset()
+    doc = Document.from_file(txt_data_file, data_dir)
+    fingerprint = doc.fingerprint()
+    for _ in range(3):
+        assert doc.fingerprint() == fingerprint
+        doc.load()
+    assert syscalls.counts() == {"stat": 1, "open": 1}
+
+    # Invalidating the document reads the metadata again
+    doc.invalidate()
+    assert doc.fingerprint() == fingerprint
+    assert syscalls.counts()["stat"] == 2
+
+
+def test_document_prefetched_stat(txt_data_file, data_dir):
+    """Test that a document with a prefetched stat result never stats its file"""
+    stat = os.stat(txt_data_file)
+    syscalls.reset()
+    doc = Document.from_file(txt_data_file, data_dir, stat=stat)
+    doc.fingerprint()
+    doc.load()
+    assert syscalls.counts() == {"open": 1}
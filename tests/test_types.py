@@ -2,8 +2,16 @@
 Unit tests for core types
 """
 # Standard
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+import os
+import threading
 import time
 
+# Third Party
+import pytest
+
 # Local
 from ragnardoc import types
 
@@ -93,6 +101,11 @@ def test_fingerprint_content_change(scratch_dir, data_dir):
         handle.write(content2)
         handle.flush()
 
+    # The fingerprint is cached for the cycle, so the change is not seen
+    # until the document is invalidated
+    assert doc.fingerprint() == fp1
+    doc.invalidate()
+
     # Make sure the fingerprint changes and the content is invalidated and
     # re-loaded
     fp2 = doc.fingerprint()
@@ -100,3 +113,246 @@ def test_fingerprint_content_change(scratch_dir, data_dir):
     assert fp2 != fp1
     assert read_content2 != read_content1
     assert doc.content == read_content2 == content2
+
+
+def test_fingerprint_prefetched_stat(txt_data_file, data_dir):
+    """Test that a prefetched stat result is used for the fingerprint instead of
+    reading the file metadata again
+    """
+    stat = os.stat(txt_data_file)
+    doc = types.Document.from_file(txt_data_file, data_dir, stat=stat)
+    with mock.patch("os.stat") as stat_mock:
+        fingerprint = doc.fingerprint()
+        stat_mock.assert_not_called()
+    assert (
+        fingerprint == types.Document.from_file(txt_data_file, data_dir).fingerprint()
+    )
+
+
+def test_scrape_stream():
+    """Test that a scrape stream yields documents and then exposes the removed
+    documents once iteration completes
+    """
+    docs = [types.Document("a", "root"), types.Document("b", "root")]
+    removed = [types.Document("c", "root")]
+
+    def gen():
+        yield from docs
+        return removed
+
+    stream = types.ScrapeStream(gen())
+    with pytest.raises(RuntimeError):
+        _ = stream.removed
+    assert list(stream) == docs
+    assert stream.removed == removed
+
+
+def test_document_slots():
+    """Test that documents don't carry a per-instance dict"""
+    doc = types.Document("a", "root")
+    assert not hasattr(doc, "__dict__")
+    with pytest.raises(AttributeError):
+        doc.unknown = 1
+
+
+def test_document_table(data_dir):
+    """Test that documents round trip through the columnar table"""
+
+    def converter(path):
+        return path
+
+    paths = [
+        data_dir / "sample.txt",
+        data_dir / "sample_docs" / "README.md",
+        data_dir / "sample_docs" / "nested" / "sample.txt",
+    ]
+    docs = [
+        types.Document.from_file(path, data_dir, stat=os.stat(path)) for path in paths
+    ]
+    docs.append(types.Document.from_file(paths[0], "/other", converter=converter))
+    table = types.DocumentTable(docs)
+    assert len(table) == len(docs)
+    for doc, table_doc in zip(docs, table, strict=True):
+        assert table_doc.path == doc.path
+        assert table_doc.root == doc.root
+        assert table_doc.converter == doc.converter
+        assert table_doc.fingerprint() == doc.fingerprint()
+    assert table[-1].path == docs[-1].path
+    assert [doc.path for doc in table[1:3]] == [doc.path for doc in docs[1:3]]
+    with pytest.raises(IndexError):
+        table[len(docs)]
+
+    # Directories are shared between the documents in them
+    assert len(table._dirs) == 4
+
+
+def test_document_table_stat_matches(scratch_dir):
+    """Test that the stored stat result reproduces what scheduling and
+    fingerprinting need
+    """
+    path = scratch_dir / "doc.txt"
+    path.write_text("hi")
+    os.utime(path, ns=(0, 1_700_000_000_123_456_789))
+    stat = os.stat(path)
+    (doc,) = types.DocumentTable(
+        [types.Document.from_file(path, scratch_dir, stat=stat)]
+    )
+    with mock.patch("os.stat") as stat_mock:
+        table_stat = doc.stat()
+        stat_mock.assert_not_called()
+    assert table_stat.st_mtime == stat.st_mtime
+    assert table_stat.st_mtime_ns == stat.st_mtime_ns
+    assert table_stat.st_size == stat.st_size
+    assert table_stat.st_mode == stat.st_mode
+
+
+def test_document_table_full_docs():
+    """Test that documents with state beyond the columns are kept as-is"""
+    doc = types.Document("a", "root", title="A", metadata={"foo": 1})
+    loaded = types.Document("b", "root")
+    loaded.content = "hi"
+    table = types.DocumentTable([doc, loaded, types.Document("c", "root")])
+    assert table[0] is doc
+    assert table[1] is loaded
+    assert table[2].path == "c"
+    assert table[2].stat() is None
+
+
+def test_load_single_flight(scratch_dir):
+    """Stress test that many threads reading the same documents concurrently
+    only trigger a single conversion per document and all see its result
+    """
+    num_docs, num_threads, num_reads = 8, 32, 20
+    calls = Counter()
+    calls_lock = threading.Lock()
+
+    def slow_converter(path):
+        with calls_lock:
+            calls[path] += 1
+        time.sleep(0.01)
+        return f"converted {path}"
+
+    docs = []
+    for i in range(num_docs):
+        path = scratch_dir / f"doc{i}.pdf"
+        path.write_text(str(i))
+        docs.append(
+            types.Document.from_file(path, scratch_dir, converter=slow_converter)
+        )
+
+    barrier = threading.Barrier(num_threads)
+
+    def reader(offset):
+        barrier.wait()
+        return [
+            docs[(offset + i) % num_docs].content for i in range(num_reads * num_docs)
+        ]
+
+    with ThreadPoolExecutor(num_threads) as pool:
+        results = list(pool.map(reader, range(num_threads)))
+
+    assert calls == Counter({doc.path: 1 for doc in docs})
+    for offset, contents in enumerate(results):
+        for i, content in enumerate(contents):
+            assert content == f"converted {docs[(offset + i) % num_docs].path}"
+
+
+def test_load_shared_error(txt_data_file, data_dir):
+    """Test that concurrent readers share a failed load rather than each
+    retrying the conversion, and that invalidating allows a retry
+    """
+    num_threads = 16
+    calls = []
+
+    def failing_converter(path):
+        calls.append(path)
+        time.sleep(0.01)
+        raise ValueError("bad doc")
+
+    doc = types.Document.from_file(txt_data_file, data_dir, converter=failing_converter)
+    barrier = threading.Barrier(num_threads)
+
+    def reader(_):
+        barrier.wait()
+        try:
+            return doc.content
+        except ValueError as err:
+            return err
+
+    with ThreadPoolExecutor(num_threads) as pool:
+        results = list(pool.map(reader, range(num_threads)))
+    assert len(calls) == 1
+    assert all(isinstance(result, ValueError) for result in results)
+
+    doc.invalidate()
+    with pytest.raises(ValueError):
+        doc.load()
+    assert len(calls) == 2
+
+
+def test_load_error_handler(scratch_dir):
+    """Test that the load error handler is told about each failed load once and
+    is kept by the document table
+    """
+    path = scratch_dir / "bad.txt"
+    path.write_bytes(b"\xff\xfe bad")
+    errors = []
+
+    def on_load_error(doc, err):
+        errors.append((doc.path, type(err)))
+
+    (doc,) = types.DocumentTable(
+        [types.Document.from_file(path, scratch_dir, on_load_error=on_load_error)]
+    )
+    assert doc.on_load_error is on_load_error
+    for _ in range(2):
+        with pytest.raises(UnicodeDecodeError):
+            doc.load()
+    assert errors == [(str(path), UnicodeDecodeError)]
+
+
+def test_open_stream_raw_text(txt_data_file, data_dir):
+    """Test that raw text is streamed from disk without loading the content"""
+    doc = types.Document.from_file(txt_data_file, data_dir)
+    with doc.open_stream() as stream:
+        assert stream.read() == txt_data_file.read_bytes()
+    assert doc._content is None
+
+
+def test_open_stream_empty(scratch_dir):
+    """Test that empty files (which can't be memory mapped) can be streamed"""
+    path = scratch_dir / "empty.txt"
+    path.write_bytes(b"")
+    with types.Document.from_file(path, scratch_dir).open_stream() as stream:
+        assert stream.read() == b""
+
+
+def test_open_stream_converted(txt_data_file, data_dir):
+    """Test that converted documents stream their converted content"""
+    doc = types.Document.from_file(
+        txt_data_file, data_dir, converter=lambda _: "converted ü"
+    )
+    with doc.open_stream() as stream:
+        assert stream.read() == "converted ü".encode()
+
+
+def test_export_formats(txt_data_file, data_dir):
+    """Test that converted documents hold every format their converter
+    exported and fall back to markdown for the rest
+    """
+    doc = types.Document.from_file(
+        txt_data_file,
+        data_dir,
+        converter=lambda _: {"markdown": "# converted", "text": "converted"},
+    )
+    assert doc.content == "# converted"
+    assert doc.export("text") == "converted"
+    assert doc.export("html") == "# converted"
+    with doc.open_stream("text") as stream:
+        assert stream.read() == b"converted"
+    doc.release()
+    assert doc.export("text") == "converted"
+
+    # Raw text is the same in every format
+    raw = types.Document.from_file(txt_data_file, data_dir)
+    assert raw.export("text") == raw.content